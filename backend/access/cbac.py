@@ -50,7 +50,7 @@ def default_cbac_required(view_func):
         user = request.user
 
         logger.debug("CBAC: Checking permissions: user=%r, claims=%s", user.username, claims)
-        if not CBACEntry.is_allowed(user, claims):
+        if not CBACEntry.is_allowed(user, claims, request=request):
             logger.warning("CBAC: Permission denied: user=%r, claims=%r", user.username, claims)
             emit("access.cbac.denied", request=request, other_fields={"claims": claims})
             raise CBACPermissionDenied(claims)
@@ -89,6 +89,7 @@ def is_graphql_allowed(
     app: str,
     object_type: str,
     field: str,
+    request=None,
     **extra: str,
 ):
     claims = make_graphql_claims(
@@ -100,7 +101,7 @@ def is_graphql_allowed(
         **extra,
     )
 
-    return CBACEntry.is_allowed(user, claims), claims
+    return CBACEntry.is_allowed(user, claims, request=request), claims
 
 
 class HasEventProperty(Protocol):
@@ -117,6 +118,7 @@ def is_graphql_allowed_for_model(
     instance: HasEventProperty | HasEventForeignKey,
     operation: Literal["query"] | Literal["mutation"],
     field: str,
+    request=None,
     **extra: str,
 ):
     event = instance.event
@@ -130,6 +132,7 @@ def is_graphql_allowed_for_model(
         app=app,
         object_type=object_type,
         field=field,
+        request=request,
         **extra,
     )
 
@@ -143,6 +146,7 @@ def graphql_check_access(instance, info, field: str, operation: Operation = "que
         instance=instance,
         operation=operation,
         field=field,
+        request=info.context,
         **extra,
     )
     if not allowed:
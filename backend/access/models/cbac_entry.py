@@ -1,11 +1,14 @@
 import logging
+import uuid
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Any
 
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.contrib.postgres.fields import HStoreField
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction
 from django.utils.timezone import now
 
 from core.utils import get_objects_within_period, log_get_or_create
@@ -17,6 +20,33 @@ from ..constants import CBAC_VALID_AFTER_EVENT_DAYS
 Claims = dict[str, str]
 logger = logging.getLogger("kompassi")
 
+CACHE_KEY_PREFIX = "kompassi:access:cbac"
+CACHE_TIMEOUT_SECONDS = 5 * 60
+
+
+@dataclass
+class CBACMatcher:
+    """
+    The CBAC entries of a single user held in memory, so that any number of claims can be
+    checked against them without hitting the database.
+
+    entries is a list of (valid_from, valid_until, claims). It may include entries that are not yet valid.
+    """
+
+    entries: list[tuple[datetime, datetime, Claims]]
+
+    def is_allowed(self, claims: Claims, t: datetime | None = None) -> bool:
+        """
+        Python equivalent of CBACEntry.is_allowed: is there a valid entry whose claims are contained by claims?
+        """
+        if t is None:
+            t = now()
+
+        return any(
+            valid_from <= t < valid_until and all(claims.get(key) == value for key, value in entry_claims.items())
+            for valid_from, valid_until, entry_claims in self.entries
+        )
+
 
 class CBACEntry(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="cbac_entries")
@@ -81,9 +111,95 @@ class CBACEntry(models.Model):
         return queryset
 
     @classmethod
-    def is_allowed(cls, user: AbstractUser, claims: Claims, t: datetime | None = None):
+    def is_allowed(cls, user: AbstractUser, claims: Claims, t: datetime | None = None, request=None):
+        """
+        Pass request to have the entries of the user loaded only once per request (see get_matcher).
+        """
+        if t is None and (request is not None or settings.KOMPASSI_CBAC_CACHE_SHARED):
+            return cls.get_matcher(user, request).is_allowed(claims)
+
         return cls.get_entries(user, claims, t=t).exists()
 
+    @staticmethod
+    def _get_cache_version_key(user_id: int) -> str:
+        return f"{CACHE_KEY_PREFIX}:version:{user_id}"
+
+    @classmethod
+    def _load_matcher(cls, user: AbstractUser) -> CBACMatcher:
+        if not user.is_authenticated:
+            return CBACMatcher(entries=[])
+
+        return CBACMatcher(
+            entries=list(
+                cls.objects.filter(user=user, valid_until__gt=now()).values_list("valid_from", "valid_until", "claims")
+            )
+        )
+
+    @classmethod
+    def _load_matcher_shared(cls, user: AbstractUser) -> CBACMatcher:
+        """
+        The cached entries are keyed by a version stamp of the user that is changed whenever
+        their entries change (see invalidate_cache), so stale entries are simply never read again.
+        """
+        if not user.is_authenticated:
+            return CBACMatcher(entries=[])
+
+        version_key = cls._get_cache_version_key(user.pk)
+        version = cache.get(version_key)
+        if version is None:
+            version = uuid.uuid4().hex
+            cache.set(version_key, version, None)
+
+        entries_key = f"{CACHE_KEY_PREFIX}:entries:{user.pk}:{version}"
+        entries = cache.get(entries_key)
+        if entries is None:
+            entries = cls._load_matcher(user).entries
+            cache.set(entries_key, entries, CACHE_TIMEOUT_SECONDS)
+
+        return CBACMatcher(entries=entries)
+
+    @classmethod
+    def get_matcher(cls, user: AbstractUser, request=None) -> CBACMatcher:
+        """
+        Returns a CBACMatcher for the currently valid entries of the user.
+
+        If request is given, the matcher is stored on it and reused for the rest of the request.
+        If KOMPASSI_CBAC_CACHE_SHARED is set, the entries are also cached across requests.
+        """
+        matchers: dict[Any, CBACMatcher] | None = None
+        if request is not None:
+            matchers = getattr(request, "_kompassi_cbac_matchers", None)
+            if matchers is None:
+                matchers = {}
+                request._kompassi_cbac_matchers = matchers
+
+            if (matcher := matchers.get(user.pk)) is not None:
+                return matcher
+
+        if settings.KOMPASSI_CBAC_CACHE_SHARED:
+            matcher = cls._load_matcher_shared(user)
+        else:
+            matcher = cls._load_matcher(user)
+
+        if matchers is not None:
+            matchers[user.pk] = matcher
+
+        return matcher
+
+    @classmethod
+    def invalidate_cache(cls, user_id: int):
+        """
+        Called by ..handlers.cbac_entry whenever CBAC entries of the user are created, changed or deleted.
+        The version stamp is changed again after commit so that a concurrent request cannot cache
+        entries it read before the transaction was committed.
+        """
+        if not settings.KOMPASSI_CBAC_CACHE_SHARED:
+            return
+
+        version_key = cls._get_cache_version_key(user_id)
+        cache.delete(version_key)
+        transaction.on_commit(lambda: cache.delete(version_key))
+
     @classmethod
     def ensure_admin_group_privileges(cls, t: datetime | None = None):
         from core.models import Event
@@ -1,13 +1,16 @@
+from datetime import timedelta
+from types import SimpleNamespace
 from unittest import TestCase as NonDatabaseTestCase
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
 
 from core.models import Person
 from core.models.event import Event
 from labour.models import LabourEventMeta
 
 from .email_aliases import firstname_surname
-from .models import CBACEntry, Claims, EmailAlias, EmailAliasType, GroupEmailAliasGrant
+from .models import CBACEntry, CBACMatcher, Claims, EmailAlias, EmailAliasType, GroupEmailAliasGrant
 from .utils import emailify
 
 
@@ -105,3 +108,44 @@ def test_ensure_admin_group_privileges(db):
 
     assert not CBACEntry.is_allowed(person.user, get_claims(event, "labour"))
     assert not CBACEntry.is_allowed(person.user, get_claims(event, "programme"))
+
+
+def test_cbac_matcher():
+    t = now()
+    matcher = CBACMatcher(
+        entries=[
+            (t - timedelta(days=1), t + timedelta(days=1), {"organization": "tracon", "app": "labour"}),
+            (t + timedelta(days=1), t + timedelta(days=2), {"organization": "tracon", "app": "programme"}),
+        ]
+    )
+
+    assert matcher.is_allowed({"organization": "tracon", "event": "tracon2024", "app": "labour"}, t)
+    assert not matcher.is_allowed({"organization": "tracon", "app": "programme"}, t)
+    assert matcher.is_allowed({"organization": "tracon", "app": "programme"}, t + timedelta(days=1, hours=1))
+    assert not matcher.is_allowed({"organization": "finncon", "app": "labour"}, t)
+    assert not matcher.is_allowed({"app": "labour"}, t)
+
+
+@override_settings(KOMPASSI_CBAC_CACHE_SHARED=True)
+def test_cbac_cache_invalidation(db, django_assert_num_queries):
+    meta, unused = LabourEventMeta.get_or_create_dummy()
+    event = meta.event
+    person, unused = Person.get_or_create_dummy()
+    request = SimpleNamespace()
+
+    assert not CBACEntry.is_allowed(person.user, get_claims(event, "labour"))
+
+    meta.admin_group.user_set.add(person.user)
+    CBACEntry.ensure_admin_group_privileges()
+
+    assert CBACEntry.is_allowed(person.user, get_claims(event, "labour"))
+
+    # served from the shared cache, and then from the matcher of the request
+    with django_assert_num_queries(0):
+        assert CBACEntry.is_allowed(person.user, get_claims(event, "labour"), request=request)
+        assert not CBACEntry.is_allowed(person.user, get_claims(event, "programme"), request=request)
+
+    meta.admin_group.user_set.remove(person.user)
+    CBACEntry.ensure_admin_group_privileges()
+
+    assert not CBACEntry.is_allowed(person.user, get_claims(event, "labour"))
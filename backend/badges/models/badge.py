@@ -253,6 +253,10 @@ class Badge(models.Model, CsvExportMixin):
             BadgePrivacyAdapter: BadgePrivacyAdapter(self),
         }
 
+    @classmethod
+    def get_csv_queryset(cls, event, queryset, fields):
+        return queryset.select_related("personnel_class")
+
     def get_name_fields(self):
         return [
             (self.surname.strip(), self.is_surname_visible),
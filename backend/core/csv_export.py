@@ -1,11 +1,21 @@
-from collections import namedtuple
+import tempfile
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from collections.abc import Callable, Iterator
+from itertools import islice
 
 import unicodecsv as csv
+from django.conf import settings
 from django.db import models
-from django.http import HttpResponse
+from django.db.models import prefetch_related_objects
+from django.http import FileResponse, StreamingHttpResponse
 
 ENCODING = "ISO-8859-15"
 
+# Model instances are fetched, prefetched and turned into rows this many at a time.
+EXPORT_CHUNK_SIZE = 500
+
 
 ExportFormat = namedtuple(
     "ExportFormat",
@@ -43,10 +53,29 @@ class CsvExportMixin:
         return dict()
 
     @classmethod
-    def get_csv_header(cls, event, fields=None, m2m_mode="separate_columns"):
+    def get_csv_queryset(cls, event, queryset, fields):
+        """
+        Adds the joins needed by the export to the queryset. By default follows the foreign keys
+        among the exported fields of this model. Override to also cover get_csv_related.
+        """
+        foreign_keys = [field.name for model, field in fields if model is cls and isinstance(field, models.ForeignKey)]
+        return queryset.select_related(*foreign_keys) if foreign_keys else queryset
+
+    @classmethod
+    def prefetch_csv_related(cls, event, model_instances):
+        """
+        Called with each chunk of exported instances before their rows are built.
+        Override to load in bulk what get_csv_related would otherwise query per instance.
+        """
+
+    @classmethod
+    def get_csv_header(cls, event, fields=None, m2m_mode="separate_columns", m2m_choices=None):
         if fields is None:
             fields = cls.get_csv_fields(event)
 
+        if m2m_choices is None:
+            m2m_choices = get_csv_m2m_choices(event, fields, m2m_mode)
+
         header_row = []
 
         for _model, field in fields:
@@ -59,8 +88,8 @@ class CsvExportMixin:
 
             if field_type == models.ManyToManyField:
                 if m2m_mode == "separate_columns":
-                    choices = get_m2m_choices(event, field)
-                    header_row.extend(f"{field_name}: {choice.__str__()}" for choice in choices)
+                    choices = m2m_choices[field]
+                    header_row.extend(f"{field_name}: {choice.label}" for choice in choices)
                 elif m2m_mode == "comma_separated":
                     header_row.append(field_name)
                 else:
@@ -70,9 +99,13 @@ class CsvExportMixin:
 
         return header_row
 
-    def get_csv_row(self, event, fields, m2m_mode="separate_columns"):
+    def get_csv_row(self, event, fields, m2m_mode="separate_columns", related=None, m2m_choices=None):
         result_row = []
-        related = self.get_csv_related()
+        if related is None:
+            related = self.get_csv_related()
+
+        if m2m_choices is None:
+            m2m_choices = get_csv_m2m_choices(event, fields, m2m_mode)
 
         for model, field in fields:
             if isinstance(field, str):
@@ -91,9 +124,11 @@ class CsvExportMixin:
 
             if field_type is models.ManyToManyField and field_value is not None:
                 if m2m_mode == "separate_columns":
-                    choices = get_m2m_choices(event, field)
+                    choices = m2m_choices[field]
 
-                    result_row.extend(field_value.filter(pk=choice.pk).exists() for choice in choices)
+                    # NOTE: .all() so that prefetched values are used
+                    selected_pks = {item.pk for item in field_value.all()}
+                    result_row.extend(choice.pk in selected_pks for choice in choices)
                 elif m2m_mode == "comma_separated":
                     result_row.append(", ".join(item.__str__() for item in field_value.all()))
                 else:
@@ -112,22 +147,190 @@ class CsvExportMixin:
         return result_row
 
 
-def get_m2m_choices(event, field):
+M2MChoice = namedtuple("M2MChoice", ["pk", "label"])
+
+
+class M2MChoicesCache:
+    """
+    Caches the choices of many-to-many fields for separate_columns exports per process.
+
+    Entries expire after ttl_seconds and the least recently used ones are evicted beyond max_size.
+    Choices scoped to an event are invalidated when one of them is saved or deleted in this process
+    (see .handlers.csv_export). Other processes pick up the change once the entry expires.
+
+    generations has a counter for each model whose choices have been cached. Invalidation bumps it,
+    and choices computed while it changed are returned but not stored.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.entries: OrderedDict[tuple, tuple[float, tuple[M2MChoice, ...]]] = OrderedDict()
+        self.generations: dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def get_key(event, target_model) -> tuple:
+        event_id = event.id if is_event_scoped(target_model) else None
+        return (event_id, target_model._meta.concrete_model._meta.label)
+
+    def get_or_set(self, key: tuple, compute: Callable[[], tuple[M2MChoice, ...]]) -> tuple[M2MChoice, ...]:
+        now = time.monotonic()
+        _event_id, model_label = key
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                expires_at, choices = entry
+                if expires_at > now:
+                    self.entries.move_to_end(key)
+                    return choices
+
+                del self.entries[key]
+
+            # NOTE: registered before computing so that saves of the model during compute() invalidate it
+            generation = self.generations.setdefault(model_label, 0)
+
+        choices = compute()
+
+        with self.lock:
+            if self.generations.get(model_label) != generation:
+                return choices
+
+            self.entries[key] = (now + self.ttl_seconds, choices)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+        return choices
+
+    def invalidate(self, model_label: str, event_id: int | None = None):
+        """
+        Invalidates the choices of the given model for the given event, or for all events if not given.
+        """
+        with self.lock:
+            if model_label in self.generations:
+                self.generations[model_label] += 1
+
+            for key in list(self.entries):
+                key_event_id, key_model_label = key
+                if key_model_label == model_label and (event_id is None or key_event_id == event_id):
+                    del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.generations.clear()
+
+
+m2m_choices_cache = M2MChoicesCache(
+    max_size=settings.KOMPASSI_CSV_EXPORT_M2M_CHOICES_CACHE_SIZE,
+    ttl_seconds=settings.KOMPASSI_CSV_EXPORT_M2M_CHOICES_CACHE_SECONDS,
+)
+
+
+def is_event_scoped(target_model) -> bool:
+    return any(f.name == "event" for f in target_model._meta.fields)
+
+
+def get_m2m_choices(event, field) -> tuple[M2MChoice, ...]:
     target_model = field.related_model
-    cache_key = (event.id, target_model._meta.app_label, target_model._meta.model_name)
 
-    if cache_key not in get_m2m_choices.cache:
-        if any(f.name == "event" for f in target_model._meta.fields):
+    def compute():
+        if is_event_scoped(target_model):
             choices = target_model.objects.filter(event=event)
         else:
             choices = target_model.objects.all()
 
-        get_m2m_choices.cache[cache_key] = choices.order_by("pk")
+        return tuple(M2MChoice(choice.pk, str(choice)) for choice in choices.order_by("pk"))
+
+    return m2m_choices_cache.get_or_set(M2MChoicesCache.get_key(event, target_model), compute)
 
-    return get_m2m_choices.cache[cache_key]
 
+def get_csv_m2m_choices(event, fields, m2m_mode="separate_columns") -> dict:
+    """
+    Returns the choices of each many-to-many field among fields for separate_columns mode.
+    Resolved once per export so that the header and every row have the same columns.
+    """
+    if m2m_mode != "separate_columns":
+        return {}
 
-get_m2m_choices.cache = {}
+    return {field: get_m2m_choices(event, field) for _model, field in fields if type(field) is models.ManyToManyField}
+
+
+class _Echo:
+    """
+    A file-like object for csv.writer that just returns what is written to it.
+    """
+
+    def write(self, value):
+        return value
+
+
+def get_csv_fields(event, model, model_instances):
+    # XXX Horrible hack.
+    try:
+        # EventSurveys force us to get this from an instance instead of the model class because they may differ
+        return model_instances[0].get_csv_fields(event)
+    except IndexError:
+        # empty set, use the old way
+        return model.get_csv_fields(event)
+
+
+def iter_chunks(model, model_instances, chunk_size=EXPORT_CHUNK_SIZE) -> Iterator[list]:
+    if isinstance(model_instances, models.QuerySet):
+        model_instances = model_instances.iterator(chunk_size=chunk_size)
+
+    model_instances = iter(model_instances)
+    while chunk := list(islice(model_instances, chunk_size)):
+        if any(isinstance(model_instance, str | int) for model_instance in chunk):
+            instances_by_pk = model.objects.in_bulk([int(item) for item in chunk if isinstance(item, str | int)])
+            chunk = [instances_by_pk[int(item)] if isinstance(item, str | int) else item for item in chunk]
+
+        yield chunk
+
+
+def prefetch_m2m(fields, instances_with_related: list[tuple[models.Model, dict]]):
+    """
+    Prefetches the many-to-many fields among the exported fields for a chunk of instances,
+    including those that live on the related objects returned by get_csv_related.
+    """
+    for model, field in fields:
+        if not isinstance(field, models.ManyToManyField):
+            continue
+
+        sources = []
+        for model_instance, related in instances_with_related:
+            source_instance = related.get(model, None) if model in related else model_instance
+            if source_instance is not None and source_instance.pk is not None:
+                sources.append(source_instance)
+
+        if sources:
+            prefetch_related_objects(sources, field.name)
+
+
+def iter_rows(event, model, model_instances, m2m_mode="separate_columns", fields=None) -> Iterator[list]:
+    """
+    Yields the header and then a row for each model instance, fetching the instances in chunks
+    of EXPORT_CHUNK_SIZE with their related objects and many-to-many fields prefetched.
+    """
+    if fields is None:
+        fields = get_csv_fields(event, model, model_instances)
+
+    if isinstance(model_instances, models.QuerySet):
+        model_instances = model.get_csv_queryset(event, model_instances, fields)
+
+    m2m_choices = get_csv_m2m_choices(event, fields, m2m_mode)
+
+    yield model.get_csv_header(event, fields, m2m_mode, m2m_choices=m2m_choices)
+
+    for chunk in iter_chunks(model, model_instances):
+        model.prefetch_csv_related(event, chunk)
+        instances_with_related = [(model_instance, model_instance.get_csv_related()) for model_instance in chunk]
+        prefetch_m2m(fields, instances_with_related)
+
+        for model_instance, related in instances_with_related:
+            yield model_instance.get_csv_row(event, fields, m2m_mode, related=related, m2m_choices=m2m_choices)
 
 
 def write_row(event, writer, fields, model_instance, m2m_mode):
@@ -135,50 +338,69 @@ def write_row(event, writer, fields, model_instance, m2m_mode):
     writer.writerow(result_row)
 
 
-def make_writer(output_stream, dialect):
+def make_writer(output_stream, dialect, constant_memory=False):
     if dialect == "xlsx":
         from .excel_export import XlsxWriter
 
-        return XlsxWriter(output_stream)
+        return XlsxWriter(output_stream, constant_memory=constant_memory)
     else:
         return csv.writer(output_stream, encoding=ENCODING, dialect=dialect, errors="ignore")
 
 
 def export_csv(event, model, model_instances, output_file, m2m_mode="separate_columns", dialect="excel-tab"):
-    # XXX Horrible hack.
-    try:
-        # EventSurveys force us to get this from an instance instead of the model class because they may differ
-        fields = model_instances[0].get_csv_fields(event)
-    except IndexError:
-        # empty set, use the old way
-        fields = model.get_csv_fields(event)
-    writer = make_writer(output_file, dialect)
-    writer.writerow(model.get_csv_header(event, fields, m2m_mode))
-
-    for model_instance in model_instances:
-        if isinstance(model_instance, str | int):
-            model_instance = model.objects.get(pk=int(model_instances))
+    writer = make_writer(output_file, dialect, constant_memory=True)
 
-        write_row(event, writer, fields, model_instance, m2m_mode)
+    for row in iter_rows(event, model, model_instances, m2m_mode):
+        writer.writerow(row)
 
     if getattr(writer, "must_close", False):
         writer.close()
 
 
+def stream_csv(event, model, model_instances, m2m_mode="separate_columns", dialect="excel", rows_per_chunk=100):
+    """
+    Yields the export as encoded CSV in chunks of rows_per_chunk rows.
+    Intended to be used with StreamingHttpResponse.
+    """
+    writer = csv.writer(_Echo(), encoding=ENCODING, dialect=dialect, errors="ignore")
+    chunk: list[bytes] = []
+
+    for row in iter_rows(event, model, model_instances, m2m_mode):
+        chunk.append(writer.writerow(row))
+        if len(chunk) >= rows_per_chunk:
+            yield b"".join(chunk)
+            chunk.clear()
+
+    if chunk:
+        yield b"".join(chunk)
+
+
 CONTENT_TYPES = dict(
     xlsx="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
 )
 
 
-def csv_response(*args, **kwargs):
-    filename = kwargs.pop("filename")
-    dialect = kwargs.get("dialect", "excel")
-
-    response = HttpResponse(content_type=CONTENT_TYPES.get(dialect, "text/csv"))
+def csv_response(event, model, model_instances, *, filename, dialect="excel", m2m_mode="separate_columns"):
+    """
+    CSV and TSV are streamed as they are generated. XLSX cannot be streamed, so the workbook is
+    built in constant memory mode into a temporary file that is then streamed from disk.
+    """
+    if dialect == "xlsx":
+        output_file = tempfile.TemporaryFile()  # closed by FileResponse
+        export_csv(event, model, model_instances, output_file, m2m_mode=m2m_mode, dialect=dialect)
+        output_file.seek(0)
+
+        return FileResponse(
+            output_file,
+            as_attachment=True,
+            filename=filename,
+            content_type=CONTENT_TYPES[dialect],
+        )
+
+    response = StreamingHttpResponse(
+        stream_csv(event, model, model_instances, m2m_mode=m2m_mode, dialect=dialect),
+        content_type=CONTENT_TYPES.get(dialect, "text/csv"),
+    )
     response["Content-Disposition"] = f'attachment; filename="{filename}"'
 
-    kwargs["output_file"] = response
-
-    export_csv(*args, **kwargs)
-
     return response
@@ -5,20 +5,32 @@ import xlsxwriter
 
 class XlsxWriter:
     """
-    An almost csv.writer compatible wrapper for XlsxWriter. Horribly inefficient.
+    An almost csv.writer compatible wrapper for XlsxWriter. Horribly inefficient
+    unless constant_memory is set.
 
     Must .close() to get the data actually written. Use getattr(writer, 'must_close', False)
     to distinguish from an actual csv.writer.
+
+    With constant_memory=True, each row is flushed to a temporary file as soon as the next one
+    is started, and the workbook is written directly into output_stream (preferably a real file,
+    see eg. forms/views/forms_survey_excel_export_view.py) instead of being buffered in memory.
+    Rows must then be written in order, which writerow does anyway.
     """
 
-    def __init__(self, output_stream):
+    def __init__(self, output_stream, constant_memory: bool = False):
         self.row = 0
         self.output_stream = output_stream
-        self.buf = io.BytesIO()
-        self.workbook = xlsxwriter.Workbook(self.buf)
-        self.worksheet = self.workbook.add_worksheet()
         self.must_close = True
 
+        if constant_memory:
+            self.buf = None
+            self.workbook = xlsxwriter.Workbook(output_stream, {"constant_memory": True})
+        else:
+            self.buf = io.BytesIO()
+            self.workbook = xlsxwriter.Workbook(self.buf)
+
+        self.worksheet = self.workbook.add_worksheet()
+
     def writerow(self, row):
         for col, value in enumerate(row):
             if isinstance(value, str):
@@ -34,6 +46,8 @@ class XlsxWriter:
 
     def close(self):
         self.workbook.close()
-        self.buf.seek(0)
-        self.output_stream.write(self.buf.read())
-        self.buf.close()
+
+        if self.buf is not None:
+            self.buf.seek(0)
+            self.output_stream.write(self.buf.read())
+            self.buf.close()
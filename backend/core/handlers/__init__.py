@@ -0,0 +1 @@
+from . import csv_export
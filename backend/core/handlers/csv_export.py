@@ -0,0 +1,16 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from ..csv_export import m2m_choices_cache
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def m2m_choice_post_save_or_delete(sender, instance, **kwargs):
+    # NOTE: any model may be the target of an exported many-to-many field, so this receives every save and delete.
+    # Only models whose choices have been cached are invalidated; the rest return here without taking the lock.
+    model_label = sender._meta.concrete_model._meta.label
+    if model_label not in m2m_choices_cache.generations:
+        return
+
+    m2m_choices_cache.invalidate(model_label, getattr(instance, "event_id", None))
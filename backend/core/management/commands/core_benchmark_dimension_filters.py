@@ -0,0 +1,70 @@
+from timeit import timeit
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...graphql.common import DimensionFilterInput
+
+
+def parse_filter(filter_str: str) -> SimpleNamespace:
+    """
+    "status=accepted,rejected" -> DimensionFilterInput lookalike
+    """
+    dimension, sep, values = filter_str.partition("=")
+    if not sep or not dimension:
+        raise CommandError(f"Invalid filter (expected dimension=value1,value2,…): {filter_str}")
+
+    return SimpleNamespace(dimension=dimension, values=[value for value in values.split(",") if value])
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares DimensionFilterInput.filter (joins) against filter_cached_dimensions (JSONB containment) "
+        "on the responses of a survey or the programs of an event"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("event_slug")
+        parser.add_argument("--survey", help="Survey slug. If not given, programs of the event are used.")
+        parser.add_argument(
+            "--filter",
+            action="append",
+            default=[],
+            dest="filters",
+            metavar="DIMENSION=VALUE1,VALUE2",
+            help="May be given multiple times",
+        )
+        parser.add_argument("--repeat", type=int, default=5, help="Number of runs per implementation")
+        parser.add_argument("--explain", action="store_true", help="Also print query plans")
+
+    def handle(self, *args, **options):
+        from forms.models.survey import Survey
+        from program_v2.models import Program
+
+        event_slug = options["event_slug"]
+        filters = [parse_filter(filter_str) for filter_str in options["filters"]]
+        repeat = options["repeat"]
+
+        if survey_slug := options["survey"]:
+            survey = Survey.objects.get(event__slug=event_slug, slug=survey_slug)
+            queryset = survey.responses.all()
+        else:
+            queryset = Program.objects.filter(event__slug=event_slug)
+
+        results = {}
+        for func in (DimensionFilterInput.filter, DimensionFilterInput.filter_cached_dimensions):
+            filtered = func(queryset, filters)  # type: ignore
+
+            if options["explain"]:
+                self.stdout.write(f"{func.__name__}:\n{filtered.explain(analyze=True)}\n")
+
+            ids = list(filtered.values_list("id", flat=True))
+            elapsed = timeit(lambda filtered=filtered: list(filtered.values_list("id", flat=True)), number=repeat)
+            self.stdout.write(
+                f"{func.__name__}: {elapsed / repeat * 1000:.1f} ms, "
+                f"{len(ids)} rows ({len(ids) - len(set(ids))} duplicates)"
+            )
+            results[func.__name__] = set(ids)
+
+        if len(set(map(frozenset, results.values()))) != 1:
+            raise CommandError("The filter implementations disagree")
@@ -7,6 +7,8 @@ NEVER_BLOW_PAGE_WIZARD_PREFIXES = [
     "/desuprofile/confirm/",
     "/oauth2/",
     "/oidc/",
+    # polled by the ticket shop waiting room; see tickets/admission_queue.py
+    "/tickets/queue/",
 ]
 
 
@@ -28,16 +30,15 @@ class PageWizardMiddleware:
         return self.get_response(request)
 
     def _should_clear_page_wizard(self, request) -> bool:
-        related = request.session.get("core.utils.page_wizard.related", None)
-        if related is None:
-            return False
+        # cheap checks first so that exempt requests never load the session
         if request.method != "GET":
             return False
-        if request.path in related:
-            return False
         if any(request.path.startswith(prefix) for prefix in NEVER_BLOW_PAGE_WIZARD_PREFIXES):
             return False
-        return True
+        related = request.session.get("core.utils.page_wizard.related", None)
+        if related is None:
+            return False
+        return request.path not in related
 
     def process_view(self, request, view_func, view_args, view_kwargs):
         if self._should_clear_page_wizard(request):
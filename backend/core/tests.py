@@ -1,10 +1,12 @@
 from datetime import date, datetime
+from unittest import mock
 
 from babel import Locale
 from dateutil.tz import tzlocal
 from django.test import TestCase
 from django.utils.timezone import get_current_timezone
 
+from core.csv_export import M2MChoice, M2MChoicesCache, m2m_choices_cache
 from core.utils.time_utils import format_date_range
 
 from .utils import format_interval, full_hours_between, slugify
@@ -122,3 +124,72 @@ class UtilsTestCase(TestCase):
         assert format_interval(d0, d1, locale=locale) == "ke 27.4. 21.00–23.00"
 
         assert format_interval(d0, d2, locale=locale) == "ke 27.4. 21.00 – to 28.4. 1.00"
+
+
+def test_m2m_choices_cache():
+    calls = []
+
+    def compute(label):
+        def _compute():
+            calls.append(label)
+            return (M2MChoice(1, label),)
+
+        return _compute
+
+    cache = M2MChoicesCache(max_size=2, ttl_seconds=60)
+
+    assert cache.get_or_set((1, "labour.JobCategory"), compute("a"))[0].label == "a"
+    assert cache.get_or_set((1, "labour.JobCategory"), compute("a"))[0].label == "a"
+    assert calls == ["a"]
+
+    # least recently used is evicted
+    cache.get_or_set((2, "labour.JobCategory"), compute("b"))
+    cache.get_or_set((1, "labour.JobCategory"), compute("a"))
+    cache.get_or_set((None, "labour.Qualification"), compute("c"))
+    assert (2, "labour.JobCategory") not in cache.entries
+    assert (1, "labour.JobCategory") in cache.entries
+
+    # invalidation is scoped to the event
+    cache.invalidate("labour.JobCategory", 2)
+    assert (1, "labour.JobCategory") in cache.entries
+    cache.invalidate("labour.JobCategory", 1)
+    assert (1, "labour.JobCategory") not in cache.entries
+    cache.invalidate("labour.Qualification")
+    assert not cache.entries
+
+    # expired entries are recomputed
+    cache = M2MChoicesCache(max_size=2, ttl_seconds=0)
+    calls.clear()
+    cache.get_or_set((1, "labour.JobCategory"), compute("a"))
+    cache.get_or_set((1, "labour.JobCategory"), compute("a"))
+    assert calls == ["a", "a"]
+
+    # choices computed while the model was invalidated are returned but not stored
+    cache = M2MChoicesCache(max_size=2, ttl_seconds=60)
+
+    def compute_during_invalidate():
+        cache.invalidate("labour.JobCategory", 1)
+        return (M2MChoice(1, "stale"),)
+
+    assert cache.get_or_set((1, "labour.JobCategory"), compute_during_invalidate)[0].label == "stale"
+    assert (1, "labour.JobCategory") not in cache.entries
+    assert cache.get_or_set((1, "labour.JobCategory"), compute("fresh"))[0].label == "fresh"
+    assert (1, "labour.JobCategory") in cache.entries
+
+
+def test_m2m_choice_post_save_or_delete():
+    from django.contrib.auth.models import Group
+
+    from core.handlers.csv_export import m2m_choice_post_save_or_delete
+
+    with (
+        mock.patch.object(m2m_choices_cache, "generations", {}),
+        mock.patch.object(m2m_choices_cache, "invalidate") as invalidate,
+    ):
+        # models whose choices are not cached are ignored
+        m2m_choice_post_save_or_delete(sender=Group, instance=Group(name="x"))
+        invalidate.assert_not_called()
+
+        m2m_choices_cache.generations["auth.Group"] = 0
+        m2m_choice_post_save_or_delete(sender=Group, instance=Group(name="x"))
+        invalidate.assert_called_once_with("auth.Group", None)
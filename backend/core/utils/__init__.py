@@ -10,6 +10,7 @@ from .form_utils import (
     make_form_readonly,
     make_horizontal_form_helper,
 )
+from .db_utils import retry_on_serialization_failure
 from .locale_utils import get_current_locale
 from .log_utils import log_delete, log_get_or_create
 from .misc_utils import (
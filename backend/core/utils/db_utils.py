@@ -0,0 +1,49 @@
+import logging
+from collections.abc import Callable
+from functools import wraps
+from typing import ParamSpec, TypeVar
+
+from django.db import OperationalError, connection
+
+logger = logging.getLogger("kompassi")
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+# serialization_failure, deadlock_detected
+RETRYABLE_SQLSTATES = ("40001", "40P01")
+
+
+def is_retryable(exc: OperationalError) -> bool:
+    cause = exc.__cause__
+    sqlstate = getattr(cause, "sqlstate", None) or getattr(cause, "pgcode", None)
+    return sqlstate in RETRYABLE_SQLSTATES
+
+
+def retry_on_serialization_failure(max_attempts: int = 3) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """
+    Retries the decorated function if its transaction is aborted due to a serialization failure or
+    a deadlock. The function must start its own transaction (eg. with transaction.atomic) and must not
+    have side effects outside the database before it commits.
+
+    When called within an enclosing transaction, the function is not retried, because the enclosing
+    transaction is aborted as well.
+    """
+
+    def decorator(func: Callable[P, R]) -> Callable[P, R]:
+        @wraps(func)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            attempt = 1
+            while True:
+                try:
+                    return func(*args, **kwargs)
+                except OperationalError as exc:
+                    if connection.in_atomic_block or attempt >= max_attempts or not is_retryable(exc):
+                        raise
+
+                    logger.warning(f"{func.__name__}: Retrying after {exc} (attempt {attempt}/{max_attempts})")
+                    attempt += 1
+
+        return wrapper
+
+    return decorator
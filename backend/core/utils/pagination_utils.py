@@ -0,0 +1,84 @@
+"""
+Keyset ("seek") pagination. Unlike OFFSET pagination, the cost of fetching a page does not grow
+with the number of rows before it, and rows inserted concurrently do not shift pages around.
+
+The ordering must be total, so the last key should be unique (typically the primary key).
+The cursor of a row is an opaque string that encodes the values of the keys for that row.
+"""
+
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections.abc import Sequence
+from typing import Any, TypeVar
+
+from django.db import models
+
+T = TypeVar("T", bound=models.Model)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    # NOTE: DjangoJSONEncoder would truncate datetimes to milliseconds
+    return urlsafe_b64encode(json.dumps(list(values), default=str).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> list[Any]:
+    try:
+        values = json.loads(urlsafe_b64decode(cursor.encode("ascii")))
+    except ValueError as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+    if not isinstance(values, list):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+    return values
+
+
+def get_cursor(instance: models.Model, keys: Sequence[str]) -> str:
+    return encode_cursor([getattr(instance, key) for key in keys])
+
+
+def keyset_filter(
+    queryset: models.QuerySet[T],
+    keys: Sequence[str],
+    values: Sequence[Any],
+    descending: bool = False,
+) -> models.QuerySet[T]:
+    """
+    Returns the rows of the queryset that come strictly after the row with the given key values,
+    ie. (key1, key2, …) > (value1, value2, …) (or < if descending).
+    """
+    if len(keys) != len(values):
+        raise ValueError(f"Expected {len(keys)} cursor values, got {len(values)}")
+
+    lookup = "lt" if descending else "gt"
+    condition = models.Q()
+
+    for index, key in enumerate(keys):
+        condition |= models.Q(
+            **{f"{key}__{lookup}": values[index]},
+            **dict(zip(keys[:index], values[:index], strict=True)),
+        )
+
+    return queryset.filter(condition)
+
+
+def keyset_paginate(
+    queryset: models.QuerySet[T],
+    keys: Sequence[str],
+    first: int,
+    after: str | None = None,
+    descending: bool = False,
+) -> tuple[list[T], bool]:
+    """
+    Returns (page, has_next_page) where page contains at most `first` rows after
+    the row designated by the cursor `after` (or from the beginning if not given).
+    Keys may refer to annotations made on the queryset. They must not be NULL.
+    """
+    queryset = queryset.order_by(*(f"-{key}" if descending else key for key in keys))
+
+    if after:
+        queryset = keyset_filter(queryset, keys, decode_cursor(after), descending)
+
+    # fetch one extra to find out if there is a next page
+    page = list(queryset[: first + 1])
+    return page[:first], len(page) > first
@@ -1,4 +1,5 @@
-from collections.abc import Collection, Sequence
+import csv
+from collections.abc import Collection, Iterator, Sequence
 from typing import Any, BinaryIO
 
 from django.db import models
@@ -7,8 +8,11 @@ from django.utils.timezone import localtime
 
 from .models.dimension import Dimension
 from .models.field import Field, FieldType
+from .models.form import Form
 from .models.response import Response
 
+EXPORT_CHUNK_SIZE = 1000
+
 
 def get_header_cells(field: Field) -> list[str]:
     header_cells: list[str] = []
@@ -52,33 +56,88 @@ def get_response_cells(field: Field, values: dict[str, Any]) -> list[Any]:
     return cells
 
 
-def write_responses_as_excel(
+def get_response_rows(
     dimensions: Collection[Dimension],
     fields: Sequence[Field],
     responses: models.QuerySet[Response],
-    output_stream: BinaryIO | HttpResponse,
-):
-    from core.excel_export import XlsxWriter
-
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[list[Any]]:
+    """
+    Yields the header row and then one row per response. Responses are streamed from the database
+    in chunks, so memory use does not grow with the number of responses.
+    """
     # No meaningful way to include FileUpload fields for now.
     fields = [field for field in fields if field.type != FieldType.FILE_UPLOAD]
+    dimensions = list(dimensions)
 
-    output = XlsxWriter(output_stream)
+    # form_id -> language, to avoid fetching the form of each response separately
+    languages = dict(Form.objects.filter(id__in=responses.order_by().values("form_id")).values_list("id", "language"))
 
     header_row = ["created_at", "language"]
     header_row.extend(f"dimensions.{dimension.slug}" for dimension in dimensions)
     header_row.extend(cell for field in fields for cell in get_header_cells(field))
-    output.writerow(header_row)
+    yield header_row
 
-    for response in responses:
+    responses = responses.only("form_id", "form_data", "created_at", "cached_dimensions")
+    for response in responses.iterator(chunk_size=chunk_size):
         values, _warnings = response.get_processed_form_data(fields)
 
         response_row = [
             localtime(response.created_at).replace(tzinfo=None),
-            response.form.language,
+            languages.get(response.form_id, ""),  # type: ignore
         ]
         response_row.extend(", ".join(response.cached_dimensions.get(dimension.slug, [])) for dimension in dimensions)
         response_row.extend(cell for field in fields for cell in get_response_cells(field, values))
-        output.writerow(response_row)
+        yield response_row
+
+
+def write_responses_as_excel(
+    dimensions: Collection[Dimension],
+    fields: Sequence[Field],
+    responses: models.QuerySet[Response],
+    output_stream: BinaryIO | HttpResponse,
+):
+    """
+    Writes the workbook in constant memory mode directly into output_stream.
+    Prefer a temporary file over a HttpResponse as output_stream for large surveys.
+    """
+    from core.excel_export import XlsxWriter
+
+    output = XlsxWriter(output_stream, constant_memory=True)
+
+    for row in get_response_rows(dimensions, fields, responses):
+        output.writerow(row)
 
     output.close()
+
+
+class _Echo:
+    """
+    A file-like object for csv.writer that just returns what is written to it.
+    """
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def stream_responses_as_csv(
+    dimensions: Collection[Dimension],
+    fields: Sequence[Field],
+    responses: models.QuerySet[Response],
+    rows_per_chunk: int = 100,
+) -> Iterator[bytes]:
+    """
+    Yields the responses as UTF-8 encoded CSV in chunks of rows_per_chunk rows.
+    Intended to be used with StreamingHttpResponse.
+    """
+    writer = csv.writer(_Echo())
+    chunk: list[str] = []
+
+    for row in get_response_rows(dimensions, fields, responses):
+        chunk.append(writer.writerow(row))
+        if len(chunk) >= rows_per_chunk:
+            yield "".join(chunk).encode("utf-8")
+            chunk.clear()
+
+    if chunk:
+        yield "".join(chunk).encode("utf-8")
@@ -4,6 +4,7 @@ from django.core.exceptions import SuspiciousOperation
 
 from access.cbac import graphql_check_access
 from core.utils import get_objects_within_period, normalize_whitespace
+from graphql_api.dataloaders import prime_response_loaders
 
 from ..models.meta import FormsEventMeta, FormsProfileMeta
 from ..models.response import Response
@@ -47,7 +48,10 @@ class FormsProfileMetaType(graphene.ObjectType):
         """
         if info.context.user != meta.person.user:
             raise SuspiciousOperation("User mismatch")
-        return Response.objects.filter(created_by=meta.person.user).order_by("-created_at")
+        return prime_response_loaders(
+            info,
+            Response.objects.filter(created_by=meta.person.user).order_by("-created_at"),
+        )
 
     responses = graphene.NonNull(
         graphene.List(
@@ -0,0 +1,59 @@
+import graphene
+from graphene.types.generic import GenericScalar
+
+from access.cbac import graphql_check_access
+from core.graphql.common import DimensionFilterInput
+
+from ...models.response import Response
+from ...models.survey import Survey
+from .update_response_dimensions import get_dimension_values
+
+
+class BulkUpdateResponseDimensionsInput(graphene.InputObjectType):
+    event_slug = graphene.String(required=True)
+    survey_slug = graphene.String(required=True)
+    response_ids = graphene.List(graphene.NonNull(graphene.String))
+    filters = graphene.List(DimensionFilterInput)
+    form_data = GenericScalar(required=True)
+
+
+class BulkUpdateResponseDimensions(graphene.Mutation):
+    class Arguments:
+        input = BulkUpdateResponseDimensionsInput(required=True)
+
+    count_updated_responses = graphene.Int()
+
+    @staticmethod
+    def mutate(
+        _root,
+        info,
+        input: BulkUpdateResponseDimensionsInput,
+    ):
+        """
+        Sets the dimensions present in form_data (eg. status=accepted) on many responses at once.
+        The responses are those listed in response_ids, or if not given, those matching filters.
+        One of them must be given; to update every response, pass an empty list of filters.
+        Dimensions not present in form_data are left untouched.
+        """
+        form_data: dict[str, str] = input.form_data  # type: ignore
+
+        if input.response_ids is None and input.filters is None:
+            raise ValueError("Either responseIds or filters must be given")
+
+        if input.response_ids is not None and not input.response_ids:
+            return BulkUpdateResponseDimensions(count_updated_responses=0)  # type: ignore
+
+        survey = Survey.objects.get(event__slug=input.event_slug, slug=input.survey_slug)
+
+        # TODO bastardization of graphql_check_access, rethink
+        graphql_check_access(survey, info, "response", "mutation")
+
+        if input.response_ids is not None:
+            responses = survey.responses.filter(id__in=input.response_ids)
+        else:
+            responses = DimensionFilterInput.filter_cached_dimensions(survey.responses.all(), input.filters)  # type: ignore
+
+        values = get_dimension_values(survey, form_data)
+        count_updated_responses = Response.set_dimension_values_qs(survey, responses, values)
+
+        return BulkUpdateResponseDimensions(count_updated_responses=count_updated_responses)  # type: ignore
@@ -5,6 +5,7 @@ from graphene_django import DjangoObjectType
 
 from core.graphql.user import LimitedUserType
 from core.utils.text_utils import normalize_whitespace
+from graphql_api.dataloaders import get_loader, load_forms, load_key_dimension_slugs, load_surveys_by_form, load_users
 
 from ..models.response import Response
 from .dimension import ResponseDimensionValueType
@@ -18,10 +19,11 @@ class LimitedResponseType(DjangoObjectType):
         info,
         key_fields_only: bool = False,
     ):
-        fields = response.form.validated_fields
+        form = get_loader(info, load_forms).load(response.form_id)  # type: ignore
+        fields = form.validated_fields  # type: ignore
 
         if key_fields_only:
-            survey = response.form.survey
+            survey = get_loader(info, load_surveys_by_form).load(response.form_id)  # type: ignore
             key_fields = survey.key_fields if survey else []
             fields = [field for field in fields if field.slug in key_fields]
 
@@ -41,7 +43,7 @@ class LimitedResponseType(DjangoObjectType):
 
     @staticmethod
     def resolve_language(response: Response, info):
-        return response.form.language
+        return get_loader(info, load_forms).load(response.form_id).language  # type: ignore
 
     language = graphene.Field(
         graphene.NonNull(graphene.String),
@@ -54,10 +56,11 @@ class LimitedResponseType(DjangoObjectType):
         Returns the user who submitted the response. If response is to an anonymous survey,
         this information will not be available.
         """
-        if (survey := response.form.survey) and survey.anonymity in ("hard", "soft"):
+        survey = get_loader(info, load_surveys_by_form).load(response.form_id)  # type: ignore
+        if survey and survey.anonymity in ("hard", "soft"):
             return None
 
-        return response.created_by
+        return get_loader(info, load_users).load(response.created_by_id)  # type: ignore
 
     created_by = graphene.Field(
         LimitedUserType,
@@ -78,12 +81,10 @@ class LimitedResponseType(DjangoObjectType):
         cached_dimensions = response.cached_dimensions
 
         if key_dimensions_only:
-            key_dimension_slugs = response.dimensions.filter(
-                dimension__slug__in=cached_dimensions.keys(),
-                dimension__is_key_dimension=True,
-            ).values_list("dimension__slug", flat=True)
+            survey = get_loader(info, load_surveys_by_form).load(response.form_id)  # type: ignore
+            key_dimension_slugs = get_loader(info, load_key_dimension_slugs).load(survey.id) if survey else None
 
-            return {k: v for k, v in cached_dimensions.items() if k in key_dimension_slugs}
+            return {k: v for k, v in cached_dimensions.items() if k in (key_dimension_slugs or ())}
 
         return cached_dimensions
 
@@ -98,6 +99,25 @@ class LimitedResponseType(DjangoObjectType):
         fields = ("id", "form_data", "created_at")
 
 
+class ResponseConnection(graphene.relay.Connection):
+    """
+    Built by SurveyType.resolve_paginated_responses. The queryset of all matching responses
+    is stored in `iterable` so that the total count is only computed if requested.
+    """
+
+    @staticmethod
+    def resolve_total_count(connection, info) -> int:
+        return connection.iterable.count()
+
+    total_count = graphene.NonNull(
+        graphene.Int,
+        description="Total number of responses matching the filters (not just on this page).",
+    )
+
+    class Meta:
+        node = LimitedResponseType
+
+
 class FullResponseType(LimitedResponseType):
     @staticmethod
     def resolve_form(parent: Response, info):
@@ -1,20 +1,27 @@
 import graphene
 from django.conf import settings
+from django.db.models import Value
+from django.db.models.fields.json import KeyTextTransform, KeyTransform
+from django.db.models.functions import Coalesce
 from graphene.types.generic import GenericScalar
 
 from access.cbac import graphql_query_cbac_required
 from core.graphql.common import DimensionFilterInput
 from core.utils import normalize_whitespace
+from core.utils.pagination_utils import get_cursor, keyset_paginate
+from graphql_api.dataloaders import prime_response_loaders
 
 from ..models.form import Form
 from ..models.survey import Survey
-from ..utils.summarize_responses import summarize_responses
+from ..models.survey_summary import SurveySummaryBucket
 from .dimension import SurveyDimensionType
 from .form import FormType
 from .limited_survey import LimitedSurveyType
-from .response import FullResponseType, LimitedResponseType
+from .response import FullResponseType, LimitedResponseType, ResponseConnection
 
 DEFAULT_LANGUAGE: str = settings.LANGUAGE_CODE
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
 
 
 class SurveyType(LimitedSurveyType):
@@ -80,7 +87,9 @@ class SurveyType(LimitedSurveyType):
         Returns the responses to this survey regardless of language version used.
         Authorization required.
         """
-        return DimensionFilterInput.filter(survey.responses.all(), filters)
+        return prime_response_loaders(
+            info, DimensionFilterInput.filter_cached_dimensions(survey.responses.all(), filters)
+        )
 
     responses = graphene.List(
         graphene.NonNull(LimitedResponseType),
@@ -88,6 +97,79 @@ class SurveyType(LimitedSurveyType):
         description=normalize_whitespace(resolve_responses.__doc__ or ""),
     )
 
+    @graphql_query_cbac_required
+    @staticmethod
+    def resolve_paginated_responses(
+        survey: Survey,
+        info,
+        filters: list[DimensionFilterInput] | None = None,
+        first: int = DEFAULT_PAGE_SIZE,
+        after: str | None = None,
+        sort_by_field: str | None = None,
+        sort_by_dimension: str | None = None,
+        descending: bool = False,
+    ):
+        """
+        Returns the responses to this survey regardless of language version used, one page at a time.
+        Responses are ordered by creation time unless sortByField (a key field) or sortByDimension
+        is given. Pass the endCursor of a page as `after` to get the next page. Authorization required.
+        """
+        if sort_by_field and sort_by_dimension:
+            raise ValueError("Only one of sortByField and sortByDimension may be given")
+
+        first = max(0, min(first, MAX_PAGE_SIZE))
+        responses = DimensionFilterInput.filter_cached_dimensions(survey.responses.all(), filters)
+        keys = ["created_at", "id"]
+
+        if sort_by_field:
+            if sort_by_field not in survey.key_fields:
+                raise ValueError(f"Can only sort by key fields, and {sort_by_field} is not one")
+
+            keys.insert(0, "sort_key")
+            responses = responses.annotate(
+                sort_key=Coalesce(KeyTextTransform(sort_by_field, "form_data"), Value("")),
+            )
+        elif sort_by_dimension:
+            if not survey.dimensions.filter(slug=sort_by_dimension).exists():
+                raise ValueError(f"Survey {survey} has no dimension {sort_by_dimension}")
+
+            # multi-value dimensions are sorted by their first value
+            keys.insert(0, "sort_key")
+            responses = responses.annotate(
+                sort_key=Coalesce(
+                    KeyTextTransform("0", KeyTransform(sort_by_dimension, "cached_dimensions")),
+                    Value(""),
+                ),
+            )
+
+        page, has_next_page = keyset_paginate(responses, keys, first, after, descending)
+        prime_response_loaders(info, page)
+        edges = [ResponseConnection.Edge(node=response, cursor=get_cursor(response, keys)) for response in page]
+
+        connection = ResponseConnection(
+            edges=edges,
+            page_info=graphene.relay.PageInfo(
+                has_next_page=has_next_page,
+                has_previous_page=bool(after),
+                start_cursor=edges[0].cursor if edges else None,
+                end_cursor=edges[-1].cursor if edges else None,
+            ),
+        )
+        connection.iterable = responses
+
+        return connection
+
+    paginated_responses = graphene.Field(
+        graphene.NonNull(ResponseConnection),
+        filters=graphene.List(DimensionFilterInput),
+        first=graphene.Int(),
+        after=graphene.String(),
+        sort_by_field=graphene.String(),
+        sort_by_dimension=graphene.String(),
+        descending=graphene.Boolean(),
+        description=normalize_whitespace(resolve_paginated_responses.__doc__ or ""),
+    )
+
     @graphql_query_cbac_required
     @staticmethod
     def resolve_response(survey: Survey, info, id: str):
@@ -128,7 +210,7 @@ class SurveyType(LimitedSurveyType):
         Returns the number of responses to this survey regardless of language version used.
         Authorization required.
         """
-        return DimensionFilterInput.filter(survey.responses.all(), filters).count()
+        return DimensionFilterInput.filter_cached_dimensions(survey.responses.all(), filters).count()
 
     count_responses = graphene.Field(
         graphene.NonNull(graphene.Int),
@@ -149,10 +231,7 @@ class SurveyType(LimitedSurveyType):
         that language is used as the base for the combined fields. Order of fields
         not present in the base language is not guaranteed. Authorization required.
         """
-        responses = DimensionFilterInput.filter(survey.responses.all(), filters)
-        fields = survey.get_combined_fields(lang)
-        valuesies = [response.get_processed_form_data(fields)[0] for response in responses.only("form_data")]
-        summary = summarize_responses(fields, valuesies)
+        summary = SurveySummaryBucket.get_summary(survey, lang, filters)
 
         return {slug: summary.model_dump(by_alias=True) for slug, summary in summary.items()}
 
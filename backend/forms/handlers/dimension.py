@@ -19,22 +19,53 @@ def program_dimension_value_pre_save(sender, instance: ResponseDimensionValue, *
         raise ValidationError({"dimension": "Dimension value does not belong to the dimension"})
 
 
-@receiver([post_save, post_delete], sender=Dimension)
-@receiver([post_save, post_delete], sender=DimensionValue)
-def dimension_post_save(sender, instance: Dimension | DimensionValue, **kwargs):
+def affects_cached_dimensions(instance: Dimension | DimensionValue) -> bool:
+    """
+    Only slugs end up in cached_dimensions, so eg. editing titles does not need to touch responses.
+    Set by dimension_pre_save; instances deleted or saved without going through it count as changed.
+    """
+    return getattr(instance, "_slug_changed", True)
+
+
+@receiver(post_save, sender=Dimension)
+@receiver(post_save, sender=DimensionValue)
+def dimension_post_save(sender, instance: Dimension | DimensionValue, created: bool, **kwargs):
+    # a new dimension or value cannot have been assigned to any response yet
+    if not created and affects_cached_dimensions(instance):
+        Response.refresh_cached_dimensions_qs(instance.survey.responses.all())
+
+    Form.refresh_enriched_fields_qs(instance.survey.languages.all())
+
+
+@receiver(post_delete, sender=Dimension)
+@receiver(post_delete, sender=DimensionValue)
+def dimension_post_delete(sender, instance: Dimension | DimensionValue, **kwargs):
     Response.refresh_cached_dimensions_qs(instance.survey.responses.all())
     Form.refresh_enriched_fields_qs(instance.survey.languages.all())
 
 
 @receiver([post_save, post_delete], sender=ResponseDimensionValue)
 def response_dimension_value_post_save(sender, instance: ResponseDimensionValue, **kwargs):
+    # Deleting a dimension, value or response deletes its dimension values in cascade.
+    # Responses are then refreshed all at once in dimension_post_delete (or not needed at all).
+    if isinstance(kwargs.get("origin"), Dimension | DimensionValue | Response):
+        return
+
     response = instance.response
     response.refresh_cached_dimensions()
 
 
-@receiver(pre_save, sender=(Dimension, DimensionValue))
+# NOTE: one receiver per sender, as a tuple of senders matches none of them
+@receiver(pre_save, sender=Dimension)
+@receiver(pre_save, sender=DimensionValue)
 def dimension_pre_save(sender, instance: Dimension | DimensionValue, **kwargs):
     if instance.slug is None:
         title = get_message_in_language(instance.title, settings.LANGUAGE_CODE)
         if title:
             instance.slug = slugify(title)
+
+    if instance.pk is None:
+        instance._slug_changed = True
+    else:
+        old_slug = sender.objects.filter(pk=instance.pk).values_list("slug", flat=True).first()
+        instance._slug_changed = old_slug != instance.slug
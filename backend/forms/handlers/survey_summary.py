@@ -0,0 +1,53 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from ..models.dimension import Dimension, DimensionValue
+from ..models.form import Form
+from ..models.response import Response
+from ..models.survey import Survey
+from ..models.survey_summary import SurveySummaryBucket
+from .dimension import affects_cached_dimensions
+
+
+@receiver(post_save, sender=Form)
+def form_post_save_invalidate_summary(sender, instance: Form, *, created: bool, update_fields, **kwargs):
+    """
+    Summary counters depend on the fields of the survey, so changing them invalidates the summary.
+    Refreshing cached_enriched_fields does not change the fields (only their choices).
+    """
+    if created:
+        return
+
+    if update_fields is not None and set(update_fields) <= {"cached_enriched_fields", "updated_at"}:
+        return
+
+    SurveySummaryBucket.invalidate_form(instance)
+
+
+@receiver(post_save, sender=Dimension)
+@receiver(post_save, sender=DimensionValue)
+def dimension_post_save_invalidate_summary(sender, instance: Dimension | DimensionValue, created: bool, **kwargs):
+    """
+    Buckets are keyed by dimension value slugs. Titles are only looked up when the summary is read.
+    """
+    if not created and affects_cached_dimensions(instance):
+        SurveySummaryBucket.invalidate(instance.survey)
+
+
+@receiver(post_delete, sender=Dimension)
+@receiver(post_delete, sender=DimensionValue)
+def dimension_post_delete_invalidate_summary(sender, instance: Dimension | DimensionValue, **kwargs):
+    SurveySummaryBucket.invalidate(instance.survey)
+
+
+@receiver(post_delete, sender=Response)
+def response_post_delete_invalidate_summary(sender, instance: Response, **kwargs):
+    SurveySummaryBucket.objects.filter(survey__languages=instance.form_id).delete()
+
+
+@receiver(m2m_changed, sender=Survey.languages.through)
+def survey_languages_changed_invalidate_summary(sender, instance: Survey | Form, *, reverse: bool, **kwargs):
+    if reverse:
+        SurveySummaryBucket.invalidate_form(instance)  # type: ignore
+    else:
+        SurveySummaryBucket.invalidate(instance)  # type: ignore
@@ -0,0 +1,85 @@
+import random
+from timeit import timeit
+
+from django.core.management.base import BaseCommand
+
+from ...models.field import Choice, Field, FieldType
+from ...utils.summarize_responses import summarize_responses, summarize_responses_per_field
+
+# probability of a synthetic respondent answering (or checking) each field or matrix question
+ANSWER_PROBABILITY = dict(
+    name=0.9,
+    age=0.8,
+    feedback=0.3,
+    consent=0.7,
+    rating=0.95,
+    matrix=0.95,
+)
+
+
+def make_synthetic_survey(num_responses: int, seed: int = 0) -> tuple[list[Field], list[dict]]:
+    """
+    Returns (fields, valuesies) resembling a big feedback survey. The values are already
+    processed (see ../../utils/process_form_data.py) as summarize_responses expects them to be.
+    """
+    rng = random.Random(seed)
+
+    choices = [Choice(slug=f"choice{i}", title=f"Choice {i}") for i in range(5)]
+    questions = [Choice(slug=f"question{i}", title=f"Question {i}") for i in range(10)]
+
+    fields = [
+        Field(type=FieldType.SINGLE_LINE_TEXT, slug="name"),
+        Field(type=FieldType.SINGLE_LINE_TEXT, slug="age", htmlType="number"),
+        Field(type=FieldType.MULTI_LINE_TEXT, slug="feedback"),
+        Field(type=FieldType.SINGLE_CHECKBOX, slug="consent"),
+        Field(type=FieldType.SINGLE_SELECT, slug="rating", choices=choices),
+        Field(type=FieldType.MULTI_SELECT, slug="interests", choices=choices),
+        Field(type=FieldType.RADIO_MATRIX, slug="matrix", choices=choices, questions=questions),
+    ]
+
+    # a couple of choices that have since been removed from the form
+    choice_slugs = [choice.slug for choice in choices] + ["removed1", "removed2"]
+
+    def answered(slug: str) -> bool:
+        return rng.random() < ANSWER_PROBABILITY[slug]
+
+    valuesies = []
+    for i in range(num_responses):
+        values = {}
+
+        if answered("name"):
+            values["name"] = f"Respondent {i}"
+        if answered("age"):
+            values["age"] = rng.randint(15, 60)
+        if answered("feedback"):
+            values["feedback"] = "Lorem ipsum dolor sit amet " * rng.randint(1, 10)
+
+        values["consent"] = answered("consent")
+        values["interests"] = rng.sample(choice_slugs, rng.randint(0, 3))
+        values["matrix"] = {question.slug: rng.choice(choice_slugs) for question in questions if answered("matrix")}
+
+        if answered("rating"):
+            values["rating"] = rng.choice(choice_slugs)
+
+        valuesies.append(values)
+
+    return fields, valuesies
+
+
+class Command(BaseCommand):
+    help = "Benchmarks summarize_responses against the per-field reference implementation on synthetic data"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--responses", type=int, default=50_000, help="Number of synthetic responses")
+        parser.add_argument("--repeat", type=int, default=3, help="Number of runs per implementation")
+
+    def handle(self, *args, **options):
+        fields, valuesies = make_synthetic_survey(options["responses"])
+        repeat = options["repeat"]
+
+        if summarize_responses(fields, valuesies) != summarize_responses_per_field(fields, valuesies):
+            raise AssertionError("summarize_responses and summarize_responses_per_field disagree")
+
+        for func in (summarize_responses_per_field, summarize_responses):
+            elapsed = timeit(lambda func=func: func(fields, valuesies), number=repeat) / repeat
+            self.stdout.write(f"{func.__name__}: {elapsed * 1000:.1f} ms per {len(valuesies)} responses")
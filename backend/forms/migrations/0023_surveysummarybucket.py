@@ -0,0 +1,34 @@
+# Generated by Django 5.0.2 on 2026-10-18 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("forms", "0022_dimension_is_shown_to_respondent"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SurveySummaryBucket",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("dimensions_key", models.CharField(max_length=64)),
+                ("dimensions", models.JSONField(default=dict, help_text="dimension slug -> list of value slugs")),
+                ("count_responses", models.IntegerField(default=0)),
+                ("counters", models.JSONField(default=dict)),
+                (
+                    "survey",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="summary_buckets",
+                        to="forms.survey",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("survey", "dimensions_key")},
+            },
+        ),
+    ]
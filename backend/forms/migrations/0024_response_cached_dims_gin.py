@@ -0,0 +1,21 @@
+# Generated by Django 5.0.2 on 2026-10-18 12:00
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("forms", "0023_surveysummarybucket"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="response",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["cached_dimensions"],
+                name="forms_response_cached_dims_gin",
+                opclasses=["jsonb_path_ops"],
+            ),
+        ),
+    ]
@@ -3,3 +3,4 @@ from .field import Field, FieldType
 from .form import Form
 from .response import Response
 from .survey import Survey
+from .survey_summary import SurveySummaryBucket
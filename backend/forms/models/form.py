@@ -7,6 +7,7 @@ from typing import TYPE_CHECKING, Any, Self
 
 from django.conf import settings
 from django.db import models, transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from core.utils import NONUNIQUE_SLUG_FIELD_PARAMS
@@ -82,10 +83,14 @@ class Form(models.Model):
         Refresh cached_enriched_fields for all forms in the queryset.
         """
         forms_to_update = []
+        now = timezone.now()
         for form in qs.select_for_update(of=("self",)):
             form.cached_enriched_fields = form._build_enriched_fields()
+            form.updated_at = now
             forms_to_update.append(form)
-        cls.objects.bulk_update(forms_to_update, ["cached_enriched_fields"])
+
+        # NOTE: updated_at versions the cache of validated fields (see ../utils/field_cache.py)
+        cls.objects.bulk_update(forms_to_update, ["cached_enriched_fields", "updated_at"])
 
     def refresh_enriched_fields(self):
         """
@@ -93,7 +98,7 @@ class Form(models.Model):
         NOTE: Use refresh_enriched_fields_qs for bulk updates.
         """
         self.cached_enriched_fields = self._build_enriched_fields()
-        self.save(update_fields=["cached_enriched_fields"])
+        self.save(update_fields=["cached_enriched_fields", "updated_at"])
 
     def _build_enriched_fields(self) -> list[dict[str, Any]]:
         return [self._enrich_field(field) for field in self.fields]
@@ -151,8 +156,22 @@ class Form(models.Model):
         return field
 
     @cached_property
-    def validated_fields(self):
-        return [Field.model_validate(field_dict) for field_dict in self.enriched_fields]
+    def validated_fields(self) -> list[Field]:
+        """
+        Validated fields are cached across requests by form version.
+        NOTE: The Field instances are shared. Do not mutate them.
+        """
+        from ..utils.field_cache import form_fields_cache
+
+        enriched_fields = self.enriched_fields
+
+        def validate_fields():
+            return [Field.model_validate(field_dict) for field_dict in enriched_fields]
+
+        if self.pk is None or self.updated_at is None:
+            return validate_fields()
+
+        return form_fields_cache.get_or_set((self.pk, self.updated_at.isoformat()), validate_fields)
 
     @property
     def survey(self) -> Survey | None:
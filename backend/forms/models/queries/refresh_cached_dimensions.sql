@@ -0,0 +1,36 @@
+-- Recomputes Response.cached_dimensions (dimension slug -> list of value slugs) of the given responses
+-- from ResponseDimensionValues. Rows whose cached_dimensions would not change are not written.
+with values_by_dimension as (
+  select
+    rdv.response_id,
+    dimension.slug as dimension_slug,
+    jsonb_agg(dv.slug order by rdv.id) as value_slugs
+  from
+    forms_responsedimensionvalue rdv
+    join forms_dimension dimension on dimension.id = rdv.dimension_id
+    join forms_dimensionvalue dv on dv.id = rdv.value_id
+  where
+    rdv.response_id = any(%(response_ids)s::uuid[])
+  group by
+    rdv.response_id,
+    dimension.slug
+),
+
+new_cached_dimensions as (
+  select
+    target.id as response_id,
+    coalesce(jsonb_object_agg(vbd.dimension_slug, vbd.value_slugs) filter (where vbd.dimension_slug is not null), '{}'::jsonb) as cached_dimensions
+  from
+    unnest(%(response_ids)s::uuid[]) as target(id)
+    left join values_by_dimension vbd on vbd.response_id = target.id
+  group by
+    target.id
+)
+
+update forms_response response
+set cached_dimensions = ncd.cached_dimensions
+from new_cached_dimensions ncd
+where
+  response.id = ncd.response_id
+  and response.cached_dimensions is distinct from ncd.cached_dimensions
+returning response.id;
@@ -6,9 +6,11 @@ from collections.abc import Sequence
 from typing import TYPE_CHECKING, Any
 
 from django.conf import settings
-from django.db import models, transaction
+from django.contrib.postgres.indexes import GinIndex
+from django.db import connection, models, transaction
 from django.db.models import JSONField
 from django.utils.translation import gettext_lazy as _
+from pkg_resources import resource_string
 
 from .form import Form
 
@@ -20,6 +22,7 @@ if TYPE_CHECKING:
 
 
 logger = logging.getLogger("kompassi")
+REFRESH_CACHED_DIMENSIONS_QUERY = resource_string(__name__, "queries/refresh_cached_dimensions.sql").decode("utf-8")
 
 
 class Response(models.Model):
@@ -47,6 +50,16 @@ class Response(models.Model):
     # related fields
     dimensions: models.QuerySet[ResponseDimensionValue]
 
+    class Meta:
+        indexes = [
+            # supports DimensionFilterInput.filter_cached_dimensions
+            GinIndex(
+                fields=["cached_dimensions"],
+                opclasses=["jsonb_path_ops"],
+                name="forms_response_cached_dims_gin",
+            ),
+        ]
+
     @property
     def survey(self) -> Survey | None:
         return self.form.survey
@@ -62,29 +75,29 @@ class Response(models.Model):
         return new_cached_dimensions
 
     @classmethod
-    @transaction.atomic
-    def refresh_cached_dimensions_qs(cls, responses: models.QuerySet[Response]):
-        bulk_update = []
-        for response in (
-            responses.select_for_update(of=("self",))
-            .prefetch_related(
-                "dimensions__dimension",
-                "dimensions__value",
-            )
-            .only(
-                "id",
-                "dimensions__dimension__slug",
-                "dimensions__value__slug",
-            )
-        ):
-            response.cached_dimensions = response._build_cached_dimensions()
-            bulk_update.append(response)
-        cls.objects.bulk_update(bulk_update, ["cached_dimensions"])
+    def refresh_cached_dimensions_qs(cls, responses: models.QuerySet[Response]) -> int:
+        """
+        Recomputes cached_dimensions of the responses in a single UPDATE. Responses whose
+        cached_dimensions would not change are not written (nor locked). Returns the number
+        of responses updated.
+        """
+        response_ids = list(responses.order_by().values_list("id", flat=True))
+        if not response_ids:
+            return 0
+
+        with connection.cursor() as cursor:
+            cursor.execute(REFRESH_CACHED_DIMENSIONS_QUERY, dict(response_ids=response_ids))
+            return cursor.rowcount
 
     def refresh_cached_dimensions(self):
+        from .survey_summary import SurveySummaryBucket
+
+        old_cached_dimensions = self.cached_dimensions
         self.cached_dimensions = self._build_cached_dimensions()
         self.save(update_fields=["cached_dimensions"])
 
+        SurveySummaryBucket.move_response(self, old_cached_dimensions)
+
     @transaction.atomic
     def lift_dimension_values(self):
         """
@@ -96,6 +109,7 @@ class Response(models.Model):
         or rework this method to use set_dimension_values that accounts for existing ones.
         """
         from .dimension import ResponseDimensionValue
+        from .survey_summary import SurveySummaryBucket
 
         survey = self.survey
         if survey is None:
@@ -187,12 +201,15 @@ class Response(models.Model):
         self.cached_dimensions = cached_dimensions
         self.save(update_fields=["cached_dimensions"])
 
+        SurveySummaryBucket.add_response(self, survey)
+
     @transaction.atomic
     def set_dimension_values(self, values_to_set: dict[str, list[str]]):
         """
         Changes only those dimension values that are present in dimension_values.
         """
         from .dimension import ResponseDimensionValue
+        from .survey_summary import SurveySummaryBucket
 
         survey = self.survey
         if survey is None:
@@ -225,9 +242,83 @@ class Response(models.Model):
         ResponseDimensionValue.objects.bulk_create(bulk_create)
 
         # mass delete and bulk create don't trigger signals (which is good)
+        old_cached_dimensions = self.cached_dimensions
         self.cached_dimensions = dict(self.cached_dimensions, **values_to_set)
         self.save(update_fields=["cached_dimensions"])
 
+        SurveySummaryBucket.move_response(self, old_cached_dimensions, survey)
+
+    @classmethod
+    @transaction.atomic
+    def set_dimension_values_qs(
+        cls,
+        survey: Survey,
+        responses: models.QuerySet[Response],
+        values_to_set: dict[str, list[str]],
+    ) -> int:
+        """
+        Bulk version of set_dimension_values: for each response of the survey in the queryset,
+        sets the dimensions present in values_to_set to exactly the given values. Runs a fixed
+        number of queries regardless of the number of responses. Returns the number of responses
+        whose cached_dimensions changed.
+        """
+        from .dimension import ResponseDimensionValue
+        from .survey_summary import SurveySummaryBucket
+
+        dimensions_by_slug, values_by_dimension_by_slug = survey.preload_dimensions(values_to_set)
+
+        values: list[DimensionValue] = []
+        for dimension_slug, value_slugs in values_to_set.items():
+            if dimension_slug not in dimensions_by_slug:
+                raise ValueError(f"Survey {survey} has no dimension {dimension_slug}")
+
+            values_by_slug = values_by_dimension_by_slug[dimension_slug]
+            for value_slug in value_slugs:
+                if value_slug not in values_by_slug:
+                    raise ValueError(f"Dimension {dimension_slug} has no value {value_slug}")
+                values.append(values_by_slug[value_slug])
+
+        # dimension filters may yield the same response multiple times (and FOR UPDATE precludes DISTINCT)
+        response_ids = list(
+            dict.fromkeys(
+                responses.filter(form__in=survey.languages.all())
+                .order_by()
+                .select_for_update(of=("self",))
+                .values_list("id", flat=True)
+            )
+        )
+        if not response_ids:
+            return 0
+
+        # QuerySet.delete() would send post_delete for every row, and response_dimension_value_post_save
+        # (see ..handlers.dimension) would then refresh each response separately. _raw_delete is private
+        # Django API, but it is the only way to issue a single DELETE without signals. It is safe here
+        # because ResponseDimensionValue has no dependent rows, and the responses are refreshed in bulk below.
+        # bulk_create does not send post_save either.
+        bulk_delete = ResponseDimensionValue.objects.filter(
+            response_id__in=response_ids,
+            dimension__in=dimensions_by_slug.values(),
+        ).exclude(value__in=values)
+        bulk_delete._raw_delete(bulk_delete.db)
+
+        ResponseDimensionValue.objects.bulk_create(
+            [
+                ResponseDimensionValue(response_id=response_id, dimension=value.dimension, value=value)
+                for response_id in response_ids
+                for value in values
+            ],
+            ignore_conflicts=True,
+        )
+
+        num_updated = cls.refresh_cached_dimensions_qs(cls.objects.filter(id__in=response_ids))
+
+        # Moving responses between buckets one by one would defeat the purpose.
+        # The summary is rebuilt on next read instead.
+        if num_updated:
+            SurveySummaryBucket.invalidate(survey)
+
+        return num_updated
+
     def get_processed_form_data(
         self,
         fields: Sequence[Field] | None = None,
@@ -122,14 +122,23 @@ class Survey(models.Model):
         # TODO as an optimization, store boolean field in survey model that indicates
         # whether the fields are the same across languages. If so, return the fields
         # from the base language directly.
+        from ..utils.field_cache import survey_fields_cache
 
-        # if a specific language is requested, put it first
-        languages = sorted(
-            self.languages.all().only("language", "fields"),
-            key=lambda form: form.language != base_language,
-        )
+        versions = sorted(self.languages.values_list("id", "updated_at"))
+
+        def get_merged_fields():
+            # if a specific language is requested, put it first
+            languages = sorted(
+                self.languages.all().only("id", "language", "fields", "cached_enriched_fields", "updated_at"),
+                key=lambda form: form.language != base_language,
+            )
 
-        return merge_fields(languages)
+            return merge_fields(languages)
+
+        return survey_fields_cache.get_or_set(
+            (self.pk, base_language, *(f"{form_id}@{updated_at.isoformat()}" for form_id, updated_at in versions)),
+            get_merged_fields,
+        )
 
     def get_form(self, requested_language: str) -> Form | None:
         try:
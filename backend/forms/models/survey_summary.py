@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from collections.abc import Mapping, Sequence
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models.fields.json import KeyTransform
+
+from core.graphql.common import DimensionFilterInput
+
+from ..utils.process_form_data import process_form_data
+from ..utils.summarize_responses import (
+    Counters,
+    Summary,
+    count_values,
+    is_counted_field,
+    is_listed_field,
+    merge_counters,
+    summarize_counters,
+    summarize_responses,
+)
+from .survey import Survey
+
+if TYPE_CHECKING:
+    from .field import Field
+    from .form import Form
+    from .response import Response
+
+
+logger = logging.getLogger("kompassi")
+DEFAULT_LANGUAGE: str = settings.LANGUAGE_CODE
+
+
+class SurveySummaryBucket(models.Model):
+    """
+    Materialized summary counters of those responses to a survey that share the same dimension values.
+    Having one bucket per combination of dimension values lets us apply dimension filters to the
+    summary without looking at the responses themselves.
+
+    Buckets are kept up to date incrementally as responses are created and their dimensions change.
+    Changes to fields or dimensions invalidate the buckets of a survey, and they are rebuilt on next read.
+
+    See ../utils/summarize_responses.py:count_values for the format of counters.
+    """
+
+    survey = models.ForeignKey(Survey, on_delete=models.CASCADE, related_name="summary_buckets")
+    dimensions_key = models.CharField(max_length=64)
+    dimensions = models.JSONField(default=dict, help_text="dimension slug -> list of value slugs")
+    count_responses = models.IntegerField(default=0)
+    counters = models.JSONField(default=dict)
+
+    class Meta:
+        unique_together = [("survey", "dimensions_key")]
+
+    def __str__(self):
+        return f"{self.survey}: {self.dimensions}"
+
+    @staticmethod
+    def normalize_dimensions(cached_dimensions: Mapping[str, Sequence[str]]) -> tuple[str, dict[str, list[str]]]:
+        """
+        Returns (dimensions_key, dimensions) for the given Response.cached_dimensions.
+        """
+        dimensions = {slug: sorted(values) for slug, values in sorted(cached_dimensions.items()) if values}
+        dimensions_key = hashlib.sha256(json.dumps(dimensions).encode("utf-8")).hexdigest()
+        return dimensions_key, dimensions
+
+    def matches(self, filters: list[DimensionFilterInput] | None) -> bool:
+        """
+        Python equivalent of DimensionFilterInput.filter for a single bucket.
+        """
+        return all(
+            set(self.dimensions.get(filter.dimension, [])).intersection(filter.values or []) for filter in filters or []
+        )
+
+    @staticmethod
+    def get_counted_fields(survey: Survey) -> list[Field]:
+        return [field for field in survey.get_combined_fields() if is_counted_field(field)]
+
+    @classmethod
+    def invalidate(cls, survey: Survey):
+        cls.objects.filter(survey=survey).delete()
+
+    @classmethod
+    def invalidate_form(cls, form: Form):
+        cls.objects.filter(survey__languages=form).delete()
+
+    @classmethod
+    @transaction.atomic
+    def rebuild(cls, survey: Survey) -> list[SurveySummaryBucket]:
+        fields = cls.get_counted_fields(survey)
+        buckets: dict[str, SurveySummaryBucket] = {}
+
+        for response in survey.responses.only("form_data", "cached_dimensions").iterator(chunk_size=1000):
+            dimensions_key, dimensions = cls.normalize_dimensions(response.cached_dimensions)
+
+            bucket = buckets.get(dimensions_key)
+            if bucket is None:
+                bucket = buckets[dimensions_key] = cls(
+                    survey=survey,
+                    dimensions_key=dimensions_key,
+                    dimensions=dimensions,
+                )
+
+            values, _warnings = response.get_processed_form_data(fields)
+            bucket.count_responses += 1
+            merge_counters(bucket.counters, count_values(fields, values))
+
+        cls.invalidate(survey)
+        return cls.objects.bulk_create(buckets.values())
+
+    @classmethod
+    def _apply(
+        cls,
+        survey: Survey,
+        cached_dimensions: Mapping[str, Sequence[str]],
+        counters: Counters,
+        sign: int,
+    ):
+        dimensions_key, dimensions = cls.normalize_dimensions(cached_dimensions)
+
+        bucket, _created = cls.objects.get_or_create(
+            survey=survey,
+            dimensions_key=dimensions_key,
+            defaults=dict(dimensions=dimensions),
+        )
+        bucket = cls.objects.select_for_update().get(id=bucket.id)
+
+        bucket.count_responses += sign
+        if bucket.count_responses <= 0:
+            bucket.delete()
+            return
+
+        bucket.counters = merge_counters(bucket.counters, counters, sign)
+        bucket.save(update_fields=["count_responses", "counters"])
+
+    @classmethod
+    @transaction.atomic
+    def add_response(cls, response: Response, survey: Survey | None = None):
+        """
+        Adds a newly created response to the summary. Should be called after the
+        dimension values of the response have been set.
+
+        If the summary of the survey has not been materialized yet, this is a no-op
+        and the response will be accounted for when the summary is first built.
+        """
+        if survey is None:
+            survey = response.survey
+        if survey is None or not cls.objects.filter(survey=survey).exists():
+            return
+
+        fields = cls.get_counted_fields(survey)
+        values, _warnings = response.get_processed_form_data(fields)
+        cls._apply(survey, response.cached_dimensions, count_values(fields, values), 1)
+
+    @classmethod
+    @transaction.atomic
+    def move_response(
+        cls,
+        response: Response,
+        old_cached_dimensions: Mapping[str, Sequence[str]],
+        survey: Survey | None = None,
+    ):
+        """
+        Moves the response from one bucket to another after its dimension values have changed.
+        """
+        old_dimensions_key, _ = cls.normalize_dimensions(old_cached_dimensions)
+        new_dimensions_key, _ = cls.normalize_dimensions(response.cached_dimensions)
+        if old_dimensions_key == new_dimensions_key:
+            return
+
+        if survey is None:
+            survey = response.survey
+        if survey is None or not cls.objects.filter(survey=survey).exists():
+            return
+
+        fields = cls.get_counted_fields(survey)
+        values, _warnings = response.get_processed_form_data(fields)
+        counters = count_values(fields, values)
+
+        cls._apply(survey, old_cached_dimensions, counters, -1)
+        cls._apply(survey, response.cached_dimensions, counters, 1)
+
+    @classmethod
+    def get_buckets(cls, survey: Survey) -> list[SurveySummaryBucket]:
+        """
+        Returns the summary buckets of the survey, rebuilding them if they are missing or out of date.
+        """
+        buckets = list(cls.objects.filter(survey=survey))
+
+        # catches responses created or deleted bypassing add_response (eg. in setup scripts)
+        if not cls.is_up_to_date(survey, buckets):
+            buckets = cls.rebuild_if_stale(survey)
+
+        return buckets
+
+    @staticmethod
+    def is_up_to_date(survey: Survey, buckets: Sequence[SurveySummaryBucket]) -> bool:
+        return sum(bucket.count_responses for bucket in buckets) == survey.responses.count()
+
+    @classmethod
+    @transaction.atomic
+    def rebuild_if_stale(cls, survey: Survey) -> list[SurveySummaryBucket]:
+        """
+        Rebuilds the buckets of the survey unless another reader did so while we waited for the lock.
+        Without the lock, concurrent rebuilds would conflict on unique_together (survey, dimensions_key).
+        """
+        Survey.objects.select_for_update().only("id").get(id=survey.id)
+
+        buckets = list(cls.objects.filter(survey=survey))
+        if cls.is_up_to_date(survey, buckets):
+            return buckets
+
+        logger.info(f"Rebuilding summary buckets for survey {survey}")
+        return cls.rebuild(survey)
+
+    @classmethod
+    def get_summary(
+        cls,
+        survey: Survey,
+        lang: str = DEFAULT_LANGUAGE,
+        filters: list[DimensionFilterInput] | None = None,
+    ) -> Summary:
+        """
+        Returns the same summary as summarize_responses would, but counted fields are read from
+        the materialized buckets. Listed fields (free text, file uploads) still need their values,
+        but only those are fetched from the responses.
+        """
+        fields = survey.get_combined_fields(lang)
+        buckets = [bucket for bucket in cls.get_buckets(survey) if bucket.matches(filters)]
+
+        total_responses = 0
+        counters: Counters = {}
+        for bucket in buckets:
+            total_responses += bucket.count_responses
+            merge_counters(counters, bucket.counters)
+
+        summary = summarize_counters(fields, counters, total_responses)
+
+        if listed_fields := [field for field in fields if is_listed_field(field)]:
+            responses = DimensionFilterInput.filter_cached_dimensions(survey.responses.all(), filters)
+            annotations = {
+                f"field_{index}": KeyTransform(field.slug, "form_data") for index, field in enumerate(listed_fields)
+            }
+            valuesies = [
+                process_form_data(
+                    listed_fields,
+                    {field.slug: value for field, value in zip(listed_fields, row, strict=True) if value is not None},
+                )[0]
+                for row in responses.annotate(**annotations).values_list(*annotations.keys())
+            ]
+            summary.update(summarize_responses(listed_fields, valuesies))
+
+        # retain field order
+        return {field.slug: summary[field.slug] for field in fields if field.slug in summary}
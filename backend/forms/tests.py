@@ -1,22 +1,44 @@
+import csv
+from io import BytesIO
 from types import SimpleNamespace
 from unittest import mock
 
 import pytest
 import yaml
 
-from core.models import Event
+from core.graphql.common import DimensionFilterInput
+from core.models import Event, Person
 
-from .excel_export import get_header_cells, get_response_cells
+from .excel_export import (
+    get_header_cells,
+    get_response_cells,
+    stream_responses_as_csv,
+    write_responses_as_excel,
+)
+from .graphql.mutations.bulk_update_response_dimensions import BulkUpdateResponseDimensions
 from .graphql.mutations.put_survey_dimension import PutSurveyDimension
 from .graphql.mutations.update_response_dimensions import UpdateResponseDimensions
+from .graphql.survey import SurveyType
+from .management.commands.forms_benchmark_summary import make_synthetic_survey
 from .models.dimension import Dimension, DimensionValue
 from .models.field import Choice, Field, FieldType
 from .models.response import Response
 from .models.survey import Survey
+from .models.survey_summary import SurveySummaryBucket
+from .utils.field_cache import FieldCache
 from .utils.merge_form_fields import _merge_choices, _merge_fields
 from .utils.process_form_data import FieldWarning, process_form_data
 from .utils.s3_presign import BUCKET_NAME, S3_ENDPOINT_URL
-from .utils.summarize_responses import MatrixFieldSummary, SelectFieldSummary, TextFieldSummary, summarize_responses
+from .utils.summarize_responses import (
+    MatrixFieldSummary,
+    SelectFieldSummary,
+    TextFieldSummary,
+    count_values,
+    merge_counters,
+    summarize_counters,
+    summarize_responses,
+    summarize_responses_per_field,
+)
 
 # pass this as the info param to mutations to appease the graphql_check_access decorator
 # (remember to also mock.patch graphql_check_access)
@@ -475,6 +497,38 @@ def test_merge_fields():
     assert _merge_fields(lhs_fields, rhs_fields) == expected_merged_fields
 
 
+def test_field_cache():
+    computed = []
+
+    def compute(slug: str):
+        def _compute():
+            computed.append(slug)
+            return [Field(type=FieldType.SINGLE_LINE_TEXT, slug=slug)]
+
+        return _compute
+
+    field_cache = FieldCache("test", max_size=2)
+
+    fields = field_cache.get_or_set((1, "v1"), compute("a"))
+    assert [field.slug for field in fields] == ["a"]
+
+    # returned lists are copies, fields are shared
+    fields.clear()
+    assert field_cache.get_or_set((1, "v1"), compute("a"))[0].slug == "a"
+    assert computed == ["a"]
+
+    # new version is a new key
+    field_cache.get_or_set((1, "v2"), compute("b"))
+    assert computed == ["a", "b"]
+
+    # least recently used is evicted
+    field_cache.get_or_set((2, "v1"), compute("c"))
+    field_cache.get_or_set((1, "v1"), compute("a"))
+    assert computed == ["a", "b", "c", "a"]
+    field_cache.get_or_set((2, "v1"), compute("c"))
+    assert computed == ["a", "b", "c", "a"]
+
+
 def test_summarize_responses():
     choices = [
         Choice(slug="choice1", title="Choice 1"),
@@ -591,6 +645,128 @@ def test_summarize_responses():
     assert summarize_responses(fields, responses) == expected_summary
 
 
+def test_summarize_responses_matches_per_field():
+    for seed in range(3):
+        fields, valuesies = make_synthetic_survey(500, seed)
+        assert summarize_responses(fields, valuesies) == summarize_responses_per_field(fields, valuesies)
+
+
+def test_summarize_counters():
+    choices = [
+        Choice(slug="choice1", title="Choice 1"),
+        Choice(slug="choice2", title="Choice 2"),
+    ]
+
+    fields = [
+        Field(type=FieldType.SINGLE_LINE_TEXT, htmlType="number", slug="numberField"),
+        Field(type=FieldType.SINGLE_CHECKBOX, slug="singleCheckbox"),
+        Field(type=FieldType.SINGLE_SELECT, slug="singleSelect", choices=choices),
+        Field(type=FieldType.MULTI_SELECT, slug="multiSelect", choices=choices),
+        Field(
+            type=FieldType.RADIO_MATRIX,
+            slug="radioMatrix",
+            questions=[Choice(slug="foo", title="Foo"), Choice(slug="bar", title="Bar")],
+            choices=choices,
+        ),
+    ]
+
+    responses = [
+        {
+            "numberField": 5,
+            "singleCheckbox": True,
+            "singleSelect": "choice1",
+            "multiSelect": ["choice1", "choice2"],
+            "radioMatrix": {"foo": "choice1", "bar": "choice2"},
+        },
+        {
+            "numberField": 5,
+            "singleCheckbox": False,
+            "singleSelect": "choice666",
+            "multiSelect": [],
+            "radioMatrix": {"foo": "choice666"},
+        },
+        {},
+    ]
+
+    counters = {}
+    for values in responses:
+        merge_counters(counters, count_values(fields, values))
+
+    assert summarize_counters(fields, counters, len(responses)) == summarize_responses(fields, responses)
+
+    # removing a response from the counters is the same as never having counted it
+    merge_counters(counters, count_values(fields, responses[0]), -1)
+    assert summarize_counters(fields, counters, len(responses) - 1) == summarize_responses(fields, responses[1:])
+
+
+@pytest.mark.django_db
+def test_survey_summary_buckets():
+    event, _created = Event.get_or_create_dummy()
+    survey = Survey.objects.create(event=event, slug="test-survey")
+    dimension = Dimension.objects.create(survey=survey, slug="status", title=dict(en="Status"))
+    DimensionValue.objects.bulk_create(
+        [
+            DimensionValue(dimension=dimension, slug="new", title=dict(en="New"), is_initial=True),
+            DimensionValue(dimension=dimension, slug="accepted", title=dict(en="Accepted")),
+        ]
+    )
+    form = survey.languages.create(
+        event=event,
+        slug="test-survey-en",
+        language="en",
+        fields=[
+            dict(
+                slug="color",
+                type="SingleSelect",
+                choices=[dict(slug="red", title="Red"), dict(slug="blue", title="Blue")],
+            ),
+            dict(slug="comment", type="SingleLineText"),
+        ],
+    )
+
+    def create_response(form_data):
+        response = Response.objects.create(form=form, form_data=form_data)
+        response.lift_dimension_values()
+        return response
+
+    response = create_response({"color": "red", "comment": "Hello"})
+
+    # not materialized yet
+    assert not SurveySummaryBucket.objects.filter(survey=survey).exists()
+
+    summary = SurveySummaryBucket.get_summary(survey)
+    assert summary["color"] == SelectFieldSummary(
+        countResponses=1,
+        countMissingResponses=0,
+        summary={"red": 1, "blue": 0},
+    )
+    assert summary["comment"] == TextFieldSummary(countResponses=1, countMissingResponses=0, summary=["Hello"])
+
+    # incremental update of materialized summary
+    create_response({"color": "blue"})
+    bucket = SurveySummaryBucket.objects.get(survey=survey)
+    assert bucket.count_responses == 2
+    assert bucket.dimensions == {"status": ["new"]}
+
+    response.set_dimension_values({"status": ["accepted"]})
+    assert SurveySummaryBucket.objects.filter(survey=survey).count() == 2
+
+    accepted = [SimpleNamespace(dimension="status", values=["accepted"])]
+    summary = SurveySummaryBucket.get_summary(survey, filters=accepted)  # type: ignore
+    assert summary["color"] == SelectFieldSummary(
+        countResponses=1,
+        countMissingResponses=0,
+        summary={"red": 1, "blue": 0},
+    )
+
+    valuesies = [response.get_processed_form_data()[0] for response in survey.responses.all()]
+    assert SurveySummaryBucket.get_summary(survey) == summarize_responses(survey.get_combined_fields(), valuesies)
+
+    # a reader that waited for the lock while another one rebuilt does not rebuild again
+    bucket_ids = set(SurveySummaryBucket.objects.filter(survey=survey).values_list("id", flat=True))
+    assert {bucket.id for bucket in SurveySummaryBucket.rebuild_if_stale(survey)} == bucket_ids
+
+
 @pytest.mark.django_db
 @mock.patch("forms.graphql.mutations.update_response_dimensions.graphql_check_access", autospec=True)
 def test_lift_and_set_dimensions(_patched_graphql_check_access):
@@ -730,3 +906,246 @@ def test_put_survey_dimension(_patched_graphql_check_access):
     assert dimension.title == {"en": "Test dimension", "sv": "Testdimension"}
     assert dimension.is_key_dimension is True
     assert dimension.is_multi_value is False
+
+
+@pytest.mark.django_db
+@mock.patch("access.cbac.graphql_check_access", autospec=True)
+def test_paginated_responses(_patched_graphql_check_access):
+    event, _created = Event.get_or_create_dummy()
+    survey = Survey.objects.create(event=event, slug="test-survey", key_fields=["name"])
+    form = survey.languages.create(
+        event=event,
+        slug="test-survey-en",
+        language="en",
+        fields=[dict(slug="name", type="SingleLineText")],
+    )
+
+    names = ["Charlie", "Alice", "Eve", "Bob", "Dave"]
+    for name in names:
+        Response.objects.create(form=form, form_data={"name": name})
+
+    def get_all_pages(**kwargs):
+        after = None
+        pages = []
+
+        while True:
+            connection = SurveyType.resolve_paginated_responses(survey, MOCK_INFO, first=2, after=after, **kwargs)
+            pages.append([edge.node.form_data["name"] for edge in connection.edges])
+            assert connection.iterable.count() == len(names)
+
+            if not connection.page_info.has_next_page:
+                return pages
+
+            after = connection.page_info.end_cursor
+
+    assert get_all_pages() == [["Charlie", "Alice"], ["Eve", "Bob"], ["Dave"]]
+    assert get_all_pages(sort_by_field="name") == [["Alice", "Bob"], ["Charlie", "Dave"], ["Eve"]]
+    assert get_all_pages(sort_by_field="name", descending=True) == [["Eve", "Dave"], ["Charlie", "Bob"], ["Alice"]]
+
+
+@pytest.mark.django_db
+def test_stream_responses_as_csv():
+    event, _created = Event.get_or_create_dummy()
+    survey = Survey.objects.create(event=event, slug="test-survey")
+    dimension = Dimension.objects.create(survey=survey, slug="status", title=dict(en="Status"))
+    DimensionValue.objects.create(dimension=dimension, slug="new", title=dict(en="New"), is_initial=True)
+    fields = [
+        dict(slug="name", type="SingleLineText"),
+        dict(
+            slug="colors",
+            type="MultiSelect",
+            choices=[dict(slug="red", title="Red"), dict(slug="blue", title="Blue")],
+        ),
+    ]
+    form_en = survey.languages.create(event=event, slug="test-survey-en", language="en", fields=fields)
+    form_fi = survey.languages.create(event=event, slug="test-survey-fi", language="fi", fields=fields)
+
+    for form, form_data in [
+        (form_en, {"name": "Alice", "colors": ["red"]}),
+        (form_fi, {"name": "Bob, Jr.", "colors": ["red", "blue"]}),
+    ]:
+        Response.objects.create(form=form, form_data=form_data).lift_dimension_values()
+
+    dimensions = survey.dimensions.order_by("order")
+    responses = survey.responses.order_by("created_at")
+
+    chunks = list(stream_responses_as_csv(dimensions, survey.combined_fields, responses, rows_per_chunk=2))
+    assert len(chunks) == 2
+
+    rows = list(csv.reader(b"".join(chunks).decode("utf-8").splitlines()))
+    assert rows[0] == ["created_at", "language", "dimensions.status", "name", "colors.red", "colors.blue"]
+    assert [row[1:] for row in rows[1:]] == [
+        ["en", "new", "Alice", "True", "False"],
+        ["fi", "new", "Bob, Jr.", "True", "True"],
+    ]
+
+    output_stream = BytesIO()
+    write_responses_as_excel(dimensions, survey.combined_fields, responses, output_stream)
+    assert output_stream.getvalue().startswith(b"PK")
+
+
+@pytest.mark.django_db
+@mock.patch("access.cbac.CBACEntry.is_allowed", autospec=True, return_value=True)
+def test_survey_export_views(_patched_is_allowed, client):
+    event, _created = Event.get_or_create_dummy()
+    person, _created = Person.get_or_create_dummy()
+    survey = Survey.objects.create(event=event, slug="test-survey")
+    client.force_login(person.user)
+
+    for extension in ["csv", "xlsx"]:
+        response = client.get(f"/events/{event.slug}/surveys/{survey.slug}/responses.{extension}")
+        assert response.status_code == 200, extension
+
+        # the global routes pass no event_slug; surveys always belong to an event, so there is nothing to find
+        response = client.get(f"/surveys/{survey.slug}/responses.{extension}")
+        assert response.status_code == 404, extension
+
+
+@pytest.mark.django_db
+def test_refresh_cached_dimensions_qs():
+    event, _created = Event.get_or_create_dummy()
+    survey = Survey.objects.create(event=event, slug="test-survey")
+    dimension = Dimension.objects.create(survey=survey, slug="status", title=dict(en="Status"))
+    value = DimensionValue.objects.create(dimension=dimension, slug="new", title=dict(en="New"), is_initial=True)
+    form = survey.languages.create(event=event, slug="test-survey-en", language="en", fields=[])
+    response = Response.objects.create(form=form, form_data={})
+    response.lift_dimension_values()
+    untouched = Response.objects.create(form=form, form_data={})
+
+    # title-only edits do not touch responses
+    with mock.patch.object(Response, "refresh_cached_dimensions_qs", autospec=True) as refresh:
+        value.title = dict(en="Brand new")
+        value.save()
+        dimension.title = dict(en="State")
+        dimension.save()
+        refresh.assert_not_called()
+    response.refresh_from_db()
+    assert response.cached_dimensions == {"status": ["new"]}
+
+    value.slug = "fresh"
+    value.save()
+    response.refresh_from_db()
+    assert response.cached_dimensions == {"status": ["fresh"]}
+
+    # nothing to change
+    assert Response.refresh_cached_dimensions_qs(survey.responses.all()) == 0
+
+    Response.objects.filter(id=response.id).update(cached_dimensions={})
+    assert Response.refresh_cached_dimensions_qs(survey.responses.all()) == 1
+
+    dimension.delete()
+    response.refresh_from_db()
+    untouched.refresh_from_db()
+    assert response.cached_dimensions == {}
+    assert untouched.cached_dimensions == {}
+
+
+@pytest.mark.django_db
+@mock.patch("forms.graphql.mutations.bulk_update_response_dimensions.graphql_check_access", autospec=True)
+def test_bulk_update_response_dimensions(_patched_graphql_check_access):
+    event, _created = Event.get_or_create_dummy()
+    survey = Survey.objects.create(event=event, slug="test-survey")
+    dimension = Dimension.objects.create(survey=survey, slug="status", title=dict(en="Status"))
+    DimensionValue.objects.bulk_create(
+        [
+            DimensionValue(dimension=dimension, slug="new", title=dict(en="New"), is_initial=True),
+            DimensionValue(dimension=dimension, slug="accepted", title=dict(en="Accepted")),
+        ]
+    )
+    form = survey.languages.create(event=event, slug="test-survey-en", language="en", fields=[])
+
+    responses = [Response.objects.create(form=form, form_data={}) for _ in range(3)]
+    for response in responses:
+        response.lift_dimension_values()
+
+    # materialize summary so that we can see it being invalidated
+    SurveySummaryBucket.get_buckets(survey)
+
+    result = BulkUpdateResponseDimensions.mutate(
+        None,
+        MOCK_INFO,
+        SimpleNamespace(
+            event_slug=event.slug,
+            survey_slug=survey.slug,
+            response_ids=[str(response.id) for response in responses[:2]],
+            filters=None,
+            form_data={"status": "accepted"},
+        ),  # type: ignore
+    )
+    assert result.count_updated_responses == 2  # type: ignore
+
+    assert sorted(tuple(response.cached_dimensions["status"]) for response in survey.responses.all()) == [
+        ("accepted",),
+        ("accepted",),
+        ("new",),
+    ]
+    assert not SurveySummaryBucket.objects.filter(survey=survey).exists()
+
+    # applying the same change again is a no-op
+    accepted = [SimpleNamespace(dimension="status", values=["accepted"])]
+    responses_qs = DimensionFilterInput.filter(survey.responses.all(), accepted)  # type: ignore
+    assert Response.set_dimension_values_qs(survey, responses_qs, {"status": ["accepted"]}) == 0
+
+    def mutate(response_ids, filters):
+        return BulkUpdateResponseDimensions.mutate(
+            None,
+            MOCK_INFO,
+            SimpleNamespace(
+                event_slug=event.slug,
+                survey_slug=survey.slug,
+                response_ids=response_ids,
+                filters=filters,
+                form_data={"status": "new"},
+            ),  # type: ignore
+        )
+
+    # neither response ids nor filters must not update the whole survey by accident
+    with pytest.raises(ValueError):
+        mutate(None, None)
+
+    assert mutate([], None).count_updated_responses == 0  # type: ignore
+    assert sorted(tuple(response.cached_dimensions["status"]) for response in survey.responses.all()) == [
+        ("accepted",),
+        ("accepted",),
+        ("new",),
+    ]
+
+
+@pytest.mark.django_db
+def test_filter_cached_dimensions():
+    event, _created = Event.get_or_create_dummy()
+    survey = Survey.objects.create(event=event, slug="test-survey")
+    for slug, value_slugs in [("status", ["new", "accepted"]), ("tag", ["red", "blue"])]:
+        dimension = Dimension.objects.create(survey=survey, slug=slug, title=dict(en=slug))
+        DimensionValue.objects.bulk_create(
+            [
+                DimensionValue(dimension=dimension, slug=value_slug, title=dict(en=value_slug))
+                for value_slug in value_slugs
+            ]
+        )
+    form = survey.languages.create(event=event, slug="test-survey-en", language="en", fields=[])
+
+    for values in [
+        {"status": ["new"], "tag": ["red", "blue"]},
+        {"status": ["accepted"], "tag": ["red"]},
+        {"status": ["accepted"]},
+    ]:
+        Response.objects.create(form=form, form_data={}).set_dimension_values(values)
+
+    def f(dimension, *values):
+        return SimpleNamespace(dimension=dimension, values=list(values))
+
+    for filters in [
+        [],
+        [f("status", "accepted")],
+        [f("tag", "red", "blue")],
+        [f("status", "accepted"), f("tag", "red", "blue")],
+        [f("status", "new", "accepted"), f("tag", "blue")],
+        [f("tag")],
+    ]:
+        expected = set(DimensionFilterInput.filter(survey.responses.all(), filters).values_list("id", flat=True))  # type: ignore
+        actual = list(
+            DimensionFilterInput.filter_cached_dimensions(survey.responses.all(), filters).values_list("id", flat=True)  # type: ignore
+        )
+        assert len(actual) == len(set(actual)), "no duplicates"
+        assert set(actual) == expected, filters
@@ -1,6 +1,7 @@
 from django.urls import path
 
 from .views.forms_excel_export_view import forms_excel_export_view
+from .views.forms_survey_csv_export_view import forms_survey_csv_export_view
 from .views.forms_survey_excel_export_view import forms_survey_excel_export_view
 
 app_name = "forms"
@@ -25,4 +26,14 @@ urlpatterns = [
         forms_survey_excel_export_view,
         name="forms_survey_excel_export_view",
     ),
+    path(
+        "surveys/<slug:survey_slug>/responses.csv",
+        forms_survey_csv_export_view,
+        name="forms_global_survey_csv_export_view",
+    ),
+    path(
+        "events/<slug:event_slug>/surveys/<slug:survey_slug>/responses.csv",
+        forms_survey_csv_export_view,
+        name="forms_survey_csv_export_view",
+    ),
 ]
@@ -0,0 +1,82 @@
+"""
+Caches validated (and merged) fields of forms and surveys across requests.
+
+Validating fields with Pydantic and merging language versions is expensive enough to matter when
+done once per response row. Cache keys include the version of the underlying data (updated_at of
+the forms involved), so entries never need to be invalidated explicitly: a changed form simply
+gets a new key and the old entry ages out of the LRU.
+
+The in-process LRU is always used. If KOMPASSI_FORMS_FIELD_CACHE_SHARED is set, the Django cache
+backend is consulted too, so that workers can share the work.
+
+NOTE: The cached Field instances are shared. Callers must not mutate them.
+"""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+
+from django.conf import settings
+from django.core.cache import cache
+
+from ..models.field import Field
+
+DJANGO_CACHE_KEY_PREFIX = "kompassi:forms:fields"
+DJANGO_CACHE_TIMEOUT_SECONDS = 24 * 60 * 60
+
+
+class FieldCache:
+    def __init__(self, name: str, max_size: int, shared: bool = False):
+        self.name = name
+        self.max_size = max_size
+        self.shared = shared
+        self.entries: OrderedDict[Hashable, list[Field]] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _get_django_cache_key(self, key: tuple) -> str:
+        return ":".join([DJANGO_CACHE_KEY_PREFIX, self.name, *(str(part) for part in key)])
+
+    def _set_local(self, key: tuple, fields: list[Field]):
+        with self.lock:
+            self.entries[key] = fields
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def get_or_set(self, key: tuple, compute: Callable[[], list[Field]]) -> list[Field]:
+        """
+        Returns a new list of (shared) fields for the key, computing them if they are not cached.
+        """
+        with self.lock:
+            fields = self.entries.get(key)
+            if fields is not None:
+                self.entries.move_to_end(key)
+                return list(fields)
+
+        if self.shared:
+            django_cache_key = self._get_django_cache_key(key)
+            fields = cache.get(django_cache_key)
+            if fields is None:
+                fields = compute()
+                cache.set(django_cache_key, fields, DJANGO_CACHE_TIMEOUT_SECONDS)
+        else:
+            fields = compute()
+
+        self._set_local(key, fields)
+        return list(fields)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+form_fields_cache = FieldCache(
+    "form",
+    max_size=settings.KOMPASSI_FORMS_FIELD_CACHE_SIZE,
+    shared=settings.KOMPASSI_FORMS_FIELD_CACHE_SHARED,
+)
+survey_fields_cache = FieldCache(
+    "survey",
+    max_size=settings.KOMPASSI_FORMS_FIELD_CACHE_SIZE,
+    shared=settings.KOMPASSI_FORMS_FIELD_CACHE_SHARED,
+)
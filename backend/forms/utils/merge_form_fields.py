@@ -37,7 +37,8 @@ def _merge_choices(
 
 
 def _merge_fields(fields: Sequence[Field], other_fields: Sequence[Field]) -> list[Field]:
-    result = {field.slug: field for field in fields}
+    # copies because choices and questions are reassigned below and fields may be cached (see field_cache.py)
+    result = {field.slug: field.model_copy() for field in fields}
     result.update((field.slug, field) for field in other_fields if field.slug not in result)
 
     for field in fields:
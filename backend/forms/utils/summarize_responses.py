@@ -4,7 +4,9 @@ See ../tests.py:test_summarize_responses for examples.
 """
 
 from collections import Counter
+from collections.abc import Sequence
 from enum import Enum
+from itertools import chain
 from typing import Any, Literal
 
 import pydantic
@@ -62,7 +64,136 @@ FieldSummary = TextFieldSummary | SingleCheckboxSummary | SelectFieldSummary | M
 Summary = dict[str, FieldSummary]
 
 
-def summarize_responses(fields: list[Field], valuesies: list[dict[str, Any]]) -> Summary:
+def _add_counts(field_summary: dict[str, int], counts: Counter[str]):
+    # account for the possibility of a choice being removed
+    for choice_slug, count in counts.items():
+        field_summary[choice_slug] = field_summary.get(choice_slug, 0) + count
+
+
+def summarize_responses(fields: Sequence[Field], valuesies: Sequence[dict[str, Any]]) -> Summary:
+    """
+    Builds the summary in a single pass over the responses. The values of each field are
+    first gathered into a column, and each column is then summarized using C-implemented
+    builtins (Counter, sum, chain) instead of looping over all responses once per field.
+
+    The result is identical (including order of choices) to summarize_responses_per_field.
+    """
+    summary: Summary = {}
+    total_responses = len(valuesies)
+
+    columns: dict[str, list[Any]] = {
+        field.slug: []
+        for field in fields
+        if field.type not in (FieldType.STATIC_TEXT, FieldType.SPACER, FieldType.DIVIDER)
+    }
+
+    # only values that are present in the response end up in the column
+    for values in valuesies:
+        for slug, value in values.items():
+            column = columns.get(slug)
+            if column is not None:
+                column.append(value)
+
+    for field in fields:
+        column = columns.get(field.slug)
+        if column is None:
+            continue
+
+        match field.type:
+            case FieldType.SINGLE_LINE_TEXT if field.html_type == "number":
+                # javascript object keys are always strings
+                counts = Counter(str(value) for value in column if value is not None)
+                count_responses = counts.total()
+
+                summary[field.slug] = SelectFieldSummary(
+                    countResponses=count_responses,
+                    countMissingResponses=total_responses - count_responses,
+                    summary=dict(counts),
+                )
+
+            case FieldType.SINGLE_LINE_TEXT | FieldType.MULTI_LINE_TEXT:
+                texts = [text for value in column if value is not None and (text := str(value).strip())]
+
+                summary[field.slug] = TextFieldSummary(
+                    countResponses=len(texts),
+                    countMissingResponses=total_responses - len(texts),
+                    summary=texts,
+                )
+
+            case FieldType.FILE_UPLOAD:
+                column = [value for value in column if value]
+
+                summary[field.slug] = FileUploadSummary(
+                    countResponses=len(column),
+                    countMissingResponses=total_responses - len(column),
+                    summary=list(chain.from_iterable(column)),
+                )
+
+            case FieldType.SINGLE_CHECKBOX:
+                count_responses = sum(map(bool, column))
+
+                summary[field.slug] = SingleCheckboxSummary(
+                    countResponses=count_responses,
+                    countMissingResponses=total_responses - count_responses,
+                )
+
+            case FieldType.SINGLE_SELECT:
+                field_summary = {choice.slug: 0 for choice in field.choices or []}
+                _add_counts(field_summary, Counter(str(value) for value in column if value))
+                count_responses = sum(field_summary.values())
+
+                summary[field.slug] = SelectFieldSummary(
+                    countResponses=count_responses,
+                    countMissingResponses=total_responses - count_responses,
+                    summary=field_summary,
+                )
+
+            case FieldType.MULTI_SELECT:
+                column = [value for value in column if value]
+                field_summary = {choice.slug: 0 for choice in field.choices or []}
+                _add_counts(field_summary, Counter(chain.from_iterable(column)))
+
+                summary[field.slug] = SelectFieldSummary(
+                    countResponses=len(column),
+                    countMissingResponses=total_responses - len(column),
+                    summary=field_summary,
+                )
+
+            case FieldType.RADIO_MATRIX:
+                choices = field.choices or []
+                counts = Counter(
+                    (question_slug, answer)
+                    for answers in column
+                    for question_slug, answer in answers.items()
+                    if answer is not None
+                )
+
+                # note: removed questions will not be included in the summary
+                field_summary = {
+                    question.slug: {choice.slug: 0 for choice in choices} for question in field.questions or []
+                }
+                for (question_slug, answer), count in counts.items():
+                    if (question_summary := field_summary.get(question_slug)) is not None:
+                        question_summary[answer] = question_summary.get(answer, 0) + count
+
+                # these are more meaningful on a per-question basis but provided for completeness
+                count_responses = sum(1 for answers in column if any(answers.values()))
+
+                summary[field.slug] = MatrixFieldSummary(
+                    countResponses=count_responses,
+                    countMissingResponses=total_responses - count_responses,
+                    summary=field_summary,
+                )
+
+    return summary
+
+
+def summarize_responses_per_field(fields: Sequence[Field], valuesies: Sequence[dict[str, Any]]) -> Summary:
+    """
+    The original implementation of summarize_responses that makes one pass over the responses
+    per field (and per question for RadioMatrix). Kept as a reference for tests and benchmarks
+    (see ../management/commands/forms_benchmark_summary.py).
+    """
     summary: Summary = {}
 
     total_responses = len(valuesies)
@@ -229,3 +360,157 @@ def summarize_responses(fields: list[Field], valuesies: list[dict[str, Any]]) ->
                 )
 
     return summary
+
+
+# Summary counters are a JSON serializable, mergeable representation of the summary of
+# those fields that can be summarized by counting alone. They are used to materialize
+# survey summaries (see ../models/survey_summary.py).
+#
+# Format (field slug -> field counters):
+#   number fields (SingleLineText with htmlType=number), SingleSelect and MultiSelect:
+#     {"responses": int, "choices": {choice slug: int}}
+#   SingleCheckbox:
+#     {"responses": int}
+#   RadioMatrix:
+#     {"responses": int, "questions": {question slug: {choice slug: int}}}
+#
+# Zero counts are omitted.
+Counters = dict[str, dict[str, Any]]
+
+
+def is_counted_field(field: Field) -> bool:
+    """
+    Counted fields can be summarized from summary counters alone.
+    Other fields (free text, file uploads) need the actual values to be summarized.
+    """
+    match field.type:
+        case FieldType.SINGLE_LINE_TEXT:
+            return field.html_type == "number"
+        case FieldType.SINGLE_CHECKBOX | FieldType.SINGLE_SELECT | FieldType.MULTI_SELECT | FieldType.RADIO_MATRIX:
+            return True
+        case _:
+            return False
+
+
+def is_listed_field(field: Field) -> bool:
+    """
+    Listed fields are summarized as a list of the values given.
+    """
+    return not is_counted_field(field) and field.type in (
+        FieldType.SINGLE_LINE_TEXT,
+        FieldType.MULTI_LINE_TEXT,
+        FieldType.FILE_UPLOAD,
+    )
+
+
+def count_values(fields: Sequence[Field], values: dict[str, Any]) -> Counters:
+    """
+    Returns the contribution of a single processed response to the summary counters.
+    Fields that are not counted fields are ignored.
+    """
+    counters: Counters = {}
+
+    for field in fields:
+        value = values.get(field.slug)
+
+        match field.type:
+            case FieldType.SINGLE_LINE_TEXT if field.html_type == "number":
+                if value is not None:
+                    counters[field.slug] = {"responses": 1, "choices": {str(value): 1}}
+
+            case FieldType.SINGLE_SELECT:
+                if value:
+                    counters[field.slug] = {"responses": 1, "choices": {str(value): 1}}
+
+            case FieldType.MULTI_SELECT:
+                if value:
+                    counters[field.slug] = {"responses": 1, "choices": dict(Counter(value))}
+
+            case FieldType.SINGLE_CHECKBOX:
+                if value:
+                    counters[field.slug] = {"responses": 1}
+
+            case FieldType.RADIO_MATRIX:
+                value = value or {}
+                questions = {question: {answer: 1} for question, answer in value.items() if answer is not None}
+                count_responses = 1 if any(answer for answer in value.values()) else 0
+
+                if questions:
+                    counters[field.slug] = {"responses": count_responses, "questions": questions}
+
+    return counters
+
+
+def merge_counters(counters: Counters, other_counters: Counters, sign: int = 1) -> Counters:
+    """
+    Adds (sign=1) or subtracts (sign=-1) other_counters to or from counters in place.
+    Returns counters for convenience.
+    """
+    for key, other_value in other_counters.items():
+        if isinstance(other_value, dict):
+            value = merge_counters(counters.get(key, {}), other_value, sign)
+        else:
+            value = counters.get(key, 0) + sign * other_value
+
+        if value:
+            counters[key] = value
+        else:
+            counters.pop(key, None)
+
+    return counters
+
+
+def summarize_counters(fields: Sequence[Field], counters: Counters, total_responses: int) -> Summary:
+    """
+    Builds the summary of counted fields out of summary counters.
+    The result is the same as that of summarize_responses for those fields.
+    """
+    summary: Summary = {}
+
+    for field in fields:
+        field_counters = counters.get(field.slug, {})
+        count_responses = field_counters.get("responses", 0)
+        count_missing_responses = total_responses - count_responses
+
+        match field.type:
+            case FieldType.SINGLE_LINE_TEXT if field.html_type == "number":
+                summary[field.slug] = SelectFieldSummary(
+                    countResponses=count_responses,
+                    countMissingResponses=count_missing_responses,
+                    summary=dict(field_counters.get("choices", {})),
+                )
+
+            case FieldType.SINGLE_SELECT | FieldType.MULTI_SELECT:
+                field_summary = {choice.slug: 0 for choice in field.choices or []}
+                field_summary.update(field_counters.get("choices", {}))
+
+                summary[field.slug] = SelectFieldSummary(
+                    countResponses=count_responses,
+                    countMissingResponses=count_missing_responses,
+                    summary=field_summary,
+                )
+
+            case FieldType.SINGLE_CHECKBOX:
+                summary[field.slug] = SingleCheckboxSummary(
+                    countResponses=count_responses,
+                    countMissingResponses=count_missing_responses,
+                )
+
+            case FieldType.RADIO_MATRIX:
+                question_counters = field_counters.get("questions", {})
+                choices = field.choices or []
+                field_summary = {}
+
+                # note: removed questions will not be included in the summary
+                for question in field.questions or []:
+                    question_summary = {choice.slug: 0 for choice in choices}
+                    question_summary.update(question_counters.get(question.slug, {}))
+                    field_summary[question.slug] = question_summary
+
+                summary[field.slug] = MatrixFieldSummary(
+                    countResponses=count_responses,
+                    countMissingResponses=count_missing_responses,
+                    summary=field_summary,
+                )
+
+    return summary
@@ -9,5 +9,5 @@ def forms_event_box_context(request, event):
     )
 
     return dict(
-        is_forms_admin=CBACEntry.is_allowed(request.user, claims),
+        is_forms_admin=CBACEntry.is_allowed(request.user, claims, request=request),
     )
@@ -1,4 +1,6 @@
-from django.http import HttpRequest, HttpResponse
+import tempfile
+
+from django.http import FileResponse, HttpRequest
 from django.shortcuts import get_object_or_404
 from django.utils.timezone import now
 
@@ -26,14 +28,19 @@ def forms_excel_export_view(
         form = get_object_or_404(Form, event__isnull=True, slug=form_slug)
         filename = f"{form.slug}_responses_{timestamp}.xlsx"
 
-    response = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    output_file = tempfile.TemporaryFile()  # closed by FileResponse
 
     write_responses_as_excel(
         Dimension.objects.none(),
         form.validated_fields,
-        form.responses.all().only("form_data"),
-        response,
+        form.responses.order_by("created_at"),
+        output_file,
     )
 
-    return response
+    output_file.seek(0)
+    return FileResponse(
+        output_file,
+        as_attachment=True,
+        filename=filename,
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
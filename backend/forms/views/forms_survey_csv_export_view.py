@@ -0,0 +1,38 @@
+from django.http import HttpRequest, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.timezone import now
+
+from access.cbac import default_cbac_required
+from core.models import Event
+
+from ..excel_export import stream_responses_as_csv
+from ..models.survey import Survey
+
+
+@default_cbac_required
+def forms_survey_csv_export_view(
+    request: HttpRequest,
+    survey_slug: str,
+    event_slug: str | None = None,
+):
+    timestamp = now().strftime("%Y%m%d%H%M%S")
+
+    if event_slug:
+        event = get_object_or_404(Event, slug=event_slug)
+        survey = get_object_or_404(Survey, event=event, slug=survey_slug)
+        filename = f"{event.slug}_{survey.slug}_responses_{timestamp}.csv"
+    else:
+        survey = get_object_or_404(Survey, event__isnull=True, slug=survey_slug)
+        filename = f"{survey.slug}_responses_{timestamp}.csv"
+
+    response = StreamingHttpResponse(
+        stream_responses_as_csv(
+            survey.dimensions.order_by("order"),
+            survey.combined_fields,
+            survey.responses.order_by("created_at"),
+        ),
+        content_type="text/csv; charset=utf-8",
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+    return response
@@ -1,4 +1,6 @@
-from django.http import HttpRequest, HttpResponse
+import tempfile
+
+from django.http import FileResponse, HttpRequest
 from django.shortcuts import get_object_or_404
 from django.utils.timezone import now
 
@@ -12,8 +14,8 @@ from ..models.survey import Survey
 @default_cbac_required
 def forms_survey_excel_export_view(
     request: HttpRequest,
-    event_slug: str | None,
     survey_slug: str,
+    event_slug: str | None = None,
 ):
     timestamp = now().strftime("%Y%m%d%H%M%S")
 
@@ -25,14 +27,21 @@ def forms_survey_excel_export_view(
         survey = get_object_or_404(Survey, event__isnull=True, slug=survey_slug)
         filename = f"{survey.slug}_responses_{timestamp}.xlsx"
 
-    response = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    # The workbook is built on disk and then streamed from there, so that
+    # neither the rows nor the finished file need to fit in memory.
+    output_file = tempfile.TemporaryFile()  # closed by FileResponse
 
     write_responses_as_excel(
         survey.dimensions.order_by("order"),
         survey.combined_fields,
-        survey.responses.order_by("created_at").only("form_data"),
-        response,
+        survey.responses.order_by("created_at"),
+        output_file,
     )
 
-    return response
+    output_file.seek(0)
+    return FileResponse(
+        output_file,
+        as_attachment=True,
+        filename=filename,
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
@@ -0,0 +1,122 @@
+"""
+Per-request batching of lookups that would otherwise be made once per row in list queries.
+
+Our GraphQL view is synchronous, so there is no event loop tick to collect keys on like in
+the JavaScript DataLoader. Instead, resolvers of list fields prime the loaders with the keys
+of all rows they return (see prime_response_loaders), and the first `load` for a row then
+fetches all primed keys in one query. Keys that were not primed are still loaded and cached,
+just without batching.
+
+Loaders are stored on the request (info.context), so they live for exactly one request.
+"""
+
+from collections.abc import Callable, Hashable, Iterable, Mapping
+from typing import Any, Generic, TypeVar
+
+from django.contrib.auth import get_user_model
+
+from forms.models.dimension import Dimension
+from forms.models.form import Form
+from forms.models.response import Response
+from forms.models.survey import Survey
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+BatchLoadFn = Callable[[list[K]], Mapping[K, V]]
+
+
+class DataLoader(Generic[K, V]):
+    def __init__(self, batch_load_fn: BatchLoadFn[K, V]):
+        self.batch_load_fn = batch_load_fn
+        self.cache: dict[K, V | None] = {}
+        self.queue: dict[K, None] = {}
+
+    def prime(self, keys: Iterable[K | None]):
+        """
+        Queues the keys to be loaded in the same batch as the next key that is not yet loaded.
+        """
+        for key in keys:
+            if key is not None and key not in self.cache:
+                self.queue[key] = None
+
+    def dispatch(self):
+        keys = [key for key in self.queue if key not in self.cache]
+        self.queue.clear()
+
+        if not keys:
+            return
+
+        values = self.batch_load_fn(keys)
+        for key in keys:
+            self.cache[key] = values.get(key)
+
+    def load(self, key: K | None) -> V | None:
+        if key is None:
+            return None
+
+        if key not in self.cache:
+            self.queue[key] = None
+            self.dispatch()
+
+        return self.cache[key]
+
+
+def get_loader(info, batch_load_fn: BatchLoadFn[K, V]) -> DataLoader[K, V]:
+    """
+    Returns the loader for the batch load function for the current request.
+    """
+    loaders: dict[BatchLoadFn, DataLoader] | None = getattr(info.context, "_kompassi_dataloaders", None)
+    if loaders is None:
+        loaders = {}
+        info.context._kompassi_dataloaders = loaders
+
+    loader = loaders.get(batch_load_fn)
+    if loader is None:
+        loader = loaders[batch_load_fn] = DataLoader(batch_load_fn)
+
+    return loader
+
+
+def load_forms(form_ids: list[int]) -> Mapping[int, Form]:
+    return Form.objects.in_bulk(form_ids)
+
+
+def load_surveys_by_form(form_ids: list[int]) -> Mapping[int, Survey]:
+    """
+    Form id -> survey the form is a language version of.
+    Forms that are not related to a survey (eg. program offer forms) map to None.
+    """
+    survey_forms = Survey.languages.through.objects.filter(form_id__in=form_ids).select_related("survey")
+    return {survey_form.form_id: survey_form.survey for survey_form in survey_forms}  # type: ignore
+
+
+def load_users(user_ids: list[int]) -> Mapping[int, Any]:
+    return get_user_model().objects.in_bulk(user_ids)
+
+
+def load_key_dimension_slugs(survey_ids: list[int]) -> Mapping[int, set[str]]:
+    """
+    Survey id -> slugs of key dimensions of that survey.
+    """
+    key_dimension_slugs: dict[int, set[str]] = {survey_id: set() for survey_id in survey_ids}
+    for survey_id, slug in Dimension.objects.filter(
+        survey_id__in=survey_ids,
+        is_key_dimension=True,
+    ).values_list("survey_id", "slug"):
+        key_dimension_slugs[survey_id].add(slug)
+    return key_dimension_slugs
+
+
+def prime_response_loaders(info, responses: Iterable[Response]) -> list[Response]:
+    """
+    Call this in list resolvers that return responses so that per-response resolvers
+    of LimitedResponseType can batch their lookups. Returns the responses as a list.
+    """
+    responses = list(responses)
+
+    get_loader(info, load_forms).prime(response.form_id for response in responses)  # type: ignore
+    get_loader(info, load_surveys_by_form).prime(response.form_id for response in responses)  # type: ignore
+    get_loader(info, load_users).prime(response.created_by_id for response in responses)  # type: ignore
+
+    return responses
@@ -6,6 +6,7 @@ from django.conf import settings
 from core.graphql.event import FullEventType
 from core.graphql.profile import ProfileType
 from core.models import Event, Person
+from forms.graphql.mutations.bulk_update_response_dimensions import BulkUpdateResponseDimensions
 from forms.graphql.mutations.create_survey_response import CreateSurveyResponse
 from forms.graphql.mutations.delete_survey_dimension import DeleteSurveyDimension
 from forms.graphql.mutations.delete_survey_dimension_value import DeleteSurveyDimensionValue
@@ -70,6 +71,7 @@ class Mutation(graphene.ObjectType):
     delete_survey_dimension_value = DeleteSurveyDimensionValue.Field()
     init_file_upload = InitFileUpload.Field()
     update_response_dimensions = UpdateResponseDimensions.Field()
+    bulk_update_response_dimensions = BulkUpdateResponseDimensions.Field()
 
 
 schema = graphene.Schema(query=Query, mutation=Mutation)
@@ -1,2 +1,34 @@
+from types import SimpleNamespace
+
+from .dataloaders import get_loader
+
+
 def test_graphql_api_is_at_wellknown_url(client):
     assert client.get("/graphql").status_code != 404
+
+
+def test_dataloader_batches_primed_keys():
+    batches = []
+
+    def batch_load_fn(keys):
+        batches.append(keys)
+        return {key: key * 2 for key in keys if key != 3}
+
+    info = SimpleNamespace(context=SimpleNamespace())
+    loader = get_loader(info, batch_load_fn)
+    assert get_loader(info, batch_load_fn) is loader
+
+    loader.prime([1, 2, 3, None])
+    assert loader.load(1) == 2
+    assert loader.load(2) == 4
+    assert loader.load(3) is None
+    assert loader.load(None) is None
+    assert batches == [[1, 2, 3]]
+
+    # not primed, loaded and cached on its own
+    assert loader.load(4) == 8
+    assert loader.load(4) == 8
+    assert batches == [[1, 2, 3], [4]]
+
+    # loaders are per request
+    assert get_loader(SimpleNamespace(context=SimpleNamespace()), batch_load_fn) is not loader
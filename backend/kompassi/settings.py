@@ -56,6 +56,33 @@ CACHES = {
     "default": env.cache(default="locmemcache://"),
 }
 
+# Used by forms.utils.field_cache. Number of versions of form and survey fields cached per process,
+# and whether to also share them between workers via the default cache.
+KOMPASSI_FORMS_FIELD_CACHE_SIZE = 256
+KOMPASSI_FORMS_FIELD_CACHE_SHARED = env.bool("KOMPASSI_FORMS_FIELD_CACHE_SHARED", default=False)
+
+# Used by access.models.cbac_entry. Whether CBAC entries of users are cached between requests
+# via the default cache (they are always cached for the duration of a single request).
+KOMPASSI_CBAC_CACHE_SHARED = env.bool("KOMPASSI_CBAC_CACHE_SHARED", default=False)
+
+# Used by tickets.availability. For how long product availability shown in the ticket shop may lag behind.
+# Set to 0 to disable caching. Overselling is prevented regardless.
+KOMPASSI_TICKETS_AVAILABILITY_CACHE_SECONDS = env.int("KOMPASSI_TICKETS_AVAILABILITY_CACHE_SECONDS", default=10)
+
+# Used by tickets.models.order. For how long rendered e-ticket PDFs are cached in the default cache.
+# Only worth enabling with a shared cache backend; with the per-process default, leave at 0 (disabled).
+KOMPASSI_TICKETS_ETICKETS_CACHE_SECONDS = env.int("KOMPASSI_TICKETS_ETICKETS_CACHE_SECONDS", default=0)
+
+# Used by tickets.models.sales_rollup. If set, ticket sales statistics are read from an incrementally
+# refreshed rollup table instead of aggregating order products on every view.
+# After enabling, run tickets_refresh_sales_rollup --full for events that already have sales.
+KOMPASSI_TICKETS_SALES_ROLLUP = env.bool("KOMPASSI_TICKETS_SALES_ROLLUP", default=False)
+
+# Used by core.csv_export. Number of many-to-many choice lists cached per process for exports, and for how
+# long they may lag behind changes made in other processes.
+KOMPASSI_CSV_EXPORT_M2M_CHOICES_CACHE_SIZE = 128
+KOMPASSI_CSV_EXPORT_M2M_CHOICES_CACHE_SECONDS = env.int("KOMPASSI_CSV_EXPORT_M2M_CHOICES_CACHE_SECONDS", default=300)
+
 ALLOWED_HOSTS = env("ALLOWED_HOSTS", default="localhost").split()
 
 TIME_ZONE = "Europe/Helsinki"
@@ -0,0 +1,165 @@
+"""
+Set-based reconciliation of the labour groups of an event with the state of its signups.
+
+A user with a signup belongs to the state groups (see SIGNUP_STATE_GROUPS) that match the state of
+the signup, to the groups of the job categories the signup was accepted to and to the groups of its
+labour personnel classes. GroupMembershipReconciler computes the desired memberships of a set of users
+from their signups in a fixed number of queries, diffs them against the existing rows of the
+User.groups through table and applies the difference with one bulk insert and one bulk delete.
+
+All signups of an affected user in the event are taken into account, so a user belongs to a group if
+any of their signups qualifies. Only existing groups are reconciled; use LabourEventMeta.create_groups
+to create missing ones. Memberships in groups other than the labour groups of the event are left alone.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+
+from .models.constants import SIGNUP_STATE_GROUPS, STATE_TIME_FIELDS
+
+logger = logging.getLogger("kompassi")
+
+UserGroup = User.groups.through
+
+
+@dataclass
+class GroupMembershipReconciler:
+    event: object
+
+    # group suffix (state group suffix, job category slug or personnel class slug) -> group id
+    group_ids: dict[str, int] = field(default_factory=dict)
+
+    # job category/personnel class id -> group id, for those whose group exists
+    job_category_group_ids: dict[int, int] = field(default_factory=dict)
+    personnel_class_group_ids: dict[int, int] = field(default_factory=dict)
+
+    @classmethod
+    def for_event(cls, event) -> GroupMembershipReconciler:
+        """
+        Resolves all labour groups of the event in three queries.
+        """
+        from .models.job_category import JobCategory
+        from .models.labour_event_meta import LabourEventMeta
+        from .models.personnel_class import PersonnelClass
+
+        job_category_slugs = dict(JobCategory.objects.filter(event=event).values_list("id", "slug"))
+        personnel_class_slugs = dict(
+            PersonnelClass.objects.filter(event=event, app_label="labour").values_list("id", "slug")
+        )
+
+        suffixes = {*SIGNUP_STATE_GROUPS, *job_category_slugs.values(), *personnel_class_slugs.values()}
+        suffixes_by_group_name = {LabourEventMeta.make_group_name(event, suffix): suffix for suffix in suffixes}
+        group_ids = {
+            suffixes_by_group_name[name]: group_id
+            for name, group_id in Group.objects.filter(name__in=suffixes_by_group_name).values_list("name", "id")
+        }
+
+        return cls(
+            event=event,
+            group_ids=group_ids,
+            job_category_group_ids={
+                jc_id: group_ids[slug] for jc_id, slug in job_category_slugs.items() if slug in group_ids
+            },
+            personnel_class_group_ids={
+                pc_id: group_ids[slug] for pc_id, slug in personnel_class_slugs.items() if slug in group_ids
+            },
+        )
+
+    def get_desired_memberships(self, user_ids: Iterable[int]) -> set[tuple[int, int]]:
+        """
+        Returns the (user id, group id) pairs the given users should have among the labour groups of the event,
+        based on all their signups in the event. Three queries regardless of the number of signups.
+        """
+        from .models.signup import Signup
+
+        signups = list(
+            Signup.objects.filter(event=self.event, person__user_id__in=user_ids)
+            .select_related("person")
+            .only("id", "person__user", "is_active", *STATE_TIME_FIELDS)
+        )
+        user_id_by_signup = {signup.id: signup.person.user_id for signup in signups}
+
+        memberships = set()
+
+        for signup in signups:
+            for suffix in SIGNUP_STATE_GROUPS:
+                group_id = self.group_ids.get(suffix)
+                if group_id is not None and getattr(signup, f"is_{suffix}"):
+                    memberships.add((signup.person.user_id, group_id))
+
+        for signup_id, job_category_id in Signup.job_categories_accepted.through.objects.filter(
+            signup_id__in=user_id_by_signup,
+            jobcategory_id__in=self.job_category_group_ids,
+        ).values_list("signup_id", "jobcategory_id"):
+            memberships.add((user_id_by_signup[signup_id], self.job_category_group_ids[job_category_id]))
+
+        for signup_id, personnel_class_id in Signup.personnel_classes.through.objects.filter(
+            signup_id__in=user_id_by_signup,
+            personnelclass_id__in=self.personnel_class_group_ids,
+        ).values_list("signup_id", "personnelclass_id"):
+            memberships.add((user_id_by_signup[signup_id], self.personnel_class_group_ids[personnel_class_id]))
+
+        return memberships
+
+    @transaction.atomic
+    def reconcile(self, user_ids: Iterable[int]) -> tuple[int, int]:
+        """
+        Adds and removes memberships of the given users in the labour groups of the event so that they
+        match the signups of the users. Returns the number of memberships added and removed.
+        """
+        user_ids = {user_id for user_id in user_ids if user_id is not None}
+        if not user_ids or not self.group_ids:
+            return 0, 0
+
+        desired = self.get_desired_memberships(user_ids)
+        current = {
+            (user_id, group_id): pk
+            for pk, user_id, group_id in UserGroup.objects.filter(
+                user_id__in=user_ids,
+                group_id__in=self.group_ids.values(),
+            ).values_list("id", "user_id", "group_id")
+        }
+
+        to_add = desired - current.keys()
+        to_remove = [pk for membership, pk in current.items() if membership not in desired]
+
+        if to_add:
+            # ignore_conflicts: a concurrent reconciliation may have added the same row
+            UserGroup.objects.bulk_create(
+                [UserGroup(user_id=user_id, group_id=group_id) for user_id, group_id in to_add],
+                ignore_conflicts=True,
+            )
+
+        if to_remove:
+            UserGroup.objects.filter(id__in=to_remove).delete()
+
+        return len(to_add), len(to_remove)
+
+    def reconcile_all(self) -> tuple[int, int]:
+        """
+        Reconciles the memberships of everyone who has signed up for the event or is in one of its labour groups.
+        """
+        from .models.signup import Signup
+
+        user_ids = set(
+            Signup.objects.filter(event=self.event, person__user__isnull=False).values_list(
+                "person__user_id",
+                flat=True,
+            )
+        )
+        user_ids.update(
+            UserGroup.objects.filter(group_id__in=self.group_ids.values()).values_list("user_id", flat=True)
+        )
+
+        num_added, num_removed = self.reconcile(user_ids)
+        logger.info(
+            f"Reconciled labour groups of {self.event.slug} for {len(user_ids)} users: "
+            f"{num_added} memberships added, {num_removed} removed"
+        )
+        return num_added, num_removed
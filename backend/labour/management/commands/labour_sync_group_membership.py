@@ -1,5 +1,3 @@
-import sys
-
 from django.core.management.base import BaseCommand
 
 
@@ -7,12 +5,18 @@ class Command(BaseCommand):
     args = ""
     help = "Make sure all users belong to their respective labour groups"
 
-    def handle(*args, **options):
-        from labour.models import Signup
+    def add_arguments(self, parser):
+        parser.add_argument("event_slugs", nargs="*", metavar="EVENT_SLUG")
+
+    def handle(self, *args, **options):
+        from core.models import Event
+
+        from ...group_membership import GroupMembershipReconciler
 
-        for signup in Signup.objects.all():
-            signup.apply_state()
-            sys.stdout.write(".")
-            sys.stdout.flush()
+        events = Event.objects.filter(laboureventmeta__isnull=False)
+        if options["event_slugs"]:
+            events = events.filter(slug__in=options["event_slugs"])
 
-        print()
+        for event in events:
+            num_added, num_removed = GroupMembershipReconciler.for_event(event).reconcile_all()
+            self.stdout.write(f"{event.slug}: {num_added} memberships added, {num_removed} removed")
@@ -0,0 +1,44 @@
+# Generated by Django 5.0.2 on 2026-10-18 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("labour", "0037_rename_personnelclass_event_app_label_labour_pers_event_i_49de47_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="jobcategory",
+            name="roster_version",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name="RosterChange",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("version", models.PositiveIntegerField()),
+                ("job_id", models.IntegerField()),
+                ("job_slug", models.CharField(max_length=255)),
+                ("shift_id", models.IntegerField(blank=True, null=True)),
+                ("signup_id", models.IntegerField(blank=True, null=True)),
+                ("deleted", models.BooleanField(default=False)),
+                ("start_time", models.DateTimeField(blank=True, null=True)),
+                ("end_time", models.DateTimeField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "job_category",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="roster_changes",
+                        to="labour.jobcategory",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [models.Index(fields=["job_category", "version"], name="labour_rosterchange_jc_ver")],
+            },
+        ),
+    ]
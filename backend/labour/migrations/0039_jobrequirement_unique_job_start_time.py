@@ -0,0 +1,26 @@
+# Generated by Django 5.0.2 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+# get_or_create without a unique constraint may have created duplicates; keep the latest one
+DEDUPLICATE_JOB_REQUIREMENTS = """
+delete from labour_jobrequirement r
+using labour_jobrequirement newer
+where r.job_id = newer.job_id
+  and r.start_time = newer.start_time
+  and r.id < newer.id
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("labour", "0038_jobcategory_roster_version_rosterchange"),
+    ]
+
+    operations = [
+        migrations.RunSQL(DEDUPLICATE_JOB_REQUIREMENTS, migrations.RunSQL.noop),
+        migrations.AddConstraint(
+            model_name="jobrequirement",
+            constraint=models.UniqueConstraint(fields=("job", "start_time"), name="labour_jobreq_job_start_uniq"),
+        ),
+    ]
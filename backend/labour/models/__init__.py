@@ -10,7 +10,9 @@ from .roster import (
     EditShiftRequest,
     Job,
     JobRequirement,
+    RosterChange,
     SetJobRequirementsRequest,
+    SetManyJobRequirementsRequest,
     Shift,
     WorkPeriod,
 )
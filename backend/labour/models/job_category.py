@@ -47,6 +47,9 @@ class JobCategory(models.Model):
         ),
     )
 
+    # incremented by RosterChange.record on every change made via the Roster API
+    roster_version = models.PositiveIntegerField(default=0, editable=False)
+
     @classmethod
     def get_or_create_dummy(cls, name="Courier"):
         from .labour_event_meta import LabourEventMeta
@@ -79,7 +82,7 @@ class JobCategory(models.Model):
                 new_job_category, created = cls.objects.get_or_create(
                     event=target_event,
                     slug=job_category.slug,
-                    defaults=omit_keys(vars(job_category), "_state", "id", "event_id", "slug"),
+                    defaults=omit_keys(vars(job_category), "_state", "id", "event_id", "slug", "roster_version"),
                 )
 
                 if not created:
@@ -145,22 +148,6 @@ class JobCategory(models.Model):
 
         return [jc1, jc2]
 
-    def _make_requirements(self):
-        """
-        Returns an array of integers representing the sum of JobRequirements for this JobCategory
-        where indexes correspond to those of work_hours for this event.
-        """
-        from .roster import JobRequirement
-
-        requirements = JobRequirement.objects.filter(job__job_category=self)
-        return JobRequirement.requirements_as_integer_array(self.event, requirements)
-
-    def _make_allocated(self):
-        from .roster import JobRequirement, Shift
-
-        shifts = Shift.objects.filter(job__job_category=self)
-        return JobRequirement.allocated_as_integer_array(self.event, shifts)
-
     def _make_people(self):
         """
         Returns an array of accepted workers. Used by the Roster API.
@@ -180,7 +167,17 @@ class JobCategory(models.Model):
 
         return super().save(*args, **kwargs)
 
-    def as_dict(self, include_jobs=False, include_requirements=False, include_people=False, include_shifts=False):
+    def as_dict(
+        self,
+        include_jobs=False,
+        include_requirements=False,
+        include_people=False,
+        include_shifts=False,
+        coverage=None,
+    ):
+        """
+        Pass a RosterCoverage (see ..roster_coverage) if serializing many job categories to avoid loading it for each.
+        """
         if include_shifts and not include_jobs:
             raise AssertionError("If include_shifts is specified, must specify also include_jobs")
 
@@ -190,12 +187,25 @@ class JobCategory(models.Model):
             "slug",
         )
 
+        if coverage is None and (include_jobs or include_requirements):
+            from ..roster_coverage import RosterCoverage
+
+            coverage = RosterCoverage.load(self.event, job_category=self)
+
         if include_jobs:
-            doc["jobs"] = [job.as_dict(include_shifts=include_shifts) for job in self.job_set.all()]
+            jobs = self.job_set.all()
+            if include_shifts:
+                from .roster import Shift
+
+                jobs = jobs.prefetch_related(
+                    models.Prefetch("shifts", queryset=Shift.objects.select_related("signup")),
+                )
+
+            doc["jobs"] = [job.as_dict(include_shifts=include_shifts, coverage=coverage) for job in jobs]
 
         if include_requirements:
-            doc["requirements"] = self._make_requirements()
-            doc["allocated"] = self._make_allocated()
+            doc["requirements"] = coverage.get_job_category_requirements(self.id)
+            doc["allocated"] = coverage.get_job_category_allocated(self.id)
 
         if include_people:
             doc["people"] = self._make_people()
@@ -203,4 +213,88 @@ class JobCategory(models.Model):
         return doc
 
     def as_roster_api_dict(self):
-        return self.as_dict(include_jobs=True, include_people=True, include_shifts=True)
+        doc = self.as_dict(include_jobs=True, include_people=True, include_shifts=True)
+        doc["version"] = self.roster_version
+        return doc
+
+    def as_roster_api_delta(self, since: int):
+        """
+        Returns what has changed in the roster of this job category since the given version: the jobs and
+        shifts that were changed or deleted, the changed slices of the requirement and allocation arrays of
+        the jobs, and the people whose allocated hours were changed.
+
+        If the changes since the given version are not known, returns the whole roster instead.
+        """
+        from ..roster_coverage import RosterCoverage
+        from .roster import Job, Shift
+        from .signup import Signup
+
+        if not 0 <= since <= self.roster_version:
+            return self.as_roster_api_dict()
+
+        changed_job_ids = set()
+        deleted_job_slugs = set()
+        latest_shift_changes = {}
+        time_ranges_by_job_id = {}
+        signup_ids = set()
+
+        for change in self.roster_changes.filter(version__gt=since).order_by("version", "id"):
+            changed_job_ids.add(change.job_id)
+
+            if change.shift_id is not None:
+                latest_shift_changes[change.shift_id] = change
+                signup_ids.add(change.signup_id)
+            elif change.deleted:
+                deleted_job_slugs.add(change.job_slug)
+
+            if change.start_time is not None:
+                start_time, end_time = time_ranges_by_job_id.get(change.job_id, (change.start_time, change.end_time))
+                time_ranges_by_job_id[change.job_id] = (
+                    min(start_time, change.start_time),
+                    max(end_time, change.end_time),
+                )
+
+        jobs = {job.id: job for job in Job.objects.filter(job_category=self, id__in=changed_job_ids)}
+        shifts = Shift.objects.filter(
+            job__job_category=self,
+            id__in=[shift_id for shift_id, change in latest_shift_changes.items() if not change.deleted],
+        ).select_related("job", "signup")
+
+        sliced_job_ids = time_ranges_by_job_id.keys() & jobs.keys()
+        coverage = RosterCoverage.load(self.event, job_category=self, job_ids=sliced_job_ids)
+        slices = []
+        for job_id in sliced_job_ids:
+            job = jobs[job_id]
+            start_time, end_time = time_ranges_by_job_id[job_id]
+            start_index = coverage.get_index(start_time)
+            end_index = coverage.get_index(end_time)
+            if start_index is None or end_index is None:
+                start_index, end_index = 0, coverage.num_hours
+
+            start_index, end_index = max(start_index, 0), min(end_index, coverage.num_hours)
+            if start_index >= end_index:
+                continue
+
+            slices.append(
+                dict(
+                    job=job.slug,
+                    start=start_index,
+                    requirements=coverage.get_job_requirements(job_id)[start_index:end_index],
+                    allocated=coverage.get_job_allocated(job_id)[start_index:end_index],
+                )
+            )
+
+        people = Signup.objects.filter(id__in=signup_ids).select_related("person")
+
+        return dict(
+            slug=self.slug,
+            title=self.title,
+            version=self.roster_version,
+            since=since,
+            jobs=[job.as_dict(include_requirements=False) for job in jobs.values()],
+            deletedJobs=sorted(deleted_job_slugs - {job.slug for job in jobs.values()}),
+            shifts=[dict(shift.as_dict(), jobSlug=shift.job.slug) for shift in shifts],
+            deletedShifts=[shift_id for shift_id, change in latest_shift_changes.items() if change.deleted],
+            slices=slices,
+            people=[signup.as_dict() for signup in people],
+        )
@@ -1,15 +1,16 @@
-from collections import defaultdict, namedtuple
-from datetime import timedelta
+from collections import namedtuple
+from collections.abc import Iterable
+from datetime import datetime, timedelta
 
 from dateutil.parser import parse as parse_date
 from dateutil.tz import tzlocal
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 
 from api.utils import JSONSchemaObject
 from core.csv_export import CsvExportMixin
-from core.utils import NONUNIQUE_SLUG_FIELD_PARAMS, ONE_HOUR, format_interval, pick_attrs, slugify
+from core.utils import NONUNIQUE_SLUG_FIELD_PARAMS, ONE_HOUR, format_interval, full_hours_between, pick_attrs, slugify
 
 
 class WorkPeriod(models.Model):
@@ -57,24 +58,13 @@ class Job(models.Model):
     admin_get_event.short_description = _("event")
     admin_get_event.admin_order_field = "job_category__event"
 
-    def _make_requirements(self):
-        """
-        Returns an array of integers representing the sum of JobRequirements for this Job
-        where indexes correspond to those of work_hours for this event.
-        """
-        return JobRequirement.requirements_as_integer_array(self.job_category.event, self.requirements.all())
-
-    def _make_allocated(self):
-        """
-        Returns an array of integers representing the number of Shifts for this Job
-        where indexes correspond to those of work_hours for this event.
-        """
-        return JobRequirement.allocated_as_integer_array(self.job_category.event, self.shifts.all())
-
     def _make_shifts(self):
         return [shift.as_dict() for shift in self.shifts.all()]
 
-    def as_dict(self, include_requirements=True, include_shifts=False):
+    def as_dict(self, include_requirements=True, include_shifts=False, coverage=None):
+        """
+        Pass a RosterCoverage (see ..roster_coverage) if serializing many jobs to avoid loading it for each.
+        """
         doc = pick_attrs(
             self,
             "slug",
@@ -82,8 +72,13 @@ class Job(models.Model):
         )
 
         if include_requirements:
-            doc["requirements"] = self._make_requirements()
-            doc["allocated"] = self._make_allocated()
+            if coverage is None:
+                from ..roster_coverage import RosterCoverage
+
+                coverage = RosterCoverage.load(self.job_category.event, job_category=self.job_category)
+
+            doc["requirements"] = coverage.get_job_requirements(self.id)
+            doc["allocated"] = coverage.get_job_allocated(self.id)
 
         if include_shifts:
             doc["shifts"] = self._make_shifts()
@@ -99,36 +94,56 @@ class JobRequirement(models.Model):
     start_time = models.DateTimeField(verbose_name=_("starting time"))
     end_time = models.DateTimeField(verbose_name=_("ending time"))
 
-    @staticmethod
-    def requirements_as_integer_array(event, requirements):
-        work_hours = event.labour_event_meta.work_hours
-
-        requirements_by_start_time = defaultdict(list)
-        for requirement in requirements:
-            requirements_by_start_time[requirement.start_time].append(requirement)
-
-        return [sum(r.count for r in requirements_by_start_time[t]) for t in work_hours]
-
-    @staticmethod
-    def allocated_as_integer_array(event, shifts):
-        work_hours = event.labour_event_meta.work_hours
-
-        allocated_by_start_time = defaultdict(int)
-        for shift in shifts:
-            for start_time in shift.work_hours:
-                allocated_by_start_time[start_time] += 1
-
-        return [allocated_by_start_time[t] for t in work_hours]
-
     def save(self, *args, **kwargs):
         if self.start_time and not self.end_time:
             self.end_time = self.start_time + ONE_HOUR
 
         return super().save(*args, **kwargs)
 
+    @classmethod
+    def set_requirements(cls, event, ranges: Iterable[tuple[Job, datetime, datetime, int]]) -> list["RosterChange"]:
+        """
+        Sets the number of workers required for each (job, start time, end time, count) hour range
+        (start and end inclusive) in a single INSERT … ON CONFLICT statement. Hours outside the work hours
+        of the event are ignored. Where ranges overlap, the latter wins.
+
+        Returns the roster changes to record, one per job.
+        """
+        meta = event.labour_event_meta
+        requirements = {}
+        changes = {}
+
+        for job, start_time, end_time, count in ranges:
+            start_time = max(start_time, meta.work_begins)
+            end_time = min(end_time, meta.work_ends)
+            if start_time > end_time:
+                continue
+
+            for hour in full_hours_between(start_time, end_time):  # start/end inclusive
+                requirements[job.id, hour] = cls(job=job, start_time=hour, end_time=hour + ONE_HOUR, count=count)
+
+            change = changes.get(job.id)
+            if change is None:
+                changes[job.id] = RosterChange.for_job(job, start_time=start_time, end_time=end_time + ONE_HOUR)
+            else:
+                change.start_time = min(change.start_time, start_time)
+                change.end_time = max(change.end_time, end_time + ONE_HOUR)
+
+        cls.objects.bulk_create(
+            requirements.values(),
+            update_conflicts=True,
+            unique_fields=["job", "start_time"],
+            update_fields=["count", "end_time"],
+        )
+
+        return list(changes.values())
+
     class Meta:
         verbose_name = _("job requirement")
         verbose_name_plural = _("job requirements")
+        constraints = [
+            models.UniqueConstraint(fields=["job", "start_time"], name="labour_jobreq_job_start_uniq"),
+        ]
 
 
 class Shift(models.Model, CsvExportMixin):
@@ -143,10 +158,10 @@ class Shift(models.Model, CsvExportMixin):
 
         return dict(
             id=self.id,
-            job=self.job.id,
+            job=self.job_id,
             startTime=self.start_time.astimezone(tz).isoformat() if self.start_time else None,
             hours=self.hours,
-            person=self.signup.person.id if self.signup and self.signup.person else None,
+            person=self.signup.person_id if self.signup else None,
             notes=self.notes,
             state="planned",  # TODO
         )
@@ -221,6 +236,10 @@ class Shift(models.Model, CsvExportMixin):
             Person: self.signup.person,
         }
 
+    @classmethod
+    def get_csv_queryset(cls, event, queryset, fields):
+        return queryset.select_related("job__job_category", "signup__person")
+
     def __str__(self):
         parts = [
             "{interval} ({hours} h): {job_category_name} ({job_name})".format(
@@ -242,6 +261,86 @@ class Shift(models.Model, CsvExportMixin):
         ordering = ("job", "start_time")
 
 
+class RosterChange(models.Model):
+    """
+    A change made via the Roster API to a job, a shift or the requirements of a job.
+
+    Every mutation of the roster of a job category is recorded under the next roster_version of the
+    category, so that clients that have the roster as of some version can fetch only what has changed
+    since then (see JobCategory.as_roster_api_delta). start_time and end_time delimit the work hours
+    whose requirements or allocations were affected.
+    """
+
+    job_category = models.ForeignKey(
+        "labour.JobCategory",
+        on_delete=models.CASCADE,
+        related_name="roster_changes",
+    )
+    version = models.PositiveIntegerField()
+
+    # NOTE: not foreign keys as the job or shift may have been deleted
+    job_id = models.IntegerField()
+    job_slug = models.CharField(max_length=255)
+    shift_id = models.IntegerField(null=True, blank=True)
+    signup_id = models.IntegerField(null=True, blank=True)
+
+    deleted = models.BooleanField(default=False)
+    start_time = models.DateTimeField(null=True, blank=True)
+    end_time = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["job_category", "version"], name="labour_rosterchange_jc_ver")]
+
+    @classmethod
+    def for_job(cls, job, deleted=False, start_time=None, end_time=None):
+        return cls(
+            job_id=job.id,
+            job_slug=job.slug,
+            deleted=deleted,
+            start_time=start_time,
+            end_time=end_time,
+        )
+
+    @classmethod
+    def for_shift(cls, shift, deleted=False):
+        return cls(
+            job_id=shift.job_id,
+            job_slug=shift.job.slug,
+            shift_id=shift.id,
+            signup_id=shift.signup_id,
+            deleted=deleted,
+            start_time=shift.start_time,
+            end_time=shift.end_time,
+        )
+
+    @classmethod
+    @transaction.atomic
+    def record(cls, job_category, changes: list["RosterChange"]) -> int:
+        """
+        Records the changes under the next version of the roster of the job category and returns that version.
+        The job category is locked until commit so that versions are committed in order.
+        """
+        from .job_category import JobCategory
+
+        version = (
+            JobCategory.objects.select_for_update()
+            .filter(id=job_category.id)
+            .values_list("roster_version", flat=True)
+            .get()
+        ) + 1
+        JobCategory.objects.filter(id=job_category.id).update(roster_version=version)
+        job_category.roster_version = version
+
+        for change in changes:
+            change.job_category = job_category
+            change.version = version
+        cls.objects.bulk_create(changes)
+
+        return version
+
+
 SetJobRequirementsRequestBase = namedtuple("SetJobRequirementsRequest", "startTime hours required")
 
 
@@ -257,6 +356,30 @@ class SetJobRequirementsRequest(SetJobRequirementsRequestBase, JSONSchemaObject)
     )
 
 
+SetManyJobRequirementsRequestBase = namedtuple("SetManyJobRequirementsRequest", "ranges")
+
+
+class SetManyJobRequirementsRequest(SetManyJobRequirementsRequestBase, JSONSchemaObject):
+    schema = dict(
+        type="object",
+        properties=dict(
+            ranges=dict(
+                type="array",
+                minItems=1,
+                items=dict(
+                    type="object",
+                    properties=dict(
+                        job=dict(type="string", minLength=1),
+                        **SetJobRequirementsRequest.schema["properties"],
+                    ),
+                    required=["job", *SetJobRequirementsRequestBase._fields],
+                ),
+            ),
+        ),
+        required=list(SetManyJobRequirementsRequestBase._fields),
+    )
+
+
 EditJobRequestBase = namedtuple("EditJobRequest", "title")
 
 
@@ -1,19 +1,21 @@
 import logging
 from collections import OrderedDict
 from dataclasses import dataclass
-from functools import cached_property
+from functools import cached_property, partial
 from typing import TYPE_CHECKING
+from uuid import uuid4
 
 from django.conf import settings
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction
 from django.db.models import Sum
 from django.db.models.functions import Coalesce
+from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
 
 from core.csv_export import CsvExportMixin
 from core.utils import (
     alias_property,
-    ensure_user_group_membership,
     get_previous_and_next,
     time_bool_property,
 )
@@ -23,7 +25,6 @@ from .constants import (
     NUM_FIRST_CATEGORIES,
     SIGNUP_STATE_BUTTON_CLASSES,
     SIGNUP_STATE_DESCRIPTIONS,
-    SIGNUP_STATE_GROUPS,
     SIGNUP_STATE_IMPERATIVES,
     SIGNUP_STATE_LABEL_CLASSES,
     SIGNUP_STATE_NAMES,
@@ -37,6 +38,10 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger("kompassi")
 
+MASS_STATE_CHANGE_BATCH_SIZE = 50
+MASS_STATE_CHANGE_PROGRESS_KEY_TEMPLATE = "kompassi:labour:mass_state_change:{job_id}"
+MASS_STATE_CHANGE_PROGRESS_TIMEOUT_SECONDS = 24 * 60 * 60
+
 
 @dataclass
 class StateTransition:
@@ -455,19 +460,80 @@ class Signup(CsvExportMixin, SignupMixin, models.Model):
             filter_func=cls.filter_signups_for_mass_send_shifts,
         )
 
+    @staticmethod
+    def get_state_transition_updates(old_state, new_state):
+        """
+        Returns the field values that move a signup from old_state to new_state like setting .state would.
+        """
+        t = now()
+        old_flags = STATE_FLAGS_BY_NAME[old_state]
+        new_flags = STATE_FLAGS_BY_NAME[new_state]
+
+        updates = dict(updated_at=t)
+
+        # First state flag is not a time bool field (see get_state_query_params)
+        if old_flags[0] != new_flags[0]:
+            updates["is_active"] = new_flags[0]
+
+        for field_name, old_flag, new_flag in zip(STATE_TIME_FIELDS[1:], old_flags[1:], new_flags[1:], strict=True):
+            if old_flag != new_flag:
+                updates[field_name] = t if new_flag else None
+
+        return updates
+
     @classmethod
-    def _mass_state_change(cls, old_state, new_state, signups, filter_func=None):
+    def _mass_state_change(cls, old_state, new_state, signups, filter_func=None) -> tuple[list[int], str]:
+        """
+        Moves those of the signups that are in old_state to new_state with a single UPDATE. The side effects
+        of the new state (see apply_state) are applied to them in batches in the background after commit.
+
+        Returns the ids of the changed signups and a key for get_mass_state_change_progress.
+        """
         if filter_func is None:
-            signups = signups.filter(**Signup.get_state_query_params(old_state))
+            signups = signups.filter(**cls.get_state_query_params(old_state))
         else:
             signups = filter_func(signups)
 
-        for signup in signups:
-            signup.state = new_state
-            signup.save()
-            signup.apply_state()
+        with transaction.atomic():
+            signup_ids = list(
+                cls.objects.filter(id__in=signups.order_by().values("id"), **cls.get_state_query_params(old_state))
+                .select_for_update()
+                .values_list("id", flat=True)
+            )
+            cls.objects.filter(id__in=signup_ids).update(**cls.get_state_transition_updates(old_state, new_state))
 
-        return signups
+            progress_key = cls.apply_state_many(signup_ids)
+
+        logger.info(f"Moved {len(signup_ids)} signups from {old_state} to {new_state}")
+        return signup_ids, progress_key
+
+    @staticmethod
+    def apply_state_many(signup_ids: list[int]) -> str:
+        """
+        Applies the state of each signup after commit, in the background in batches if background_tasks
+        is enabled. Returns a key for get_mass_state_change_progress.
+        """
+        from ..tasks import signups_apply_state
+
+        progress_key = MASS_STATE_CHANGE_PROGRESS_KEY_TEMPLATE.format(job_id=uuid4().hex)
+        cache.set(f"{progress_key}:total", len(signup_ids), MASS_STATE_CHANGE_PROGRESS_TIMEOUT_SECONDS)
+        cache.set(f"{progress_key}:done", 0, MASS_STATE_CHANGE_PROGRESS_TIMEOUT_SECONDS)
+
+        for i in range(0, len(signup_ids), MASS_STATE_CHANGE_BATCH_SIZE):
+            batch = signup_ids[i : i + MASS_STATE_CHANGE_BATCH_SIZE]
+            if "background_tasks" in settings.INSTALLED_APPS:
+                transaction.on_commit(partial(signups_apply_state.delay, batch, progress_key))  # type: ignore
+            else:
+                transaction.on_commit(partial(signups_apply_state, batch, progress_key))
+
+        return progress_key
+
+    @staticmethod
+    def get_mass_state_change_progress(progress_key: str) -> tuple[int, int]:
+        """
+        Returns (done, total). Both are 0 if the progress has expired.
+        """
+        return cache.get(f"{progress_key}:done", 0), cache.get(f"{progress_key}:total", 0)
 
     def apply_state(self):
         self.apply_state_sync()
@@ -493,40 +559,9 @@ class Signup(CsvExportMixin, SignupMixin, models.Model):
         self.apply_state_send_messages()
 
     def apply_state_group_membership(self):
-        from .job_category import JobCategory
-        from .personnel_class import PersonnelClass
-
-        groups_to_add = set()
-        groups_to_remove = set()
+        from ..group_membership import GroupMembershipReconciler
 
-        for group_suffix in SIGNUP_STATE_GROUPS:
-            should_belong_to_group = getattr(self, f"is_{group_suffix}")
-            group = self.event.labour_event_meta.get_group(group_suffix)
-
-            if should_belong_to_group:
-                groups_to_add.add(group)
-            else:
-                groups_to_remove.add(group)
-
-        for job_category in JobCategory.objects.filter(event=self.event):
-            should_belong_to_group = self.job_categories_accepted.filter(pk=job_category.pk).exists()
-            group = self.event.labour_event_meta.get_group(job_category.slug)
-
-            if should_belong_to_group:
-                groups_to_add.add(group)
-            else:
-                groups_to_remove.add(group)
-
-        for personnel_class in PersonnelClass.objects.filter(event=self.event, app_label="labour"):
-            should_belong_to_group = self.personnel_classes.filter(pk=personnel_class.pk).exists()
-            group = self.event.labour_event_meta.get_group(personnel_class.slug)
-
-            if should_belong_to_group:
-                groups_to_add.add(group)
-            else:
-                groups_to_remove.add(group)
-
-        ensure_user_group_membership(self.person.user, groups_to_add, groups_to_remove)
+        GroupMembershipReconciler.for_event(self.event).reconcile([self.person.user_id])
 
     def apply_state_email_aliases(self):
         if "access" not in settings.INSTALLED_APPS:
@@ -832,22 +867,75 @@ class Signup(CsvExportMixin, SignupMixin, models.Model):
 
         related = {Person: self.person}
 
-        signup_extra_model = self.signup_extra_model
-        if signup_extra_model:
-            related[signup_extra_model] = self.signup_extra
+        signup_extra = self.signup_extra
+        if signup_extra is not None:
+            related[type(signup_extra)] = signup_extra
 
         # XXX HACK jv-kortin numero
         if "labour_common_qualifications" in settings.INSTALLED_APPS:
             from labour_common_qualifications.models import JVKortti
 
-            try:
-                jv_kortti = JVKortti.objects.get(personqualification__person=self.person)
-                related[JVKortti] = jv_kortti
-            except JVKortti.DoesNotExist:
-                related[JVKortti] = None
+            related[JVKortti] = self._jv_kortti
 
         return related
 
+    @cached_property
+    def _jv_kortti(self):
+        from labour_common_qualifications.models import JVKortti
+
+        return JVKortti.objects.filter(personqualification__person=self.person).first()
+
+    @classmethod
+    def get_csv_queryset(cls, event, queryset, fields):
+        return queryset.select_related("person")
+
+    @classmethod
+    def prefetch_csv_related(cls, event, signups):
+        """
+        Loads the signup extras (and JV cards) of a chunk of signups in one query each
+        instead of one per signup.
+        """
+        from .signup_extras import SignupExtraBase
+
+        SignupExtra = event.labour_event_meta.signup_extra_model
+        if SignupExtra is not None:
+            if SignupExtra.schema_version >= SignupExtraBase.schema_version:
+                signup_extras = {
+                    signup_extra.person_id: signup_extra
+                    for signup_extra in SignupExtra.objects.filter(
+                        event=event,
+                        person_id__in=[signup.person_id for signup in signups],
+                    )
+                }
+
+                for signup in signups:
+                    signup_extra = signup_extras.get(signup.person_id)
+                    if signup_extra is None:
+                        signup_extra = SignupExtra(event=event, person=signup.person)
+                    signup.__dict__["signup_extra"] = signup_extra
+            else:
+                signup_extras = SignupExtra.objects.filter(signup__in=signups).in_bulk()
+
+                for signup in signups:
+                    signup_extra = signup_extras.get(signup.pk)
+                    if signup_extra is None:
+                        signup_extra = SignupExtra(signup=signup)
+                    signup.__dict__["signup_extra"] = signup_extra
+
+        # XXX HACK jv-kortin numero
+        if "labour_common_qualifications" in settings.INSTALLED_APPS:
+            from labour_common_qualifications.models import JVKortti
+
+            jv_kortit = {
+                jv_kortti.personqualification.person_id: jv_kortti
+                for jv_kortti in JVKortti.objects.filter(
+                    personqualification__person_id__in=[signup.person_id for signup in signups],
+                ).select_related("personqualification")
+            }
+
+            for signup in signups:
+                signup.__dict__["_jv_kortti"] = jv_kortit.get(signup.person_id)
+
     def as_dict(self):
         # XXX?
         signup_extra = self.signup_extra
@@ -0,0 +1,190 @@
+"""
+Requirement and allocation coverage of the roster of an event.
+
+The Roster API shows, for every job and job category, the number of workers required and allocated
+for each work hour of the event. RosterCoverage loads the requirements and shifts of the event in two
+queries and computes the per-hour arrays of every job in a single pass over them. Indexes of the
+arrays correspond to those of LabourEventMeta.work_hours, which is computed only once.
+
+Hours are mapped to indexes by arithmetic on the offset from the first work hour. Requirements and
+shift hours outside the work hours of the event, or not starting on a full hour, are not counted.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from dateutil.tz import tzlocal
+
+from core.utils import ONE_HOUR
+
+
+@dataclass
+class UnderstaffedPeriod:
+    """
+    A contiguous run of work hours of a job during which fewer workers are allocated than required.
+    """
+
+    job_category_id: int
+    job_id: int
+    start_time: datetime
+    end_time: datetime  # exclusive
+    max_missing: int
+    missing_hours: int  # sum over the hours of the period of the number of workers missing
+
+    def as_dict(self, jobs_by_id: dict):
+        tz = tzlocal()
+        job = jobs_by_id[self.job_id]
+
+        return dict(
+            jobCategory=job["job_category__slug"],
+            job=job["slug"],
+            title=job["title"],
+            startTime=self.start_time.astimezone(tz).isoformat(),
+            endTime=self.end_time.astimezone(tz).isoformat(),
+            maxMissing=self.max_missing,
+            missingHours=self.missing_hours,
+        )
+
+
+@dataclass
+class RosterCoverage:
+    work_hours: list[datetime]
+
+    # job id -> job category id, for jobs that have requirements or shifts
+    job_category_ids: dict[int, int] = field(default_factory=dict)
+
+    # job id -> number of workers required/allocated for each work hour
+    requirements_by_job: dict[int, list[int]] = field(default_factory=dict)
+    allocated_by_job: dict[int, list[int]] = field(default_factory=dict)
+
+    @property
+    def num_hours(self) -> int:
+        return len(self.work_hours)
+
+    def get_index(self, t: datetime) -> int | None:
+        """
+        Returns the index of the work hour t in work_hours (possibly out of range), or None if t is not on a full hour.
+        """
+        if not self.work_hours:
+            return None
+
+        index, remainder = divmod(t - self.work_hours[0], ONE_HOUR)
+        return None if remainder else index
+
+    def add_requirement(self, job_id: int, job_category_id: int, start_time: datetime, count: int):
+        index = self.get_index(start_time)
+        if index is None or not 0 <= index < self.num_hours:
+            return
+
+        self.job_category_ids[job_id] = job_category_id
+        requirements = self.requirements_by_job.setdefault(job_id, [0] * self.num_hours)
+        requirements[index] += count
+
+    def add_shift(self, job_id: int, job_category_id: int, start_time: datetime, hours: int):
+        index = self.get_index(start_time)
+        if index is None:
+            return
+
+        self.job_category_ids[job_id] = job_category_id
+        allocated = self.allocated_by_job.setdefault(job_id, [0] * self.num_hours)
+        for i in range(max(index, 0), min(index + hours, self.num_hours)):
+            allocated[i] += 1
+
+    @classmethod
+    def load(cls, event, job_category=None, job_ids: Iterable[int] | None = None) -> RosterCoverage:
+        """
+        Loads the coverage of every job of the event, or only of the given job category or jobs.
+        """
+        from .models.roster import JobRequirement, Shift
+
+        coverage = cls(work_hours=event.labour_event_meta.work_hours)
+
+        requirements = JobRequirement.objects.filter(job__job_category__event=event)
+        shifts = Shift.objects.filter(job__job_category__event=event)
+        if job_category is not None:
+            requirements = requirements.filter(job__job_category=job_category)
+            shifts = shifts.filter(job__job_category=job_category)
+        if job_ids is not None:
+            requirements = requirements.filter(job_id__in=job_ids)
+            shifts = shifts.filter(job_id__in=job_ids)
+
+        for job_id, job_category_id, start_time, count in requirements.values_list(
+            "job_id",
+            "job__job_category_id",
+            "start_time",
+            "count",
+        ):
+            coverage.add_requirement(job_id, job_category_id, start_time, count)
+
+        for job_id, job_category_id, start_time, hours in shifts.values_list(
+            "job_id",
+            "job__job_category_id",
+            "start_time",
+            "hours",
+        ):
+            coverage.add_shift(job_id, job_category_id, start_time, hours)
+
+        return coverage
+
+    def get_job_requirements(self, job_id: int) -> list[int]:
+        return list(self.requirements_by_job.get(job_id) or [0] * self.num_hours)
+
+    def get_job_allocated(self, job_id: int) -> list[int]:
+        return list(self.allocated_by_job.get(job_id) or [0] * self.num_hours)
+
+    def _sum_for_job_category(self, arrays_by_job: dict[int, list[int]], job_category_id: int) -> list[int]:
+        result = [0] * self.num_hours
+        for job_id, array in arrays_by_job.items():
+            if self.job_category_ids[job_id] == job_category_id:
+                for i, value in enumerate(array):
+                    result[i] += value
+        return result
+
+    def get_job_category_requirements(self, job_category_id: int) -> list[int]:
+        return self._sum_for_job_category(self.requirements_by_job, job_category_id)
+
+    def get_job_category_allocated(self, job_category_id: int) -> list[int]:
+        return self._sum_for_job_category(self.allocated_by_job, job_category_id)
+
+    def get_understaffed_periods(self, job_ids: Iterable[int] | None = None) -> list[UnderstaffedPeriod]:
+        """
+        Returns the periods during which jobs have fewer workers allocated than required,
+        ordered by job and start time.
+        """
+        if job_ids is None:
+            job_ids = self.requirements_by_job.keys()
+
+        periods = []
+        for job_id in sorted(job_ids):
+            requirements = self.requirements_by_job.get(job_id)
+            if not requirements:
+                continue
+
+            allocated = self.allocated_by_job.get(job_id) or [0] * self.num_hours
+            period = None
+
+            for i, (required, num_allocated) in enumerate(zip(requirements, allocated, strict=True)):
+                missing = required - num_allocated
+                if missing <= 0:
+                    period = None
+                    continue
+
+                if period is None:
+                    period = UnderstaffedPeriod(
+                        job_category_id=self.job_category_ids[job_id],
+                        job_id=job_id,
+                        start_time=self.work_hours[i],
+                        end_time=self.work_hours[i] + ONE_HOUR,
+                        max_missing=missing,
+                        missing_hours=missing,
+                    )
+                    periods.append(period)
+                else:
+                    period.end_time = self.work_hours[i] + ONE_HOUR
+                    period.max_missing = max(period.max_missing, missing)
+                    period.missing_hours += missing
+
+        return periods
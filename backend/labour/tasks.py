@@ -1,4 +1,10 @@
+import logging
+from contextlib import suppress
+
 from celery import shared_task
+from django.core.cache import cache
+
+logger = logging.getLogger("kompassi")
 
 
 @shared_task(ignore_result=True)
@@ -9,6 +15,48 @@ def signup_apply_state(signup_pk):
     signup._apply_state()
 
 
+@shared_task(ignore_result=True)
+def signups_apply_state(signup_ids: list[int], progress_key: str = ""):
+    from .group_membership import GroupMembershipReconciler
+    from .models import Signup
+
+    signups = list(Signup.objects.filter(id__in=signup_ids).select_related("event", "person__user"))
+
+    if progress_key and (num_missing := len(signup_ids) - len(signups)):
+        # signups deleted in the meantime count as done, lest the progress never complete
+        with suppress(ValueError):
+            cache.incr(f"{progress_key}:done", num_missing)
+
+    for signup in signups:
+        try:
+            signup.apply_state_sync()
+        except Exception:
+            # one bad signup must not keep the rest of the batch from being processed
+            logger.exception(f"Failed to apply state of signup {signup.pk}")
+
+    # group membership of the whole batch at once instead of per signup (see Signup._apply_state)
+    signups_by_event = {}
+    for signup in signups:
+        signups_by_event.setdefault(signup.event, []).append(signup)
+    for event, event_signups in signups_by_event.items():
+        try:
+            GroupMembershipReconciler.for_event(event).reconcile(signup.person.user_id for signup in event_signups)
+        except Exception:
+            logger.exception(f"Failed to reconcile labour groups of {event.slug}")
+
+    for signup in signups:
+        try:
+            signup.apply_state_email_aliases()
+            signup.apply_state_send_messages()
+        except Exception:
+            logger.exception(f"Failed to apply state of signup {signup.pk}")
+
+        if progress_key:
+            # ValueError if the progress has expired or been evicted
+            with suppress(ValueError):
+                cache.incr(f"{progress_key}:done")
+
+
 @shared_task(ignore_result=True)
 def labour_event_meta_create_groups(meta_pk):
     from .models import LabourEventMeta
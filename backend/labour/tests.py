@@ -1,12 +1,26 @@
-from io import BytesIO
+import csv
+import json
+from io import BytesIO, StringIO
 
 from django.test import TestCase
 
 from access.models import CBACEntry
-from core.csv_export import export_csv
+from core.csv_export import csv_response, export_csv
 from core.models import Person
+from core.utils import ONE_HOUR
 
-from .models import JobCategory, LabourEventMeta, Qualification, Signup
+from .group_membership import GroupMembershipReconciler
+from .models import (
+    Job,
+    JobCategory,
+    JobRequirement,
+    LabourEventMeta,
+    Qualification,
+    RosterChange,
+    Shift,
+    Signup,
+)
+from .roster_coverage import RosterCoverage
 
 
 class LabourEventAdminTest(TestCase):
@@ -61,6 +75,23 @@ class SignupTest(TestCase):
         assert not params["time_accepted__isnull"]
         assert params["time_finished__isnull"]
 
+    def test_mass_reject(self):
+        signup, unused = Signup.get_or_create_dummy()
+        assert signup.state == "new"
+
+        with self.captureOnCommitCallbacks(execute=True):
+            signup_ids, progress_key = Signup.mass_reject(Signup.objects.filter(id=signup.id))
+
+        assert signup_ids == [signup.id]
+        signup.refresh_from_db()
+        assert signup.state == "rejected"
+        assert signup.time_rejected is not None
+        assert Signup.get_mass_state_change_progress(progress_key) == (1, 1)
+
+        # already rejected signups are not touched again
+        signup_ids, progress_key = Signup.mass_reject(Signup.objects.filter(id=signup.id))
+        assert signup_ids == []
+
 
 class JobCategoryTestCase(TestCase):
     def test_group(self):
@@ -82,6 +113,194 @@ class JobCategoryTestCase(TestCase):
         assert rg.verbose_name == jc.name
 
 
+class GroupMembershipTestCase(TestCase):
+    def test_reconcile_group_membership(self):
+        signup, unused = Signup.get_or_create_dummy(accepted=True)
+        meta = signup.event.labour_event_meta
+        user = signup.person.user
+        job_category = signup.job_categories_accepted.get()
+
+        accepted_group = meta.get_group("accepted")
+        rejected_group = meta.get_group("rejected")
+        job_category_group = meta.get_group(job_category.slug)
+
+        assert set(user.groups.all()) >= {accepted_group, job_category_group}
+        assert rejected_group not in user.groups.all()
+
+        reconciler = GroupMembershipReconciler.for_event(signup.event)
+        assert reconciler.reconcile_all() == (0, 0)
+
+        # bypass apply_state as the mass operations do
+        Signup.objects.filter(id=signup.id).update(**Signup.get_state_transition_updates("accepted", "rejected"))
+        signup.job_categories_accepted.clear()
+
+        num_added, num_removed = reconciler.reconcile_all()
+        assert num_added == 1  # rejected
+        assert num_removed == 3  # applicants, accepted, job category
+
+        groups = set(user.groups.all())
+        assert rejected_group in groups
+        assert accepted_group not in groups
+        assert job_category_group not in groups
+
+
+class RosterCoverageTestCase(TestCase):
+    def test_roster_coverage(self):
+        signup, unused = Signup.get_or_create_dummy()
+        event = signup.event
+        jc, unused = JobCategory.get_or_create_dummy()
+        assert jc.event == event
+
+        job = Job.objects.create(job_category=jc, title="Dummy job")
+        t0 = event.labour_event_meta.work_hours[0]
+        for i in range(3):
+            JobRequirement.objects.create(job=job, start_time=t0 + i * ONE_HOUR, count=2)
+        Shift.objects.create(job=job, signup=signup, start_time=t0 + ONE_HOUR, hours=5)
+
+        coverage = RosterCoverage.load(event)
+
+        assert coverage.get_job_requirements(job.id)[:5] == [2, 2, 2, 0, 0]
+        assert coverage.get_job_allocated(job.id)[:7] == [0, 1, 1, 1, 1, 1, 0]
+        assert coverage.get_job_category_requirements(jc.id) == coverage.get_job_requirements(job.id)
+
+        (period,) = coverage.get_understaffed_periods()
+        assert period.job_id == job.id
+        assert period.start_time == t0
+        assert period.end_time == t0 + 3 * ONE_HOUR
+        assert period.max_missing == 2
+        assert period.missing_hours == 4
+
+        doc = jc.as_dict(include_jobs=True, include_requirements=True, include_shifts=True)
+        (job_doc,) = doc["jobs"]
+        assert job_doc["allocated"] == coverage.get_job_allocated(job.id)
+        assert job_doc["shifts"][0]["person"] == signup.person_id
+
+
+def login_as_labour_admin(client, event):
+    person, unused = Person.get_or_create_dummy(superuser=False)
+    event.labour_event_meta.admin_group.user_set.add(person.user)
+    CBACEntry.ensure_admin_group_privileges_for_event(event)
+    client.force_login(person.user)
+
+
+class RosterDeltaTestCase(TestCase):
+    def test_roster_api_delta(self):
+        signup, unused = Signup.get_or_create_dummy()
+        jc, unused = JobCategory.get_or_create_dummy()
+        t0 = signup.event.labour_event_meta.work_hours[0]
+
+        job = Job.objects.create(job_category=jc, title="Dummy job")
+        other_job = Job.objects.create(job_category=jc, title="Other job")
+        shift = Shift.objects.create(job=job, signup=signup, start_time=t0, hours=2)
+        RosterChange.record(jc, [RosterChange.for_shift(shift)])
+        since = jc.roster_version
+
+        changes = [RosterChange.for_shift(shift)]
+        shift.start_time = t0 + 3 * ONE_HOUR
+        shift.save()
+        changes.append(RosterChange.for_shift(shift))
+        RosterChange.record(jc, changes)
+
+        delta = jc.as_roster_api_delta(since)
+
+        assert delta["version"] == since + 1
+        assert [job_doc["slug"] for job_doc in delta["jobs"]] == [job.slug]
+        assert [shift_doc["id"] for shift_doc in delta["shifts"]] == [shift.id]
+        assert delta["deletedShifts"] == []
+        (job_slice,) = delta["slices"]
+        assert job_slice["start"] == 0
+        assert job_slice["allocated"] == [0, 0, 0, 1, 1]
+        assert [person["id"] for person in delta["people"]] == [signup.person_id]
+
+        change = RosterChange.for_job(other_job, deleted=True)
+        other_job.delete()
+        RosterChange.record(jc, [change])
+
+        delta = jc.as_roster_api_delta(since + 1)
+        assert delta["jobs"] == []
+        assert delta["deletedJobs"] == ["other-job"]
+
+        # unknown versions get the whole roster
+        assert "since" not in jc.as_roster_api_delta(jc.roster_version + 1)
+
+    def test_delete_job_with_shifts(self):
+        signup, unused = Signup.get_or_create_dummy()
+        jc, unused = JobCategory.get_or_create_dummy()
+        event = jc.event
+        t0 = event.labour_event_meta.work_hours[0]
+        job = Job.objects.create(job_category=jc, title="Dummy job")
+        shift = Shift.objects.create(job=job, signup=signup, start_time=t0, hours=2)
+        since = jc.roster_version
+
+        login_as_labour_admin(self.client, event)
+        response = self.client.delete(f"/api/v1/events/{event.slug}/jobcategories/{jc.slug}/jobs/{job.slug}")
+        assert response.status_code == 200
+        assert not Shift.objects.filter(id=shift.id).exists()
+
+        # the shifts deleted in cascade are reported, as are the hours of their people
+        jc.refresh_from_db()
+        delta = jc.as_roster_api_delta(since)
+        assert delta["deletedJobs"] == [job.slug]
+        assert delta["deletedShifts"] == [shift.id]
+        assert [person["id"] for person in delta["people"]] == [signup.person_id]
+
+
+class JobRequirementTestCase(TestCase):
+    def test_set_requirements(self):
+        jc, unused = JobCategory.get_or_create_dummy()
+        event = jc.event
+        t0 = event.labour_event_meta.work_hours[0]
+        job = Job.objects.create(job_category=jc, title="Dummy job")
+
+        JobRequirement.set_requirements(
+            event,
+            [
+                (job, t0 - ONE_HOUR, t0 + 2 * ONE_HOUR, 2),
+                (job, t0 + 2 * ONE_HOUR, t0 + 3 * ONE_HOUR, 3),
+            ],
+        )
+        changes = JobRequirement.set_requirements(event, [(job, t0 + ONE_HOUR, t0 + ONE_HOUR, 1)])
+
+        assert list(job.requirements.order_by("start_time").values_list("count", flat=True)) == [2, 1, 3, 3]
+        (change,) = changes
+        assert change.start_time == t0 + ONE_HOUR
+        assert change.end_time == t0 + 2 * ONE_HOUR
+
+    def test_set_many_job_requirements_view(self):
+        jc, unused = JobCategory.get_or_create_dummy()
+        event = jc.event
+        t0 = event.labour_event_meta.work_hours[0]
+        job = Job.objects.create(job_category=jc, title="Dummy job")
+        other_job = Job.objects.create(job_category=jc, title="Other job")
+        version = jc.roster_version
+
+        login_as_labour_admin(self.client, event)
+        response = self.client.post(
+            f"/api/v1/events/{event.slug}/jobcategories/{jc.slug}/requirements",
+            json.dumps(
+                dict(
+                    ranges=[
+                        dict(job=job.slug, startTime=t0.isoformat(), hours=2, required=2),
+                        dict(job=other_job.slug, startTime=(t0 + ONE_HOUR).isoformat(), hours=1, required=1),
+                    ]
+                )
+            ),
+            content_type="application/json",
+        )
+
+        assert response.status_code == 200, response.content
+        assert response.json()["version"] == version + 1
+        assert list(job.requirements.order_by("start_time").values_list("count", flat=True)) == [2, 2]
+        assert list(other_job.requirements.values_list("count", flat=True)) == [1]
+
+        response = self.client.post(
+            f"/api/v1/events/{event.slug}/jobcategories/{jc.slug}/requirements",
+            json.dumps(dict(ranges=[dict(job="no-such-job", startTime=t0.isoformat(), hours=1, required=1)])),
+            content_type="application/json",
+        )
+        assert response.status_code == 404
+
+
 class ExcelExportTestCase(TestCase):
     def test_labour_excel_export(self):
         signup, exists = Signup.get_or_create_dummy()
@@ -89,3 +308,28 @@ class ExcelExportTestCase(TestCase):
 
         with BytesIO() as output_file:
             export_csv(signup.event, Signup, signups, output_file, m2m_mode="separate_columns", dialect="xlsx")
+
+    def test_labour_csv_export_streams(self):
+        signup, exists = Signup.get_or_create_dummy()
+        job_category, unused = JobCategory.get_or_create_dummy()
+        signup.job_categories.set([job_category])
+        signups = Signup.objects.filter(id=signup.id)
+
+        SignupExtra = signup.event.labour_event_meta.signup_extra_model
+        SignupExtra.objects.update_or_create(
+            event=signup.event,
+            person=signup.person,
+            defaults=dict(is_active=False),
+        )
+
+        response = csv_response(signup.event, Signup, signups, filename="signups.csv", dialect="excel")
+
+        assert response.streaming
+        content = b"".join(response.streaming_content).decode("ISO-8859-15")
+        header, row = csv.reader(StringIO(content))
+        assert row[header.index(f"job_categories: {job_category}")] == "True"
+
+        # is_active of the signup extra comes after that of the signup and is read from the saved signup extra
+        signup_extra_is_active_index = len(header) - 1 - header[::-1].index("is_active")
+        assert header.index("is_active") < signup_extra_is_active_index
+        assert row[signup_extra_is_active_index] == "False"
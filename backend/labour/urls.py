@@ -18,7 +18,9 @@ from .views import (
     api_job_category_view,
     api_job_view,
     api_set_job_requirements_view,
+    api_set_many_job_requirements_view,
     api_shift_view,
+    api_understaffed_view,
     confirm_view,
     person_disqualify_view,
     person_qualification_view,
@@ -139,6 +141,11 @@ urlpatterns = [
         api_job_categories_view,
         name="api_job_categories_view",
     ),
+    re_path(
+        r"^api/v1/events/(?P<event_slug>[a-z0-9-]+)/understaffed/?$",
+        api_understaffed_view,
+        name="api_understaffed_view",
+    ),
     re_path(
         r"^api/v1/events/(?P<event_slug>[a-z0-9-]+)/jobcategories/(?P<job_category_slug>[a-z0-9-]+)/?$",
         api_job_category_view,
@@ -159,6 +166,11 @@ urlpatterns = [
         api_set_job_requirements_view,
         name="api_set_job_requirements_view",
     ),
+    re_path(
+        r"^api/v1/events/(?P<event_slug>[a-z0-9-]+)/jobcategories/(?P<job_category_slug>[a-z0-9-]+)/requirements/?$",
+        api_set_many_job_requirements_view,
+        name="api_set_many_job_requirements_view",
+    ),
     re_path(
         r"^api/v1/events/(?P<event_slug>[a-z0-9-]+)/jobcategories/(?P<job_category_slug>[a-z0-9-]+)/shifts/?$",
         api_shift_view,
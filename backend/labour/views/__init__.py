@@ -18,7 +18,9 @@ from .api_views import (
     api_job_category_view,
     api_job_view,
     api_set_job_requirements_view,
+    api_set_many_job_requirements_view,
     api_shift_view,
+    api_understaffed_view,
 )
 from .public_views import (
     confirm_view,
@@ -21,6 +21,9 @@ HTML_TEMPLATES = dict(
 )
 
 
+MASS_OPERATION_PROGRESS_SESSION_KEY = "labour.admin_signups_view.progress_key"
+
+
 MassOperationBase = namedtuple("MassOperation", "name modal_id text num_candidates")
 
 
@@ -108,17 +111,28 @@ def admin_signups_view(request, vars, event, format="screen"):
     if request.method == "POST" and not archive_mode:
         action = request.POST.get("action", None)
         if action == "reject":
-            SignupClass.mass_reject(signups)
+            signup_ids, progress_key = SignupClass.mass_reject(signups)
         elif action == "request_confirmation":
-            SignupClass.mass_request_confirmation(signups)
+            signup_ids, progress_key = SignupClass.mass_request_confirmation(signups)
         elif action == "send_shifts":
-            SignupClass.mass_send_shifts(signups)
+            signup_ids, progress_key = SignupClass.mass_send_shifts(signups)
         else:
             messages.error(request, "Ei semmosta toimintoa oo.")
+            return redirect("labour:admin_signups_view", event.slug)
+
+        request.session[MASS_OPERATION_PROGRESS_SESSION_KEY] = progress_key
+        messages.success(request, f"{len(signup_ids)} hakemuksen tila muutettu. Muutoksia käsitellään taustalla.")
 
         return redirect("labour:admin_signups_view", event.slug)
 
     elif format in HTML_TEMPLATES:
+        if progress_key := request.session.get(MASS_OPERATION_PROGRESS_SESSION_KEY):
+            done, total = SignupClass.get_mass_state_change_progress(progress_key)
+            if done < total:
+                messages.info(request, f"Hakemuksia käsitelty taustalla {done}/{total}.")
+            else:
+                del request.session[MASS_OPERATION_PROGRESS_SESSION_KEY]
+
         if archive_mode:
             num_would_mass_reject = 0
             num_would_mass_request_confirmation = 0
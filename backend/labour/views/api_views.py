@@ -2,11 +2,13 @@ import logging
 from datetime import timedelta
 
 from dateutil.parser import parse as parse_datetime
+from django.db import transaction
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django.views.decorators.http import require_POST, require_safe
 
 from api.utils import MethodNotAllowed, api_view
-from core.utils import full_hours_between
+from core.utils import ONE_HOUR
 
 from ..helpers import labour_admin_required
 from ..models import (
@@ -15,9 +17,12 @@ from ..models import (
     Job,
     JobCategory,
     JobRequirement,
+    RosterChange,
     SetJobRequirementsRequest,
+    SetManyJobRequirementsRequest,
     Shift,
 )
+from ..roster_coverage import RosterCoverage
 
 logger = logging.getLogger("kompassi")
 
@@ -26,22 +31,63 @@ logger = logging.getLogger("kompassi")
 @require_safe
 @api_view
 def api_job_categories_view(request, vars, event):
-    return [jc.as_dict(include_requirements=True) for jc in JobCategory.objects.filter(event=event, app_label="labour")]
+    coverage = RosterCoverage.load(event)
+    return [
+        jc.as_dict(include_requirements=True, coverage=coverage)
+        for jc in JobCategory.objects.filter(event=event, app_label="labour")
+    ]
+
+
+@labour_admin_required
+@require_safe
+@api_view
+def api_understaffed_view(request, vars, event):
+    """
+    Lists the periods during which jobs have fewer workers allocated than required.
+    """
+    coverage = RosterCoverage.load(event)
+    jobs_by_id = {
+        job["id"]: job
+        for job in Job.objects.filter(job_category__event=event).values("id", "slug", "title", "job_category__slug")
+    }
+    return [period.as_dict(jobs_by_id) for period in coverage.get_understaffed_periods()]
+
+
+def get_since(request) -> int | None:
+    """
+    Roster API clients that have the roster as of some version may pass it as ?since=<version>
+    to only receive what has changed since (see JobCategory.as_roster_api_delta).
+    """
+    since = request.GET.get("since")
+    return int(since) if since is not None else None
+
+
+def roster_response(request, job_category):
+    since = get_since(request)
+    if since is None:
+        return job_category.as_roster_api_dict()
+
+    return job_category.as_roster_api_delta(since)
+
+
+def get_requirement_range(job, body):
+    start_time = parse_datetime(body.startTime)
+    end_time = start_time + timedelta(hours=body.hours - 1)  # -1 due to end parameter being inclusive
+
+    return job, start_time, end_time, body.required
 
 
 @labour_admin_required
 @require_safe
 @api_view
 def api_job_category_view(request, vars, event, job_category_slug):
-    return get_object_or_404(JobCategory, event=event, slug=job_category_slug).as_dict(
-        include_jobs=True,
-        include_shifts=True,
-        include_people=True,
-    )
+    job_category = get_object_or_404(JobCategory, event=event, slug=job_category_slug)
+    return roster_response(request, job_category)
 
 
 @labour_admin_required
 @api_view
+@transaction.atomic
 def api_job_view(request, vars, event, job_category_slug, job_slug=None):
     job_category = get_object_or_404(JobCategory, event=event, slug=job_category_slug)
 
@@ -53,68 +99,110 @@ def api_job_view(request, vars, event, job_category_slug, job_slug=None):
         job = get_object_or_404(Job, job_category=job_category, slug=job_slug)
     elif request.method == "DELETE" and job_slug is not None:
         job = get_object_or_404(Job, job_category=job_category, slug=job_slug)
+        # the shifts of the job are deleted in cascade, and clients need to drop them and recount hours
+        changes = [RosterChange.for_shift(shift, deleted=True) for shift in job.shifts.all()]
+        changes.append(RosterChange.for_job(job, deleted=True))
         job.delete()
-        return job_category.as_roster_api_dict()
+        RosterChange.record(job_category, changes)
+        return roster_response(request, job_category)
     else:
         raise MethodNotAllowed(request.method)
 
+    created = job.pk is None
     job.title = body.title
     job.save()
 
-    return job_category.as_roster_api_dict()
+    if created:
+        meta = event.labour_event_meta
+        change = RosterChange.for_job(job, start_time=meta.work_begins, end_time=meta.work_ends + ONE_HOUR)
+    else:
+        change = RosterChange.for_job(job)
+    RosterChange.record(job_category, [change])
+
+    return roster_response(request, job_category)
 
 
 @labour_admin_required
 @api_view
+@transaction.atomic
 def api_shift_view(request, vars, event, job_category_slug, shift_id=None):
     job_category = get_object_or_404(JobCategory, event=event, slug=job_category_slug)
 
     if request.method == "POST" and shift_id is None:
         shift = Shift()
         edit_shift_request = EditShiftRequest.from_json(request.body)
+        changes = []
     elif request.method == "PUT" and shift_id is not None:
         shift = get_object_or_404(Shift, id=int(shift_id), job__job_category=job_category)
         edit_shift_request = EditShiftRequest.from_json(request.body)
+        # the hours and person the shift is moved away from are affected, too
+        changes = [RosterChange.for_shift(shift)]
     elif request.method == "DELETE" and shift_id is not None:
         shift = get_object_or_404(Shift, id=int(shift_id), job__job_category=job_category)
+        change = RosterChange.for_shift(shift, deleted=True)
         shift.delete()
-        return job_category.as_roster_api_dict()
+        RosterChange.record(job_category, [change])
+        return roster_response(request, job_category)
     else:
         raise MethodNotAllowed(request.method)
 
     edit_shift_request.update(job_category, shift)
     shift.save()
 
-    return job_category.as_roster_api_dict()
+    changes.append(RosterChange.for_shift(shift))
+    RosterChange.record(job_category, changes)
+
+    return roster_response(request, job_category)
 
 
 @labour_admin_required
 @require_POST
 @api_view
+@transaction.atomic
 def api_set_job_requirements_view(request, vars, event, job_category_slug, job_slug):
     job_category = get_object_or_404(JobCategory, event=event, slug=job_category_slug)
     job = get_object_or_404(Job, job_category=job_category, slug=job_slug)
 
     body = SetJobRequirementsRequest.from_json(request.body)
 
-    start_time = parse_datetime(body.startTime)
-    end_time = start_time + timedelta(hours=body.hours - 1)  # -1 due to end parameter being inclusive
+    changes = JobRequirement.set_requirements(event, [get_requirement_range(job, body)])
+    RosterChange.record(job_category, changes)
+
+    # Successful result emulates that of /api/v1/events/tracon11/jobcategories/conitea
+    return roster_response(request, job_category)
 
-    start_time = max(start_time, event.labour_event_meta.work_begins)
-    end_time = min(end_time, event.labour_event_meta.work_ends)
 
-    for hour in full_hours_between(start_time, end_time):  # start/end inclusive
-        requirement, created = JobRequirement.objects.get_or_create(
-            job=job,
-            start_time=hour,
-            defaults=dict(
-                count=body.required,
-            ),
+@labour_admin_required
+@require_POST
+@api_view
+@transaction.atomic
+def api_set_many_job_requirements_view(request, vars, event, job_category_slug):
+    """
+    Like api_set_job_requirements_view, but takes many ranges, possibly of different jobs of the job category,
+    and records them as a single change.
+    """
+    job_category = get_object_or_404(JobCategory, event=event, slug=job_category_slug)
+
+    body = SetManyJobRequirementsRequest.from_json(request.body)
+
+    # NOTE: not in_bulk(field_name="slug"), as the slug of a job is only unique within its job category
+    jobs_by_slug = {
+        job.slug: job
+        for job in Job.objects.filter(
+            job_category=job_category,
+            slug__in={requirement_range["job"] for requirement_range in body.ranges},
         )
+    }
 
-        if not created:
-            requirement.count = body.required
-            requirement.save()
+    requirement_ranges = []
+    for requirement_range in body.ranges:
+        job = jobs_by_slug.get(requirement_range["job"])
+        if job is None:
+            raise Http404(requirement_range["job"])
 
-    # Successful result emulates that of /api/v1/events/tracon11/jobcategories/conitea
-    return job_category.as_roster_api_dict()
+        requirement_ranges.append(get_requirement_range(job, SetJobRequirementsRequest.from_dict(requirement_range)))
+
+    changes = JobRequirement.set_requirements(event, requirement_ranges)
+    RosterChange.record(job_category, changes)
+
+    return roster_response(request, job_category)
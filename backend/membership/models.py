@@ -154,6 +154,10 @@ class Membership(models.Model, CsvExportMixin):
             Person: self.person,
         }
 
+    @classmethod
+    def get_csv_queryset(cls, unused_organization, queryset, fields):
+        return queryset.select_related("person")
+
     def get_previous_and_next(self):
         if not self.pk:
             return None, None
@@ -1,14 +1,26 @@
 from django.contrib import admin
 
-from .models import CheckoutPayment, PaymentsOrganizationMeta
+from .models import CheckoutCallback, CheckoutPayment, PaymentsOrganizationMeta
 
 
 class InlinePaymentsOrganizationMetaAdmin(admin.StackedInline):
     model = PaymentsOrganizationMeta
 
 
+class InlineCheckoutCallbackAdmin(admin.TabularInline):
+    model = CheckoutCallback
+    extra = 0
+    can_delete = False
+    readonly_fields = ("status", "received_at", "processed_at", "params")
+
+    def has_add_permission(self, *args, **kwargs):
+        return False
+
+
 @admin.register(CheckoutPayment)
 class CheckoutPaymentAdmin(admin.ModelAdmin):
+    inlines = (InlineCheckoutCallbackAdmin,)
+
     def has_delete_permission(self, *args, **kwargs):
         return False
 
@@ -0,0 +1,46 @@
+# Generated by Django 5.0.2 on 2026-10-18 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("payments", "0010_alter_checkoutpayment_customer_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CheckoutCallback",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("new", "New"),
+                            ("ok", "OK"),
+                            ("fail", "Failed"),
+                            ("pending", "Pending"),
+                            ("delayed", "Delayed"),
+                        ],
+                        max_length=7,
+                    ),
+                ),
+                ("params", models.JSONField(help_text="Signed query string parameters as received")),
+                ("received_at", models.DateTimeField(auto_now_add=True)),
+                ("processed_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "payment",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="callbacks",
+                        to="payments.checkoutpayment",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("payment", "status")},
+            },
+        ),
+    ]
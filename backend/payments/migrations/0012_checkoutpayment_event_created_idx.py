@@ -0,0 +1,16 @@
+# Generated by Django 5.0.2 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("payments", "0011_checkoutcallback"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="checkoutpayment",
+            index=models.Index(fields=["event", "created_at"], name="payments_cp_event_created_idx"),
+        ),
+    ]
@@ -1,3 +1,4 @@
+from .checkout_callback import CheckoutCallback
 from .checkout_payment import CheckoutPayment
 from .legacy_payment import Payment
 from .payments_organization_meta import PaymentsOrganizationMeta
@@ -0,0 +1,83 @@
+import logging
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+from .checkout_payment import CHECKOUT_STATUSES, CheckoutPayment
+
+logger = logging.getLogger("kompassi")
+
+
+class CheckoutCallback(models.Model):
+    """
+    Paytrail (Checkout) delivers the outcome of a payment both via the redirect of the customer and via
+    a server-to-server callback, possibly concurrently and possibly more than once. Each distinct
+    (payment, status) is recorded here once and processed exactly once, either by a background worker
+    (callbacks) or by the redirect view, whichever gets to it first.
+    """
+
+    payment = models.ForeignKey(CheckoutPayment, on_delete=models.CASCADE, related_name="callbacks")
+    status = models.CharField(
+        choices=CHECKOUT_STATUSES,
+        max_length=max(len(status) for (status, _) in CHECKOUT_STATUSES),
+    )
+    params = models.JSONField(help_text="Signed query string parameters as received")
+
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = [("payment", "status")]
+
+    def __str__(self):
+        return f"{self.payment_id} {self.status}"  # type: ignore
+
+    @classmethod
+    def record(cls, payment: CheckoutPayment, params) -> "CheckoutCallback":
+        """
+        Records the redirect or callback if this (payment, status) was not seen before.
+
+        :param params: Query string params from Checkout, signature already verified
+        """
+        callback, created = cls.objects.get_or_create(
+            payment=payment,
+            status=params["checkout-status"],
+            defaults=dict(params=dict(params.items())),
+        )
+        if not created:
+            logger.debug(f"Checkout: duplicate {callback.status} for {payment.stamp}")
+
+        return callback
+
+    def enqueue(self):
+        if self.processed_at is not None:
+            return
+
+        if "background_tasks" in settings.INSTALLED_APPS:
+            from ..tasks import payments_process_checkout_callback
+
+            callback_id = self.pk
+            transaction.on_commit(lambda: payments_process_checkout_callback.delay(callback_id))  # type: ignore
+        else:
+            self.process()
+
+    @transaction.atomic
+    def process(self) -> CheckoutPayment:
+        """
+        Processes the callback unless it has already been processed. Safe to call concurrently:
+        the payment and the callback are locked, so callbacks of the same payment are processed one at a time.
+        Returns the payment in its current state.
+        """
+        payment = CheckoutPayment.objects.select_for_update().get(stamp=self.payment_id)  # type: ignore
+        callback = CheckoutCallback.objects.select_for_update().get(pk=self.pk)
+
+        if callback.processed_at is None:
+            payment.process_checkout_response(callback.params)
+            callback.processed_at = timezone.now()
+            callback.save(update_fields=["processed_at"])
+        else:
+            logger.debug(f"Checkout: {callback.status} for {payment.stamp} already processed")
+
+        self.processed_at = callback.processed_at
+        return payment
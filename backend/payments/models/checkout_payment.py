@@ -1,7 +1,7 @@
 import json
 import logging
 from dataclasses import dataclass
-from datetime import date
+from datetime import date, datetime
 from functools import cached_property
 from uuid import uuid4
 
@@ -24,6 +24,7 @@ logger = logging.getLogger("kompassi")
 
 CHECKOUT_API_BASE_URL = "https://api.checkout.fi"
 CHECKOUT_PAYMENT_WALL_ORIGIN = "pay.checkout.fi"
+PAYMENTS_BUCKET_SECONDS = 5 * 60
 CHECKOUT_STATUSES = [
     ("new", _("New")),
     ("ok", _("OK")),
@@ -43,6 +44,12 @@ class PaymentsByPaymentMethod:
     num_fail: int = 0
     num_delayed: int = 0
 
+    # set for rows of get_payments_by_payment_method_over_time
+    bucket: datetime | None = None
+
+    QUERY = resource_string(__name__, "queries/payments_by_payment_method.sql").decode("utf-8")
+    OVER_TIME_QUERY = resource_string(__name__, "queries/payments_by_payment_method_over_time.sql").decode("utf-8")
+
     @property
     def num_total(self):
         return self.num_new + self.num_ok + self.num_pending + self.num_fail + self.num_delayed
@@ -113,6 +120,10 @@ class CheckoutPayment(models.Model):
 
     class Meta:
         ordering = ("-created_at",)
+        indexes = [
+            # supports get_payments_by_payment_method_over_time
+            models.Index(fields=["event", "created_at"], name="payments_cp_event_created_idx"),
+        ]
 
     def save(self, *args, **kwargs):
         if self.event:
@@ -288,13 +299,23 @@ class CheckoutPayment(models.Model):
                     actual_value,
                 )
 
-        self.status = response["checkout-status"]
+        status = response["checkout-status"]
+        if self.status == "ok" and status != "ok":
+            # callbacks may be processed out of order; an interim status must not undo a completed payment
+            logger.warning(f"Ignoring status {status} for payment of stamp {self.stamp} that is already ok")
+            return
+
+        self.status = status
         self.provider = response["checkout-provider"]
         self.save()
 
-        if self.tickets_order:
-            if self.status == "ok" and not self.tickets_order.is_paid:
-                self.tickets_order.confirm_payment()
+        if order := self.tickets_order:
+            if self.status == "ok" and not order.is_paid:
+                if order.is_cancelled:
+                    # eg. cancelled as unpaid while the customer was paying; refunding is up to the admins
+                    logger.warning(f"Payment of stamp {self.stamp} completed for cancelled order {order.pk}")
+                else:
+                    order.confirm_payment()
         elif self.membership_fee_payment and self.status == "ok" and not self.membership_fee_payment.is_paid:
             self.membership_fee_payment.confirm_payment(payment_method="checkout")
 
@@ -336,37 +357,38 @@ class CheckoutPayment(models.Model):
             raise NotImplementedError(f"Received payment without handler: {self.stamp}")
 
     @classmethod
-    def get_payments_by_payment_method(cls, event):
-        results: dict[str, PaymentsByPaymentMethod] = dict()
-
-        for payment in cls.objects.filter(event=event):
-            result = results.setdefault(payment.provider, PaymentsByPaymentMethod(provider=payment.provider))
-
-            if payment.status == "new":
-                result.num_new += 1
-            elif payment.status == "ok":
-                result.num_ok += 1
-            elif payment.status == "pending":
-                result.num_pending += 1
-            elif payment.status == "fail":
-                result.num_fail += 1
-            elif payment.status == "delayed":
-                result.num_delayed += 1
-            else:
-                raise NotImplementedError(payment.status)
-
-        total_row = PaymentsByPaymentMethod(provider="Total")
-        for result in results.values():
-            total_row.num_new += result.num_new
-            total_row.num_ok += result.num_ok
-            total_row.num_pending += result.num_pending
-            total_row.num_fail += result.num_fail
-            total_row.num_delayed += result.num_delayed
-
-        results_sorted = sorted(results.values(), key=lambda result: result.num_total, reverse=True)
-        results_sorted.append(total_row)
-
-        return results_sorted
+    def get_payments_by_payment_method(cls, event) -> list[PaymentsByPaymentMethod]:
+        """
+        Returns payment methods ordered by the number of payments, followed by a total row.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(PaymentsByPaymentMethod.QUERY, [event.id])
+            # the rollup row is present even if there are no payments
+            return [
+                PaymentsByPaymentMethod("Total" if is_total else provider, *counts)
+                for (is_total, provider, *counts) in cursor.fetchall()
+            ]
+
+    @classmethod
+    def get_payments_by_payment_method_over_time(
+        cls,
+        event,
+        since: datetime,
+        bucket_seconds: int = PAYMENTS_BUCKET_SECONDS,
+    ) -> list[PaymentsByPaymentMethod]:
+        """
+        Returns payments created since the given time per payment method per time bucket.
+        Only the requested time range is read, so this is cheap enough to poll during a sale.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                PaymentsByPaymentMethod.OVER_TIME_QUERY,
+                dict(event_id=event.id, since=since, bucket_seconds=bucket_seconds),
+            )
+            return [
+                PaymentsByPaymentMethod(provider, *counts, bucket=bucket)
+                for (bucket, provider, *counts) in cursor.fetchall()
+            ]
 
     @classmethod
     def get_orders_by_payment_status(cls, event):
@@ -0,0 +1,18 @@
+select
+  grouping(provider) = 1 as is_total,
+  provider,
+  count(*) filter (where status = 'new') as num_new,
+  count(*) filter (where status = 'ok') as num_ok,
+  count(*) filter (where status = 'pending') as num_pending,
+  count(*) filter (where status = 'fail') as num_fail,
+  count(*) filter (where status = 'delayed') as num_delayed
+from
+  payments_checkoutpayment
+where
+  event_id = %s
+group by
+  rollup (provider)
+order by
+  grouping(provider),
+  count(*) desc,
+  provider
@@ -0,0 +1,20 @@
+-- uses payments_cp_event_created_idx to only read the requested time range
+select
+  to_timestamp(floor(extract(epoch from created_at) / %(bucket_seconds)s) * %(bucket_seconds)s) as bucket,
+  provider,
+  count(*) filter (where status = 'new') as num_new,
+  count(*) filter (where status = 'ok') as num_ok,
+  count(*) filter (where status = 'pending') as num_pending,
+  count(*) filter (where status = 'fail') as num_fail,
+  count(*) filter (where status = 'delayed') as num_delayed
+from
+  payments_checkoutpayment
+where
+  event_id = %(event_id)s
+  and created_at >= %(since)s
+group by
+  bucket,
+  provider
+order by
+  bucket,
+  provider
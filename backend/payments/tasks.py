@@ -0,0 +1,8 @@
+from celery import shared_task
+
+
+@shared_task(ignore_result=True)
+def payments_process_checkout_callback(callback_id: int):
+    from .models import CheckoutCallback
+
+    CheckoutCallback.objects.get(pk=callback_id).process()
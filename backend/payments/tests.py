@@ -1,7 +1,13 @@
 import json
+from datetime import timedelta
+from unittest import mock
 
 from django.test import TestCase
+from django.utils.timezone import now
 
+from tickets.models import Order
+
+from .models import CheckoutCallback, CheckoutPayment, PaymentsOrganizationMeta
 from .utils import calculate_hmac
 
 
@@ -47,3 +53,63 @@ class HMACTestCase(TestCase):
         assert (
             calculate_hmac(secret, headers, body) == "3708f6497ae7cc55a2e6009fc90aa10c3ad0ef125260ee91b19168750f6d74f6"
         )
+
+
+class CheckoutCallbackTestCase(TestCase):
+    def test_process_once(self):
+        order, unused = Order.get_or_create_dummy()
+        order.confirm_order()
+        PaymentsOrganizationMeta.get_or_create_dummy(order.event.organization)
+
+        payment = CheckoutPayment.from_order(order)
+        payment.save()
+
+        params = {
+            "checkout-account": "375917",
+            "checkout-algorithm": "sha256",
+            "checkout-amount": str(payment.price_cents),
+            "checkout-stamp": str(payment.stamp),
+            "checkout-reference": payment.reference,
+            "checkout-transaction-id": "",
+            "checkout-status": "ok",
+            "checkout-provider": "nordea",
+        }
+
+        # redirect and callback for the same status are recorded once
+        callback = CheckoutCallback.record(payment, params)
+        assert CheckoutCallback.record(payment, params).pk == callback.pk
+
+        with mock.patch.object(Order, "confirm_payment", autospec=True) as confirm_payment:
+            callback.process()
+            payment = CheckoutCallback.record(payment, params).process()
+
+        confirm_payment.assert_called_once()
+        assert payment.status == "ok"
+
+        # an interim status processed late does not undo the payment
+        payment = CheckoutCallback.record(payment, dict(params, **{"checkout-status": "pending"})).process()
+        assert payment.status == "ok"
+
+
+class PaymentsByPaymentMethodTestCase(TestCase):
+    def test_get_payments_by_payment_method(self):
+        order, unused = Order.get_or_create_dummy()
+        order.confirm_order()
+        event = order.event
+
+        for provider, status in [("nordea", "ok"), ("nordea", "fail"), ("op", "ok"), ("nordea", "ok")]:
+            payment = CheckoutPayment.from_order(order)
+            payment.provider = provider
+            payment.status = status
+            payment.save()
+
+        rows = CheckoutPayment.get_payments_by_payment_method(event)
+        assert [(row.provider, row.num_ok, row.num_fail, row.num_total) for row in rows] == [
+            ("nordea", 2, 1, 3),
+            ("op", 1, 0, 1),
+            ("Total", 3, 1, 4),
+        ]
+
+        rows = CheckoutPayment.get_payments_by_payment_method_over_time(event, since=now() - timedelta(hours=1))
+        assert sum(row.num_total for row in rows) == 4
+        assert all(row.bucket is not None for row in rows)
@@ -5,16 +5,32 @@ from django.http import HttpResponse
 from django.utils.translation import gettext_lazy as _
 
 from .helpers import valid_signature_required
+from .models import CheckoutCallback
 
 logger = logging.getLogger("kompassi")
 
 
+def process_checkout_redirect(request, payment):
+    """
+    The customer is waiting, so process the redirect right away unless the callback already did.
+    """
+    return CheckoutCallback.record(payment, request.GET).process()
+
+
+def enqueue_checkout_callback(request, payment):
+    """
+    Acknowledge callbacks immediately and process them in the background.
+    """
+    CheckoutCallback.record(payment, request.GET).enqueue()
+    return HttpResponse("")
+
+
 @valid_signature_required
 def payments_checkout_success_view(request, payment):
     """
     https://checkoutfinland.github.io/psp-api/#/?id=redirect-and-callback-url-parameters
     """
-    payment.process_checkout_response(request.GET)
+    payment = process_checkout_redirect(request, payment)
 
     if payment.status == "ok":
         messages.success(request, _("Payment successful. Thank you for your order!"))
@@ -37,7 +53,7 @@ def payments_checkout_success_view(request, payment):
 
 @valid_signature_required
 def payments_checkout_cancel_view(request, payment):
-    payment.process_checkout_response(request.GET)
+    payment = process_checkout_redirect(request, payment)
 
     messages.error(request, _("The payment was not completed. Please try again."))
     return payment.get_redirect()
@@ -45,11 +61,9 @@ def payments_checkout_cancel_view(request, payment):
 
 @valid_signature_required
 def payments_checkout_success_callback(request, payment):
-    payment.process_checkout_response(request.GET)
-    return HttpResponse("")
+    return enqueue_checkout_callback(request, payment)
 
 
 @valid_signature_required
 def payments_checkout_cancel_callback(request, payment):
-    payment.process_checkout_response(request.GET)
-    return HttpResponse("")
+    return enqueue_checkout_callback(request, payment)
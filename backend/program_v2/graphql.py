@@ -123,19 +123,7 @@ class ProgramV2EventMetaType(DjangoObjectType):
         info,
         filters: list[DimensionFilterInput] | None = None,
     ):
-        if filters is None:
-            filters = []
-
-        queryset = Program.objects.filter(event=meta.event)
-
-        if filters:
-            for filter in filters:
-                queryset = queryset.filter(
-                    dimensions__dimension__slug=filter.dimension,
-                    dimensions__value__slug__in=filter.values,
-                )
-
-        return queryset
+        return DimensionFilterInput.filter_cached_dimensions(Program.objects.filter(event=meta.event), filters)
 
     dimensions = graphene.List(graphene.NonNull(DimensionType))
 
@@ -15,20 +15,42 @@ def program_dimension_value_pre_save(sender, instance: ProgramDimensionValue, **
         raise ValidationError({"dimension": "Dimension value does not belong to the dimension"})
 
 
-@receiver([post_save, post_delete], sender=Dimension)
-@receiver([post_save, post_delete], sender=DimensionValue)
-def dimension_post_save(sender, instance: Dimension | DimensionValue, **kwargs):
+@receiver(post_save, sender=Dimension)
+@receiver(post_save, sender=DimensionValue)
+def dimension_post_save(sender, instance: Dimension | DimensionValue, created: bool, **kwargs):
+    # Only slugs end up in cached_dimensions, so eg. editing titles does not need to touch programs.
+    # A new dimension needs to be added to every program, but a new value has not been assigned yet.
+    if getattr(instance, "_slug_changed", True) and (sender is Dimension or not created):
+        Program.refresh_cached_dimensions(instance.event.programs.all())
+
+
+@receiver(post_delete, sender=Dimension)
+@receiver(post_delete, sender=DimensionValue)
+def dimension_post_delete(sender, instance: Dimension | DimensionValue, **kwargs):
     Program.refresh_cached_dimensions(instance.event.programs.all())
 
 
 @receiver([post_save, post_delete], sender=ProgramDimensionValue)
 def program_dimension_value_post_save(sender, instance: ProgramDimensionValue, **kwargs):
+    # Deleting a dimension, value or program deletes its dimension values in cascade.
+    # Programs are then refreshed all at once in dimension_post_delete (or not needed at all).
+    if isinstance(kwargs.get("origin"), Dimension | DimensionValue | Program):
+        return
+
     program = instance.program
     program.cached_dimensions = program._dimensions
     program.save(update_fields=["cached_dimensions"])
 
 
-@receiver(pre_save, sender=(Dimension, DimensionValue))
+# NOTE: one receiver per sender, as a tuple of senders matches none of them
+@receiver(pre_save, sender=Dimension)
+@receiver(pre_save, sender=DimensionValue)
 def dimension_pre_save(sender, instance: Dimension | DimensionValue, **kwargs):
     if instance.slug is None:
         instance.slug = slugify(instance.title.en or instance.title.fi)
+
+    if instance.pk is None:
+        instance._slug_changed = True
+    else:
+        old_slug = sender.objects.filter(pk=instance.pk).values_list("slug", flat=True).first()
+        instance._slug_changed = old_slug != instance.slug
@@ -4,7 +4,9 @@ from typing import TYPE_CHECKING, Any, Optional
 
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.db import models, transaction
+from django.contrib.postgres.indexes import GinIndex
+from django.db import connection, models, transaction
+from pkg_resources import resource_string
 
 from core.models import Event
 from core.utils import log_delete, log_get_or_create, validate_slug
@@ -14,6 +16,7 @@ if TYPE_CHECKING:
 
 
 logger = logging.getLogger("kompassi")
+REFRESH_CACHED_DIMENSIONS_QUERY = resource_string(__name__, "queries/refresh_cached_dimensions.sql").decode("utf-8")
 
 
 class Program(models.Model):
@@ -35,6 +38,14 @@ class Program(models.Model):
 
     class Meta:
         unique_together = ("event", "slug")
+        indexes = [
+            # supports DimensionFilterInput.filter_cached_dimensions
+            GinIndex(
+                fields=["cached_dimensions"],
+                opclasses=["jsonb_path_ops"],
+                name="program_v2_cached_dims_gin",
+            ),
+        ]
 
     def __str__(self):
         return str(self.title)
@@ -52,17 +63,18 @@ class Program(models.Model):
         return dimensions
 
     @classmethod
-    def refresh_cached_dimensions(cls, queryset: models.QuerySet["Program"]):
-        for program in (
-            queryset.select_for_update(of=("self",))
-            .only("id", "cached_dimensions")
-            .prefetch_related(
-                "dimensions__dimension__slug",
-                "dimensions__value__slug",
-            )
-        ):
-            program.cached_dimensions = program._dimensions
-            program.save(update_fields=["cached_dimensions"])
+    def refresh_cached_dimensions(cls, queryset: models.QuerySet["Program"]) -> int:
+        """
+        Recomputes cached_dimensions of the programs in a single UPDATE. Programs whose
+        cached_dimensions would not change are not written. Returns the number of programs updated.
+        """
+        program_ids = list(queryset.order_by().values_list("id", flat=True))
+        if not program_ids:
+            return 0
+
+        with connection.cursor() as cursor:
+            cursor.execute(REFRESH_CACHED_DIMENSIONS_QUERY, dict(program_ids=program_ids))
+            return cursor.rowcount
 
     @staticmethod
     def create_from_form_data(
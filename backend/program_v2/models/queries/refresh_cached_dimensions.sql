@@ -0,0 +1,38 @@
+-- Recomputes Program.cached_dimensions (dimension slug -> list of value slugs) of the given programs
+-- from ProgramDimensionValues. Every dimension of the event is present, with an empty list if the
+-- program has no values for it. Rows whose cached_dimensions would not change are not written.
+with values_by_dimension as (
+  select
+    program.id as program_id,
+    dimension.slug as dimension_slug,
+    coalesce(jsonb_agg(dv.slug order by pdv.id) filter (where dv.slug is not null), '[]'::jsonb) as value_slugs
+  from
+    program_v2_program program
+    join program_v2_dimension dimension on dimension.event_id = program.event_id
+    left join program_v2_programdimensionvalue pdv on pdv.program_id = program.id and pdv.dimension_id = dimension.id
+    left join program_v2_dimensionvalue dv on dv.id = pdv.value_id
+  where
+    program.id = any(%(program_ids)s::integer[])
+  group by
+    program.id,
+    dimension.slug
+),
+
+new_cached_dimensions as (
+  select
+    target.id as program_id,
+    coalesce(jsonb_object_agg(vbd.dimension_slug, vbd.value_slugs) filter (where vbd.dimension_slug is not null), '{}'::jsonb) as cached_dimensions
+  from
+    unnest(%(program_ids)s::integer[]) as target(id)
+    left join values_by_dimension vbd on vbd.program_id = target.id
+  group by
+    target.id
+)
+
+update program_v2_program program
+set cached_dimensions = ncd.cached_dimensions
+from new_cached_dimensions ncd
+where
+  program.id = ncd.program_id
+  and program.cached_dimensions is distinct from ncd.cached_dimensions
+returning program.id;
@@ -1,3 +1,5 @@
+from unittest import mock
+
 import pytest
 
 from core.models import Event
@@ -58,3 +60,21 @@ def test_program_from_form_data():
         this_field_should_be_in="other_fields",
         also_this_field_should_be_in="other_fields2",
     )
+
+
+@pytest.mark.django_db
+def test_dimension_title_edit_does_not_refresh_programs():
+    event, _ = Event.get_or_create_dummy()
+    dimension = Dimension.objects.create(event=event, slug="category", title=dict(fi="Kategoria", en="Category"))
+    value = DimensionValue.objects.create(dimension=dimension, slug="anime", title=dict(fi="Anime", en="Anime"))
+
+    with mock.patch.object(Program, "refresh_cached_dimensions", autospec=True) as refresh:
+        value.title = dict(fi="Animeohjelma", en="Anime program")
+        value.save()
+        dimension.title = dict(fi="Luokka", en="Category")
+        dimension.save()
+        refresh.assert_not_called()
+
+        value.slug = "animation"
+        value.save()
+        refresh.assert_called_once()
@@ -131,3 +131,7 @@ class ProgrammeRole(models.Model, CsvExportMixin):
             Role: self.role,
             AlternativeProgrammeForm: self.programme.form_used,
         }
+
+    @classmethod
+    def get_csv_queryset(cls, event, queryset, fields):
+        return queryset.select_related("person", "programme__form_used", "role")
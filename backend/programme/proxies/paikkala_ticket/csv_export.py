@@ -36,3 +36,7 @@ class PaikkalaTicketCsvExportProxy(CsvExportMixin, Ticket):
         return {
             Person: self.user.person,
         }
+
+    @classmethod
+    def get_csv_queryset(cls, event, queryset, fields):
+        return queryset.select_related("zone", "row", "user__person")
@@ -0,0 +1,184 @@
+"""
+Optional virtual waiting room in front of the ticket shop.
+
+When TicketsEventMeta.admission_queue_rate is set, every visitor of the ticket shop is handed a
+position in the queue upon their first visit. Positions are admitted at the given rate per minute
+counting from ticket_sales_starts. The first minute's worth of positions is admitted immediately.
+
+The position is assigned with an atomic increment in the Django cache and handed out as a signed
+token stored in a cookie. Everything needed to decide whether the position has been admitted is
+contained in the token, so polling the status endpoint requires neither the database nor the
+session. Tampering with the token is prevented by signing it.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import time
+from dataclasses import asdict, dataclass, replace
+
+from django.core import signing
+from django.core.cache import cache
+
+logger = logging.getLogger("kompassi")
+
+COOKIE_NAME_TEMPLATE = "{event_slug}.tickets.queue"
+POSITION_CACHE_KEY_TEMPLATE = "kompassi:tickets:queue:{event_slug}:{opens_at}:position"
+SIGNING_SALT = "tickets.admission_queue"
+
+# A queue token outlives any reasonable sales rush, but not the next event.
+TOKEN_MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+
+# Clients should not poll more often than this, even if the estimated wait is shorter.
+MIN_POLL_INTERVAL_SECONDS = 5
+MAX_POLL_INTERVAL_SECONDS = 30
+
+
+@dataclass(frozen=True)
+class QueueTicket:
+    event_slug: str
+    position: int
+    opens_at: int  # unix timestamp of ticket_sales_starts
+    rate: int  # admissions per minute
+
+    def get_admitted_count(self, t: float | None = None) -> int:
+        if t is None:
+            t = time.time()
+
+        if t < self.opens_at:
+            return 0
+
+        return self.rate * (1 + int((t - self.opens_at) // 60))
+
+    def is_admitted(self, t: float | None = None) -> bool:
+        return self.position <= self.get_admitted_count(t)
+
+    def get_estimated_wait_seconds(self, t: float | None = None) -> int:
+        if t is None:
+            t = time.time()
+
+        if self.is_admitted(t):
+            return 0
+
+        admitted_at = self.opens_at + 60 * (math.ceil(self.position / self.rate) - 1)
+        return max(0, math.ceil(admitted_at - t))
+
+    def get_poll_interval_seconds(self, t: float | None = None) -> int:
+        wait_seconds = self.get_estimated_wait_seconds(t)
+        return min(MAX_POLL_INTERVAL_SECONDS, max(MIN_POLL_INTERVAL_SECONDS, wait_seconds))
+
+    def get_status(self, t: float | None = None) -> dict:
+        if t is None:
+            t = time.time()
+
+        admitted = self.is_admitted(t)
+        return dict(
+            position=self.position,
+            admitted=admitted,
+            estimated_wait_seconds=self.get_estimated_wait_seconds(t),
+            poll_interval_seconds=None if admitted else self.get_poll_interval_seconds(t),
+        )
+
+    def dumps(self) -> str:
+        return signing.dumps(asdict(self), salt=SIGNING_SALT, compress=True)
+
+    @classmethod
+    def loads(cls, token: str) -> QueueTicket | None:
+        try:
+            return cls(**signing.loads(token, salt=SIGNING_SALT, max_age=TOKEN_MAX_AGE_SECONDS))
+        except (signing.BadSignature, TypeError):
+            return None
+
+    @classmethod
+    def from_request(cls, request, event_slug: str) -> QueueTicket | None:
+        token = request.COOKIES.get(get_cookie_name(event_slug))
+        if not token:
+            return None
+
+        ticket = cls.loads(token)
+        if ticket is None or ticket.event_slug != event_slug:
+            return None
+
+        return ticket
+
+    def set_cookie(self, response):
+        response.set_cookie(
+            get_cookie_name(self.event_slug),
+            self.dumps(),
+            max_age=TOKEN_MAX_AGE_SECONDS,
+            httponly=True,
+            samesite="Lax",
+        )
+
+
+def get_cookie_name(event_slug: str) -> str:
+    return COOKIE_NAME_TEMPLATE.format(event_slug=event_slug)
+
+
+def get_next_position(event_slug: str, opens_at: int) -> int:
+    """
+    Atomically hands out the next position in the queue of the event.
+    The counter is keyed by sales start, so rescheduling the sales also starts a new queue.
+    """
+    key = POSITION_CACHE_KEY_TEMPLATE.format(event_slug=event_slug, opens_at=opens_at)
+    cache.add(key, 0, timeout=TOKEN_MAX_AGE_SECONDS)
+
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # evicted between add and incr; admitting early beats failing
+        logger.warning(f"Admission queue counter for {event_slug} was lost, restarting")
+        cache.set(key, 1, timeout=TOKEN_MAX_AGE_SECONDS)
+        return 1
+
+
+def get_queue_ticket(request, meta) -> tuple[QueueTicket, bool]:
+    """
+    Returns the queue ticket of the visitor for the event, issuing a new one if the visitor does
+    not have a valid one for the current queue settings. The second element of the tuple is True
+    if the ticket was issued now and needs to be set as a cookie on the response.
+    """
+    event_slug = meta.event.slug
+    opens_at = int(meta.ticket_sales_starts.timestamp())
+    rate = meta.admission_queue_rate
+
+    ticket = QueueTicket.from_request(request, event_slug)
+    if ticket is not None and ticket.opens_at == opens_at:
+        if ticket.rate == rate:
+            return ticket, False
+
+        # the rate was changed by an admin; keep the position
+        return replace(ticket, rate=rate), True
+
+    ticket = QueueTicket(
+        event_slug=event_slug,
+        position=get_next_position(event_slug, opens_at),
+        opens_at=opens_at,
+        rate=rate,
+    )
+    return ticket, True
+
+
+def is_queue_enabled(meta) -> bool:
+    return bool(meta.admission_queue_rate and meta.ticket_sales_starts)
+
+
+def is_exempt_from_queue(request, meta) -> bool:
+    """
+    Admins skip the queue, as do visitors who already have an order going (eg. returning from payment).
+    """
+    from .helpers import has_order
+
+    return not is_queue_enabled(meta) or meta.is_user_admin(request.user) or has_order(request, meta.event)
+
+
+def is_admitted(request, meta) -> bool:
+    """
+    For views past the entrance: does not issue queue tickets, only checks the existing one.
+    """
+    if is_exempt_from_queue(request, meta):
+        return True
+
+    ticket = QueueTicket.from_request(request, meta.event.slug)
+    return ticket is not None and ticket.opens_at == int(meta.ticket_sales_starts.timestamp()) and ticket.is_admitted()
@@ -0,0 +1,83 @@
+"""
+Cached snapshot of product availability for the ticket shop.
+
+Availability of a product is the minimum of what is left in its limit groups. The snapshot reads
+the limit and sold counter of every limit group of every product of the event in a single query and
+is shared across requests via the Django cache for KOMPASSI_TICKETS_AVAILABILITY_CACHE_SECONDS.
+
+The snapshot is only used for display and for failing fast. Overselling is prevented by the
+conditional UPDATE in LimitGroup.add_sold, so a slightly stale snapshot is harmless. It is
+nevertheless invalidated whenever sold counters or limits change (see ..handlers.limit_group
+and Order.confirm_order, cancel and uncancel).
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+if TYPE_CHECKING:
+    from .models.product import Product
+
+
+CACHE_KEY_TEMPLATE = "kompassi:tickets:availability:{event_id}"
+
+
+@dataclass(frozen=True)
+class AvailabilitySnapshot:
+    event_id: int
+
+    # product id -> amount available in each of its limit groups
+    amounts_available_by_product: dict[int, list[int]]
+
+    def get_amount_available(self, product_id: int) -> int:
+        # NOTE: same as Product.amount_available used to be: a product without limit groups raises ValueError
+        return min(self.amounts_available_by_product.get(product_id, []))
+
+    def prime(self, products: Iterable[Product]):
+        """
+        Sets the amount_available cached property of the products so that they don't each consult the cache.
+        """
+        for product in products:
+            product.__dict__["amount_available"] = self.get_amount_available(product.id)
+
+    @classmethod
+    def load(cls, event_id: int) -> AvailabilitySnapshot:
+        from .models.product import Product
+
+        amounts_available_by_product: dict[int, list[int]] = {}
+        for product_id, limit, count_sold in Product.limit_groups.through.objects.filter(
+            product__event_id=event_id,
+        ).values_list("product_id", "limitgroup__limit", "limitgroup__count_sold"):
+            amounts_available_by_product.setdefault(product_id, []).append(limit - count_sold)
+
+        return cls(event_id=event_id, amounts_available_by_product=amounts_available_by_product)
+
+    @classmethod
+    def get(cls, event_id: int) -> AvailabilitySnapshot:
+        timeout = settings.KOMPASSI_TICKETS_AVAILABILITY_CACHE_SECONDS
+        if not timeout:
+            return cls.load(event_id)
+
+        cache_key = CACHE_KEY_TEMPLATE.format(event_id=event_id)
+        snapshot = cache.get(cache_key)
+        if snapshot is None:
+            snapshot = cls.load(event_id)
+            cache.set(cache_key, snapshot, timeout)
+
+        return snapshot
+
+    @staticmethod
+    def invalidate(event_id: int):
+        """
+        Invalidates now, and again after commit, so that a concurrent request does not cache
+        the counters from before the transaction committed for the full TTL.
+        """
+        cache_key = CACHE_KEY_TEMPLATE.format(event_id=event_id)
+        cache.delete(cache_key)
+        transaction.on_commit(lambda: cache.delete(cache_key))
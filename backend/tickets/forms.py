@@ -7,6 +7,7 @@ from django.utils.translation import gettext_lazy as _
 from core.utils import horizontal_form_helper, indented_without_label, initialize_form
 from core.utils.locale_utils import get_message_in_language
 
+from .availability import AvailabilitySnapshot
 from .models import AccommodationInformation, Customer, Order, OrderProduct, Product
 
 
@@ -79,10 +80,10 @@ class OrderProductForm(forms.ModelForm):
 
     @classmethod
     def get_for_order(cls, request, order, admin=False, code=""):
-        return [
-            cls.get_for_order_and_product(request, order, product, admin=admin)
-            for product in Product.get_products_for_event(order.event, code=code, admin=admin)
-        ]
+        products = list(Product.get_products_for_event(order.event, code=code, admin=admin))
+        AvailabilitySnapshot.get(order.event_id).prime(products)
+
+        return [cls.get_for_order_and_product(request, order, product, admin=admin) for product in products]
 
     @classmethod
     def get_for_order_and_product(cls, request, order, product, admin=False):
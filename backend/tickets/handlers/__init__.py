@@ -0,0 +1 @@
+from . import limit_group, sales_rollup
@@ -0,0 +1,54 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from ..availability import AvailabilitySnapshot
+from ..models.limit_group import LimitGroup
+from ..models.order_product import OrderProduct
+from ..models.product import Product
+
+
+def counts_towards_limits(order_product: OrderProduct) -> bool:
+    """
+    Order products of unconfirmed orders are added to the counters when the order is confirmed,
+    and those of cancelled orders were subtracted when the order was cancelled. Changes to order products
+    of other orders (eg. by admins) need to be reflected in the counters immediately.
+    """
+    order = order_product.order
+    return order.is_confirmed and not order.is_cancelled
+
+
+@receiver(pre_save, sender=OrderProduct)
+def order_product_pre_save(sender, instance: OrderProduct, **kwargs):
+    if instance.pk is None or not counts_towards_limits(instance):
+        instance._old_count = 0
+    else:
+        instance._old_count = sender.objects.filter(pk=instance.pk).values_list("count", flat=True).first() or 0
+
+
+@receiver(post_save, sender=OrderProduct)
+def order_product_post_save(sender, instance: OrderProduct, **kwargs):
+    if counts_towards_limits(instance):
+        count = instance.count - getattr(instance, "_old_count", 0)
+        if count:
+            LimitGroup.add_sold(LimitGroup.get_counts_for_product(instance.product_id, count))  # type: ignore
+            AvailabilitySnapshot.invalidate(instance.order.event_id)
+
+
+@receiver(post_delete, sender=OrderProduct)
+def order_product_post_delete(sender, instance: OrderProduct, **kwargs):
+    if counts_towards_limits(instance):
+        LimitGroup.add_sold(LimitGroup.get_counts_for_product(instance.product_id, -instance.count))  # type: ignore
+        AvailabilitySnapshot.invalidate(instance.order.event_id)
+
+
+@receiver(m2m_changed, sender=Product.limit_groups.through)
+def product_limit_groups_changed(sender, instance: Product | LimitGroup, action: str, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        LimitGroup.refresh_counters(LimitGroup.objects.filter(event=instance.event))
+
+
+@receiver(post_save, sender=LimitGroup)
+@receiver(post_delete, sender=LimitGroup)
+def limit_group_post_save_or_delete(sender, instance: LimitGroup, **kwargs):
+    # eg. the limit was changed
+    AvailabilitySnapshot.invalidate(instance.event_id)  # type: ignore
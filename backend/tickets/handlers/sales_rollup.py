@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from ..models.order import Order
+from ..models.order_product import OrderProduct
+from ..models.sales_rollup import SalesRollup
+
+
+def mark_order_dirty(order: Order):
+    if SalesRollup.is_enabled() and order.confirm_time is not None:
+        SalesRollup.mark_dirty(order.event_id, [order.confirm_time.date()])  # type: ignore
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def order_post_save_or_delete(sender, instance: Order, **kwargs):
+    # covers confirmation, payment, cancellation and uncancellation
+    mark_order_dirty(instance)
+
+
+@receiver(post_save, sender=OrderProduct)
+@receiver(post_delete, sender=OrderProduct)
+def order_product_post_save_or_delete(sender, instance: OrderProduct, **kwargs):
+    # eg. admins changing the products of a confirmed order
+    # checked before accessing .order to avoid a query per order product when the rollup is not in use
+    if SalesRollup.is_enabled():
+        mark_order_dirty(instance.order)
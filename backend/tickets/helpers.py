@@ -14,6 +14,7 @@ __all__ = [
     "complete_phase",
     "destroy_order",
     "get_order",
+    "has_order",
     "is_phase_completed",
     "set_order",
     "tickets_admin_required",
@@ -53,6 +54,13 @@ def get_order(request, event):
     )
 
 
+def has_order(request, event):
+    """
+    Cheaper than get_order(request, event).pk is not None as the order is not loaded.
+    """
+    return ORDER_KEY_TEMPLATE.format(event=event) in request.session
+
+
 def clear_order(request, event):
     order_key = ORDER_KEY_TEMPLATE.format(event=event)
     if order_key in request.session:
@@ -56,3 +56,31 @@ KEYSPACES = {
 
 def select_queue(_):
     return Queue.ONE_QUEUE
+
+
+MAX_CODE_GENERATION_ATTEMPTS = 100
+
+
+def generate_codes(codes):
+    """
+    Fills in code and literate_code of unsaved lippukala Codes so that they can be bulk created.
+
+    lippukala generates these in Code.save, which bulk_create does not call, so we call its private
+    _generate_code and _generate_literate_code instead. _generate_code only avoids codes already in the
+    database (with one query per code), so codes of the same batch are also checked against each other
+    here; otherwise a collision within the batch would fail bulk_create on the unique code column.
+    """
+    generated = set()
+
+    for code in codes:
+        for _attempt in range(MAX_CODE_GENERATION_ATTEMPTS):
+            code._generate_code()
+            if code.code not in generated:
+                break
+        else:
+            raise ValueError(f"Failed to generate a unique code in {MAX_CODE_GENERATION_ATTEMPTS} attempts")
+
+        generated.add(code.code)
+        code._generate_literate_code()
+
+    return codes
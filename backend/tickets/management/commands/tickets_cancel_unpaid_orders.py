@@ -0,0 +1,60 @@
+import time
+
+from django.core.management import BaseCommand
+
+from core.models import Event
+
+from ...models import Order
+from ...models.consts import UNPAID_CANCEL_HOURS
+
+POLL_INTERVAL_SECONDS = 5
+WAIT_TIMEOUT_SECONDS = 30 * 60
+
+
+class Command(BaseCommand):
+    help = "Cancels orders that have not been paid in time"
+
+    def add_arguments(self, parser):
+        parser.add_argument("event_slug")
+        parser.add_argument("--hours", type=int, default=UNPAID_CANCEL_HOURS)
+        parser.add_argument("--send-email", action="store_true", help="Notify customers of the cancellation")
+        parser.add_argument(
+            "--wait",
+            action="store_true",
+            help=(
+                "With --send-email, wait for the notifications to be sent, reporting progress. "
+                "Progress is tracked in the default cache, so with background tasks this requires "
+                "a cache shared with the workers (not the default per-process locmem cache)."
+            ),
+        )
+        parser.add_argument(
+            "--wait-timeout",
+            type=int,
+            default=WAIT_TIMEOUT_SECONDS,
+            help="With --wait, give up waiting after this many seconds (the notifications are still sent)",
+        )
+
+    def handle(self, *args, **options):
+        event = Event.objects.get(slug=options["event_slug"])
+
+        order_ids = Order.cancel_orders(Order.get_unpaid_orders_to_cancel(event, hours=options["hours"]))
+        self.stdout.write(f"Cancelled {len(order_ids)} unpaid orders")
+
+        if not options["send_email"] or not order_ids:
+            return
+
+        progress_key = Order.send_confirmation_messages(order_ids, "cancellation_notice")
+        if not options["wait"]:
+            self.stdout.write(f"Sending {len(order_ids)} cancellation notices in the background")
+            return
+
+        deadline = time.monotonic() + options["wait_timeout"]
+        while True:
+            sent, total = Order.get_confirmation_messages_progress(progress_key)
+            self.stdout.write(f"Sent {sent}/{total} cancellation notices")
+            if sent >= total:
+                break
+            if time.monotonic() >= deadline:
+                self.stderr.write("Gave up waiting; the rest of the cancellation notices are sent in the background")
+                break
+            time.sleep(POLL_INTERVAL_SECONDS)
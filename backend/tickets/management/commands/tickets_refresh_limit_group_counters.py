@@ -0,0 +1,18 @@
+from django.core.management import BaseCommand
+
+from ...models import LimitGroup
+
+
+class Command(BaseCommand):
+    help = "Recomputes the sold counters of limit groups from order products"
+
+    def add_arguments(self, parser):
+        parser.add_argument("event_slugs", nargs="*", metavar="EVENT_SLUG", help="Default: all events")
+
+    def handle(self, *args, **options):
+        limit_groups = LimitGroup.objects.all()
+        if event_slugs := options["event_slugs"]:
+            limit_groups = limit_groups.filter(event__slug__in=event_slugs)
+
+        num_updated = LimitGroup.refresh_counters(limit_groups)
+        self.stdout.write(f"Refreshed {num_updated} limit groups")
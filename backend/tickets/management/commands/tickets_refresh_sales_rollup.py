@@ -0,0 +1,22 @@
+from django.core.management import BaseCommand
+
+from core.models import Event
+
+from ...models import SalesRollup
+
+
+class Command(BaseCommand):
+    help = "Refreshes the sales statistics rollup (see KOMPASSI_TICKETS_SALES_ROLLUP)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("event_slugs", nargs="+", metavar="EVENT_SLUG")
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Recompute all dates, not just those marked dirty. Needed after enabling the rollup.",
+        )
+
+    def handle(self, *args, **options):
+        for event in Event.objects.filter(slug__in=options["event_slugs"]):
+            num_rows = SalesRollup.refresh(event, full=options["full"])
+            self.stdout.write(f"{event.slug}: wrote {num_rows} rollup rows")
@@ -0,0 +1,43 @@
+# Generated by Django 5.0.2 on 2026-10-18 12:00
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def populate_count_sold(apps, schema_editor):
+    LimitGroup = apps.get_model("tickets", "LimitGroup")
+    OrderProduct = apps.get_model("tickets", "OrderProduct")
+
+    amount_sold = (
+        OrderProduct.objects.filter(
+            product__limit_groups=models.OuterRef("pk"),
+            order__confirm_time__isnull=False,
+            order__cancellation_time__isnull=True,
+        )
+        .order_by()
+        .values("product__limit_groups")
+        .annotate(amount_sold=models.Sum("count"))
+        .values("amount_sold")
+    )
+
+    LimitGroup.objects.update(count_sold=Coalesce(models.Subquery(amount_sold), 0))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tickets", "0039_alter_ticketseventmeta_terms_and_conditions_url"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="limitgroup",
+            name="count_sold",
+            field=models.IntegerField(
+                default=0,
+                editable=False,
+                help_text="Sum of counts of order products in confirmed, non-cancelled orders. Maintained by add_sold.",
+                verbose_name="Amount sold",
+            ),
+        ),
+        migrations.RunPython(populate_count_sold, migrations.RunPython.noop, elidable=True),
+    ]
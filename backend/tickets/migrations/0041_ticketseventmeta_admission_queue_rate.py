@@ -0,0 +1,22 @@
+# Generated by Django 5.0.2 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tickets", "0040_limitgroup_count_sold"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticketseventmeta",
+            name="admission_queue_rate",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="If set, visitors of the ticket shop are placed in a queue and let in at most this many per minute after ticket sales start. Leave empty to let everyone in at once.",
+                null=True,
+                verbose_name="Admission queue rate",
+            ),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.2 on 2026-10-18 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0040_rename_emailverificationtoken_person_state_core_emailv_person__722147_idx_and_more"),
+        ("tickets", "0041_ticketseventmeta_admission_queue_rate"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SalesRollup",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateField()),
+                ("count", models.IntegerField(default=0)),
+                ("paid_count", models.IntegerField(default=0)),
+                ("event", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="core.event")),
+                ("product", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="tickets.product")),
+            ],
+            options={
+                "indexes": [models.Index(fields=["event", "date"], name="tickets_salesrollup_event_date")],
+                "unique_together": {("product", "date")},
+            },
+        ),
+        migrations.CreateModel(
+            name="SalesRollupDirtyDate",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateField()),
+                ("event", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="core.event")),
+            ],
+            options={
+                "unique_together": {("event", "date")},
+            },
+        ),
+    ]
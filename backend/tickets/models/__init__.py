@@ -1,11 +1,12 @@
 # database models
 from .accommodation_information import AccommodationInformation
 from .customer import Customer
-from .limit_group import LimitGroup
+from .limit_group import LimitGroup, SoldOut
 from .order import Order
 from .order_product import OrderProduct
 from .product import Product
 
 # non-database models
 from .product_handout import ProductHandout
+from .sales_rollup import SalesRollup, SalesRollupDirtyDate
 from .tickets_event_meta import TicketsEventMeta
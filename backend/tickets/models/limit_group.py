@@ -1,19 +1,31 @@
 import logging
-from functools import cached_property
+from collections.abc import Iterable, Mapping
 from typing import TYPE_CHECKING
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.utils.translation import gettext_lazy as _
 
 from .consts import LOW_AVAILABILITY_THRESHOLD
 
 if TYPE_CHECKING:
+    from .order import Order
     from .product import Product
 
 
 logger = logging.getLogger("kompassi")
 
 
+class SoldOut(Exception):
+    """
+    Raised by LimitGroup.add_sold when there is not enough left in a limit group.
+    """
+
+    def __init__(self, limit_group_id: int):
+        super().__init__(f"Limit group {limit_group_id} does not have enough available")
+        self.limit_group_id = limit_group_id
+
+
 class LimitGroup(models.Model):
     id: int
     pk: int
@@ -23,6 +35,14 @@ class LimitGroup(models.Model):
     description = models.CharField(max_length=255, verbose_name=_("Description"))
     limit = models.IntegerField(verbose_name=_("Maximum amount to sell"))
 
+    # denormalized fields
+    count_sold = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name=_("Amount sold"),
+        help_text="Sum of counts of order products in confirmed, non-cancelled orders. Maintained by add_sold.",
+    )
+
     def __str__(self):
         return f"{self.description} ({self.amount_available}/{self.limit})"
 
@@ -30,23 +50,99 @@ class LimitGroup(models.Model):
         verbose_name = _("limit group")
         verbose_name_plural = _("limit groups")
 
-    @cached_property
+    @property
     def amount_sold(self):
+        return self.count_sold
+
+    @classmethod
+    def get_counts_for_order(cls, order: "Order") -> dict[int, int]:
+        """
+        Returns limit group id -> how many items the order takes from that limit group.
+        """
+        return cls.get_counts_for_orders([order])
+
+    @staticmethod
+    def get_counts_for_orders(orders: "Iterable[Order] | models.QuerySet[Order]") -> dict[int, int]:
+        """
+        Returns limit group id -> how many items the orders take from that limit group, in one grouped query.
+        """
         from .order_product import OrderProduct
 
-        amount_sold = OrderProduct.objects.filter(
-            product__limit_groups=self,
-            order__confirm_time__isnull=False,
-            order__cancellation_time__isnull=True,
-        ).aggregate(models.Sum("count"))["count__sum"]
+        return dict(
+            OrderProduct.objects.filter(
+                order__in=orders,
+                count__gt=0,
+                product__limit_groups__isnull=False,
+            )
+            .order_by()
+            .values_list("product__limit_groups")
+            .annotate(count=models.Sum("count"))
+            .values_list("product__limit_groups", "count")
+        )
+
+    @staticmethod
+    def get_counts_for_product(product_id: int, count: int) -> dict[int, int]:
+        from .product import Product
+
+        return {
+            limit_group_id: count
+            for limit_group_id in Product.limit_groups.through.objects.filter(product_id=product_id).values_list(
+                "limitgroup_id",
+                flat=True,
+            )
+        }
+
+    @classmethod
+    @transaction.atomic
+    def add_sold(cls, counts: Mapping[int, int], check_limit: bool = False):
+        """
+        Atomically adds (or with negative counts, subtracts) to the sold counters of limit groups.
+
+        If check_limit is set, each counter is only incremented if it stays within the limit
+        (UPDATE … WHERE count_sold + n <= limit), and SoldOut is raised (rolling back all counters)
+        otherwise. The row lock taken by the UPDATE is held until the end of the transaction, so
+        concurrent buyers only wait for each other on the limit groups they actually share, and
+        limit groups are always locked in the same order to avoid deadlocks.
+        """
+        for limit_group_id in sorted(counts):
+            count = counts[limit_group_id]
+            if not count:
+                continue
+
+            limit_groups = cls.objects.filter(id=limit_group_id)
+            if check_limit and count > 0:
+                limit_groups = limit_groups.filter(count_sold__lte=models.F("limit") - count)
+
+            if not limit_groups.update(count_sold=models.F("count_sold") + count):
+                raise SoldOut(limit_group_id)
+
+    @classmethod
+    def refresh_counters(cls, limit_groups: models.QuerySet["LimitGroup"]):
+        """
+        Recomputes the sold counters from order products in a single UPDATE.
+        Needed eg. if the limit groups of a product are changed after sales have begun.
+        """
+        from ..availability import AvailabilitySnapshot
+        from .order_product import OrderProduct
+
+        amount_sold = (
+            OrderProduct.objects.filter(
+                product__limit_groups=models.OuterRef("pk"),
+                order__confirm_time__isnull=False,
+                order__cancellation_time__isnull=True,
+            )
+            .order_by()
+            .values("product__limit_groups")
+            .annotate(amount_sold=models.Sum("count"))
+            .values("amount_sold")
+        )
 
-        return amount_sold if amount_sold is not None else 0
+        num_updated = limit_groups.update(count_sold=Coalesce(models.Subquery(amount_sold), 0))
 
-    def refresh_from_db(self, *args, **kwargs):
-        super().refresh_from_db(*args, **kwargs)
+        for event_id in set(limit_groups.values_list("event_id", flat=True)):
+            AvailabilitySnapshot.invalidate(event_id)
 
-        # invalidate cached properties
-        self.__dict__.pop("amount_sold", None)
+        return num_updated
 
     @property
     def amount_available(self):
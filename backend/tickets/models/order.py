@@ -1,13 +1,17 @@
+import hashlib
+import json
 import logging
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta
 from datetime import time as dtime
 from typing import TYPE_CHECKING
+from uuid import uuid4
 
 from dateutil.tz import tzlocal
 from django.conf import settings
+from django.core.cache import cache
 from django.core.mail import EmailMessage
-from django.db import connection, models
+from django.db import connection, models, transaction
 from django.template.loader import render_to_string
 from django.utils import timezone, translation
 from django.utils.translation import gettext_lazy as _
@@ -26,6 +30,16 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger("kompassi")
 
+ETICKETS_PDF_CACHE_KEY_TEMPLATE = "kompassi:tickets:etickets:{digest}"
+ETICKETS_PDF_VERSION = 1  # bump to invalidate cached e-tickets if the rendering changes
+
+# re-read from the locked row by Order.lock_for_update
+ORDER_STATE_FIELDS = ("confirm_time", "payment_date", "cancellation_time", "reference_number")
+
+CONFIRMATION_MESSAGES_BATCH_SIZE = 50
+CONFIRMATION_MESSAGES_PROGRESS_KEY_TEMPLATE = "kompassi:tickets:confirmation_messages:{job_id}"
+CONFIRMATION_MESSAGES_PROGRESS_TIMEOUT_SECONDS = 24 * 60 * 60
+
 
 @dataclass
 class ArrivalsRow:
@@ -149,21 +163,49 @@ class Order(models.Model):
     def clean_up_order_products(self):
         self.order_product_set.filter(count__lte=0).delete()
 
+    def lock_for_update(self):
+        """
+        Locks the row of the order until the end of the transaction and re-reads its state from it.
+        Checks of is_confirmed, is_paid and is_cancelled made after this are not fooled by a stale
+        instance, eg. a double-submitted checkout, two concurrent admin actions or a payment callback.
+        """
+        locked = Order.objects.select_for_update().only(*ORDER_STATE_FIELDS).get(pk=self.pk)
+        for field_name in ORDER_STATE_FIELDS:
+            setattr(self, field_name, getattr(locked, field_name))
+
+    @transaction.atomic
     def confirm_order(self):
+        """
+        Reserves the ordered products from their limit groups. Raises SoldOut if there is not enough
+        available, in which case nothing is changed.
+        """
+        from ..availability import AvailabilitySnapshot
+        from .limit_group import LimitGroup
+
         if not self.customer:
             raise ValueError("Customer not set")
+
+        self.lock_for_update()
         if self.is_confirmed:
             raise ValueError("Already confirmed")
 
         self.clean_up_order_products()
 
+        LimitGroup.add_sold(LimitGroup.get_counts_for_order(self), check_limit=True)
+        AvailabilitySnapshot.invalidate(self.event_id)
+
         self.reference_number = self._make_reference_number()
         self.confirm_time = timezone.now()
         self.save()
 
+    @transaction.atomic
     def confirm_payment(self, payment_date=None, send_email=True):
+        # cancel_orders also locks the orders, so a payment is either confirmed before or refused after it
+        self.lock_for_update()
         if not self.is_confirmed:
             raise ValueError("Must be confirmed to pay")
+        if self.is_cancelled:
+            raise ValueError("Cancelled orders cannot be paid")
         if self.is_paid:
             raise ValueError("Already paid")
 
@@ -172,36 +214,66 @@ class Order(models.Model):
 
         self.payment_date = payment_date
 
-        self.save()
+        # only the payment date, lest a stale instance undo eg. a cancellation
+        self.save(update_fields=["payment_date"])
 
         if "lippukala" in settings.INSTALLED_APPS:
             self.lippukala_create_codes()
 
         if send_email:
+            # renders the e-tickets in the background if background_tasks is enabled
             self.send_confirmation_message("payment_confirmation")
+        elif (
+            "background_tasks" in settings.INSTALLED_APPS
+            and settings.KOMPASSI_TICKETS_ETICKETS_CACHE_SECONDS
+            and self.contains_electronic_tickets
+        ):
+            # so that they are ready in the cache when requested
+            from ..tasks import order_render_etickets
+
+            transaction.on_commit(lambda: order_render_etickets.delay(self.pk))  # type: ignore
 
     def cancel(self, send_email=True):
-        if not self.is_confirmed:
-            raise ValueError("Must be confirmed to cancel")
+        from ..availability import AvailabilitySnapshot
+        from .limit_group import LimitGroup
 
-        if "lippukala" in settings.INSTALLED_APPS:
-            self.lippukala_revoke_codes()
+        with transaction.atomic():
+            self.lock_for_update()
+            if not self.is_confirmed:
+                raise ValueError("Must be confirmed to cancel")
 
-        self.cancellation_time = timezone.now()
-        self.save()
+            if "lippukala" in settings.INSTALLED_APPS:
+                self.lippukala_revoke_codes()
+
+            if not self.is_cancelled:
+                counts = LimitGroup.get_counts_for_order(self)
+                LimitGroup.add_sold({limit_group_id: -count for limit_group_id, count in counts.items()})
+                AvailabilitySnapshot.invalidate(self.event_id)
+
+            self.cancellation_time = timezone.now()
+            self.save(update_fields=["cancellation_time"])
 
         if send_email:
             self.send_confirmation_message("cancellation_notice")
 
     def uncancel(self, send_email=True):
-        if not self.is_cancelled:
-            raise ValueError("Must be cancelled to uncancel")
+        from ..availability import AvailabilitySnapshot
+        from .limit_group import LimitGroup
 
-        if "lippukala" in settings.INSTALLED_APPS:
-            self.lippukala_reinstate_codes()
+        with transaction.atomic():
+            self.lock_for_update()
+            if not self.is_cancelled:
+                raise ValueError("Must be cancelled to uncancel")
 
-        self.cancellation_time = None
-        self.save()
+            if "lippukala" in settings.INSTALLED_APPS:
+                self.lippukala_reinstate_codes()
+
+            # an admin action, so deliberately not checking limits (like before there were counters)
+            LimitGroup.add_sold(LimitGroup.get_counts_for_order(self))
+            AvailabilitySnapshot.invalidate(self.event_id)
+
+            self.cancellation_time = None
+            self.save(update_fields=["cancellation_time"])
 
         if send_email:
             self.send_confirmation_message("uncancellation_notice")
@@ -282,6 +354,8 @@ class Order(models.Model):
         from lippukala.models import Code
         from lippukala.models import Order as LippukalaOrder
 
+        from ..lippukala_integration import generate_codes
+
         if not self.customer:
             raise ValueError("Customer must be set")
 
@@ -298,13 +372,20 @@ class Order(models.Model):
             logger.debug("Lippukala order already exists")
             return
 
-        for op in self.order_product_set.filter(count__gt=0, product__electronic_ticket=True):
-            for _i in range(op.count * op.product.electronic_tickets_per_product):
-                Code.objects.create(
-                    order=lippukala_order,
-                    prefix=self.lippukala_prefix,
-                    product_text=op.product.electronic_ticket_title,
-                )
+        prefix = self.lippukala_prefix
+        codes = [
+            Code(
+                order=lippukala_order,
+                prefix=prefix,
+                product_text=op.product.electronic_ticket_title,
+            )
+            for op in self.order_product_set.filter(count__gt=0, product__electronic_ticket=True).select_related(
+                "product"
+            )
+            for _i in range(op.count * op.product.electronic_tickets_per_product)
+        ]
+
+        Code.objects.bulk_create(generate_codes(codes))
 
     def lippukala_revoke_codes(self):
         if "lippukala" not in settings.INSTALLED_APPS:
@@ -341,27 +422,70 @@ class Order(models.Model):
         except LippukalaOrder.DoesNotExist:
             return None
 
-    def get_etickets_pdf(self):
+    def get_etickets_cache_key(self, lippukala_order) -> str:
+        """
+        The cache of rendered e-tickets is content addressed: the key is a digest of everything that
+        goes into the PDF, so changes (eg. revoked codes or a new logo) never serve a stale PDF and
+        entries need not be invalidated.
+        """
+        meta = self.event.tickets_event_meta
+        content = [
+            ETICKETS_PDF_VERSION,
+            meta.print_logo_path,
+            meta.print_logo_size_cm,
+            lippukala_order.event,
+            lippukala_order.reference_number,
+            lippukala_order.address_text,
+            lippukala_order.free_text,
+            list(
+                lippukala_order.code_set.order_by("id").values_list(
+                    "code",
+                    "literate_code",
+                    "prefix",
+                    "product_text",
+                    "status",
+                )
+            ),
+        ]
+        digest = hashlib.sha256(json.dumps(content, default=str).encode("utf-8")).hexdigest()
+        return ETICKETS_PDF_CACHE_KEY_TEMPLATE.format(digest=digest)
+
+    def get_etickets_pdf(self) -> bytes:
         if "lippukala" not in settings.INSTALLED_APPS:
             raise NotImplementedError("lippukala not installed")
 
         from lippukala.printing import OrderPrinter
 
+        lippukala_order = self.lippukala_order
+        if lippukala_order is None:
+            raise ValueError(f"Order {self.pk} has no e-tickets")
+
+        timeout = settings.KOMPASSI_TICKETS_ETICKETS_CACHE_SECONDS
+        cache_key = self.get_etickets_cache_key(lippukala_order) if timeout else ""
+        if cache_key and (pdf := cache.get(cache_key)) is not None:
+            return pdf
+
         meta = self.event.tickets_event_meta
 
         printer = OrderPrinter(
             print_logo_path=meta.print_logo_path,
             print_logo_size_cm=meta.print_logo_size_cm,
         )
-        printer.process_order(self.lippukala_order)
+        printer.process_order(lippukala_order)
+        pdf = printer.finish()
 
-        return printer.finish()
+        if cache_key:
+            cache.set(cache_key, pdf, timeout)
+
+        return pdf
 
     def send_confirmation_message(self, msgtype):
         if "background_tasks" in settings.INSTALLED_APPS:
             from ..tasks import order_send_confirmation_message
 
-            order_send_confirmation_message.delay(self.pk, msgtype)  # type: ignore
+            # the worker must see what we have done in this transaction (eg. lippukala codes)
+            order_id = self.pk
+            transaction.on_commit(lambda: order_send_confirmation_message.delay(order_id, msgtype))  # type: ignore
         else:
             self._send_confirmation_message(msgtype)
 
@@ -459,14 +583,98 @@ class Order(models.Model):
         )
 
     @classmethod
-    def cancel_unpaid_orders(cls, event, hours=UNPAID_CANCEL_HOURS, send_email=False):
-        orders = cls.get_unpaid_orders_to_cancel(event=event, hours=hours)
-        count = orders.count()
+    def cancel_unpaid_orders(cls, event, hours=UNPAID_CANCEL_HOURS, send_email=False) -> int:
+        """
+        Returns the number of orders cancelled.
+        """
+        order_ids = cls.cancel_orders(cls.get_unpaid_orders_to_cancel(event=event, hours=hours))
+
+        if send_email and order_ids:
+            transaction.on_commit(lambda: cls.send_confirmation_messages(order_ids, "cancellation_notice"))
+
+        return len(order_ids)
+
+    @classmethod
+    @transaction.atomic
+    def cancel_orders(cls, orders: models.QuerySet["Order"]) -> list[int]:
+        """
+        Set-based version of calling cancel(send_email=False) on each confirmed, non-cancelled order
+        in the queryset: the counters of limit groups are decremented with one grouped query, and codes
+        are revoked and orders cancelled with one UPDATE each. Returns the ids of the orders cancelled.
+        """
+        from ..availability import AvailabilitySnapshot
+        from .limit_group import LimitGroup
+        from .sales_rollup import SalesRollup
+
+        # Order.confirm_payment, cancel and uncancel lock the order too. A payment confirmed concurrently
+        # either commits first (and the row no longer matches an unpaid filter when re-checked under the lock)
+        # or is refused once we commit, as confirm_payment re-reads the order and refuses cancelled ones.
+        rows = list(
+            orders.filter(confirm_time__isnull=False, cancellation_time__isnull=True)
+            .select_for_update()
+            .order_by("id")
+            .values_list("id", "event_id", "confirm_time")
+        )
+        if not rows:
+            return []
+
+        order_ids = [order_id for (order_id, _event_id, _confirm_time) in rows]
+        orders = cls.objects.filter(id__in=order_ids)
+
+        counts = LimitGroup.get_counts_for_orders(orders)
+        LimitGroup.add_sold({limit_group_id: -count for limit_group_id, count in counts.items()})
+
+        if "lippukala" in settings.INSTALLED_APPS:
+            from lippukala.consts import MANUAL_INTERVENTION_REQUIRED, UNUSED
+            from lippukala.models import Code
+
+            Code.objects.filter(
+                order__reference_number__in=orders.exclude(reference_number="").values("reference_number"),
+                status=UNUSED,
+            ).update(status=MANUAL_INTERVENTION_REQUIRED)
+
+        orders.update(cancellation_time=timezone.now())
+
+        # update does not send signals, so do here what ..handlers.sales_rollup would do
+        dates_by_event: dict[int, set[date]] = {}
+        for _order_id, event_id, confirm_time in rows:
+            dates_by_event.setdefault(event_id, set()).add(confirm_time.date())
+
+        for event_id, dates in dates_by_event.items():
+            AvailabilitySnapshot.invalidate(event_id)
+            if SalesRollup.is_enabled():
+                SalesRollup.mark_dirty(event_id, list(dates))
+
+        logger.info(f"Cancelled {len(order_ids)} orders")
+        return order_ids
+
+    @classmethod
+    def send_confirmation_messages(cls, order_ids: list[int], msgtype: str) -> str:
+        """
+        Sends the confirmation message to each order, in the background in batches if background_tasks
+        is enabled. Returns a key for get_confirmation_messages_progress.
+        """
+        from ..tasks import orders_send_confirmation_messages
+
+        progress_key = CONFIRMATION_MESSAGES_PROGRESS_KEY_TEMPLATE.format(job_id=uuid4().hex)
+        cache.set(f"{progress_key}:total", len(order_ids), CONFIRMATION_MESSAGES_PROGRESS_TIMEOUT_SECONDS)
+        cache.set(f"{progress_key}:sent", 0, CONFIRMATION_MESSAGES_PROGRESS_TIMEOUT_SECONDS)
+
+        for i in range(0, len(order_ids), CONFIRMATION_MESSAGES_BATCH_SIZE):
+            batch = order_ids[i : i + CONFIRMATION_MESSAGES_BATCH_SIZE]
+            if "background_tasks" in settings.INSTALLED_APPS:
+                orders_send_confirmation_messages.delay(batch, msgtype, progress_key)  # type: ignore
+            else:
+                orders_send_confirmation_messages(batch, msgtype, progress_key)
 
-        for order in orders:
-            order.cancel(send_email=send_email)
+        return progress_key
 
-        return count
+    @staticmethod
+    def get_confirmation_messages_progress(progress_key: str) -> tuple[int, int]:
+        """
+        Returns (sent, total). Both are 0 if the progress has expired.
+        """
+        return cache.get(f"{progress_key}:sent", 0), cache.get(f"{progress_key}:total", 0)
 
     @staticmethod
     def get_arrivals_by_hour(event: Event | str):
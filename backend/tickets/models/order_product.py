@@ -44,7 +44,7 @@ class OrderProduct(models.Model, CsvExportMixin):
         ]
 
     @classmethod
-    def get_csv_header(cls, event, fields, m2m_mode):
+    def get_csv_header(cls, event, fields, m2m_mode, m2m_choices=None):
         return [
             "payment_date",
             "order_number",
@@ -60,6 +60,10 @@ class OrderProduct(models.Model, CsvExportMixin):
             Product: self.product,
         }
 
+    @classmethod
+    def get_csv_queryset(cls, event, queryset, fields):
+        return queryset.select_related("order", "product")
+
     def __str__(self):
         return self.description
 
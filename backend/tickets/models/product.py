@@ -69,7 +69,9 @@ class Product(models.Model):
 
     @cached_property
     def amount_available(self):
-        return min(group.amount_available for group in self.limit_groups.all())
+        from ..availability import AvailabilitySnapshot
+
+        return AvailabilitySnapshot.get(self.event_id).get_amount_available(self.id)
 
     def refresh_from_db(self, *args, **kwargs):
         super().refresh_from_db(*args, **kwargs)
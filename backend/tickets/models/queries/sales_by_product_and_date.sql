@@ -0,0 +1,17 @@
+select
+    op.product_id,
+    (o.confirm_time at time zone 'UTC')::date as date,
+    sum(op.count) as count,
+    coalesce(sum(op.count) filter (where o.payment_date is not null), 0) as paid_count
+from
+    tickets_orderproduct op
+    join tickets_order o on (op.order_id = o.id)
+where
+    o.event_id = %(event_id)s
+    and o.confirm_time is not null
+    and o.cancellation_time is null
+    and (
+        %(dates)s::date[] is null
+        or (o.confirm_time at time zone 'UTC')::date = any(%(dates)s::date[])
+    )
+group by 1, 2
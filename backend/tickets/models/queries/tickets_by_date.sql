@@ -0,0 +1,28 @@
+with sales as (
+    {sales_query}
+),
+tickets_by_date as (
+    select
+        s.date,
+        sum(s.count) as tickets
+    from
+        sales s
+        join tickets_product p on (s.product_id = p.id)
+    where
+        p.name like %(product_name_pattern)s
+    group by s.date
+),
+dates as (
+    select
+        generate_series(min(date), max(date), interval '1 day')::date as date
+    from
+        tickets_by_date
+)
+select
+    d.date,
+    coalesce(t.tickets, 0) as tickets,
+    sum(coalesce(t.tickets, 0)) over (order by d.date) as cum_tickets
+from
+    dates d
+    left join tickets_by_date t on (t.date = d.date)
+order by d.date
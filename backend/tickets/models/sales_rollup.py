@@ -0,0 +1,183 @@
+import logging
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import date
+
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.db.models import Sum
+from pkg_resources import resource_string
+
+from core.models.event import Event
+
+from ..utils import format_price
+from .product import Product
+
+logger = logging.getLogger("kompassi")
+
+SALES_BY_PRODUCT_AND_DATE_QUERY = resource_string(__name__, "queries/sales_by_product_and_date.sql").decode()
+TICKETS_BY_DATE_QUERY = resource_string(__name__, "queries/tickets_by_date.sql").decode()
+TICKETS_BY_DATE_LIVE_QUERY = TICKETS_BY_DATE_QUERY.format(sales_query=SALES_BY_PRODUCT_AND_DATE_QUERY)
+TICKETS_BY_DATE_ROLLUP_QUERY = TICKETS_BY_DATE_QUERY.format(
+    sales_query="select product_id, date, count, paid_count from tickets_salesrollup where event_id = %(event_id)s",
+)
+REFRESH_SALES_ROLLUP_QUERY = f"""
+insert into tickets_salesrollup (event_id, product_id, date, count, paid_count)
+select %(event_id)s, product_id, date, count, paid_count from ({SALES_BY_PRODUCT_AND_DATE_QUERY}) s
+"""
+
+
+@dataclass
+class ProductSalesRow:
+    product: Product
+    count: int
+    paid_count: int
+
+    @property
+    def cents(self):
+        return format_price(self.count * self.product.price_cents)
+
+    @property
+    def paid_cents(self):
+        return format_price(self.paid_count * self.product.price_cents)
+
+
+@dataclass
+class TicketsByDateRow:
+    date: date
+    tickets: int
+    cum_tickets: int
+
+
+class SalesRollup(models.Model):
+    """
+    Products sold (in confirmed, non-cancelled orders) and paid per product per confirmation date (UTC).
+    Used for sales statistics when KOMPASSI_TICKETS_SALES_ROLLUP is set.
+
+    Dates whose orders change are marked in SalesRollupDirtyDate (see ..handlers.sales_rollup)
+    and refresh recomputes only those dates.
+    """
+
+    event = models.ForeignKey(Event, on_delete=models.CASCADE)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    date = models.DateField()
+    count = models.IntegerField(default=0)
+    paid_count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = [("product", "date")]
+        indexes = [models.Index(fields=["event", "date"], name="tickets_salesrollup_event_date")]
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return settings.KOMPASSI_TICKETS_SALES_ROLLUP
+
+    @classmethod
+    @transaction.atomic
+    def refresh(cls, event: Event, full: bool = False) -> int:
+        """
+        Recomputes the rollup for the dates marked dirty (or, if full is set, all dates) of the event.
+        Returns the number of rollup rows written.
+        """
+        dirty_dates = SalesRollupDirtyDate.objects.filter(event=event)
+        if full:
+            dirty_dates.delete()
+            cls.objects.filter(event=event).delete()
+            dates = None
+        else:
+            dates = list(dirty_dates.select_for_update().values_list("date", flat=True))
+            if not dates:
+                return 0
+
+            dirty_dates.filter(date__in=dates).delete()
+            cls.objects.filter(event=event, date__in=dates).delete()
+
+        with connection.cursor() as cursor:
+            cursor.execute(REFRESH_SALES_ROLLUP_QUERY, dict(event_id=event.id, dates=dates))
+            num_rows = cursor.rowcount
+
+        logger.info(f"Refreshed sales rollup of {event.slug}: {num_rows} rows for dates {dates or 'all'}")
+        return num_rows
+
+    @staticmethod
+    def mark_dirty(event_id: int, dates: Sequence[date]):
+        SalesRollupDirtyDate.objects.bulk_create(
+            [SalesRollupDirtyDate(event_id=event_id, date=d) for d in dates],
+            ignore_conflicts=True,
+        )
+
+    @classmethod
+    def get_sales_by_product(cls, event: Event) -> list[ProductSalesRow]:
+        """
+        Returns sold and paid counts for every product of the event in a single grouped query.
+        """
+        from .order_product import OrderProduct
+
+        if cls.is_enabled():
+            cls.refresh(event)
+            counts = (
+                cls.objects.filter(event=event)
+                .values("product_id")
+                .annotate(
+                    sum_count=Sum("count"),
+                    sum_paid_count=Sum("paid_count"),
+                )
+            )
+        else:
+            counts = (
+                OrderProduct.objects.filter(
+                    order__event=event,
+                    order__confirm_time__isnull=False,
+                    order__cancellation_time__isnull=True,
+                )
+                .values("product_id")
+                .annotate(
+                    sum_count=Sum("count"),
+                    sum_paid_count=Sum("count", filter=models.Q(order__payment_date__isnull=False)),
+                )
+            )
+
+        counts_by_product = {row["product_id"]: row for row in counts.order_by()}
+        return [
+            ProductSalesRow(
+                product=product,
+                count=counts_by_product.get(product.id, {}).get("sum_count") or 0,
+                paid_count=counts_by_product.get(product.id, {}).get("sum_paid_count") or 0,
+            )
+            for product in event.product_set.all()
+        ]
+
+    @classmethod
+    def get_tickets_by_date(cls, event: Event, product_name_contains: str = "lippu") -> list[TicketsByDateRow]:
+        """
+        Returns sold products whose name contains the given string per confirmation date,
+        with dates without sales filled in.
+        """
+        if cls.is_enabled():
+            cls.refresh(event)
+            query = TICKETS_BY_DATE_ROLLUP_QUERY
+        else:
+            query = TICKETS_BY_DATE_LIVE_QUERY
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                query,
+                dict(
+                    event_id=event.id,
+                    dates=None,
+                    product_name_pattern=f"%{product_name_contains}%",
+                ),
+            )
+            return [TicketsByDateRow(*row) for row in cursor.fetchall()]
+
+
+class SalesRollupDirtyDate(models.Model):
+    """
+    Confirmation dates of an event whose rows in SalesRollup need to be recomputed.
+    """
+
+    event = models.ForeignKey(Event, on_delete=models.CASCADE)
+    date = models.DateField()
+
+    class Meta:
+        unique_together = [("event", "date")]
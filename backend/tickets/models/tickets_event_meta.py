@@ -144,6 +144,16 @@ class TicketsEventMeta(ContactEmailMixin, EventMetaBase):
         verbose_name=_("Tickets view version"),
     )
 
+    admission_queue_rate = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name=_("Admission queue rate"),
+        help_text=_(
+            "If set, visitors of the ticket shop are placed in a queue and let in at most this many per minute "
+            "after ticket sales start. Leave empty to let everyone in at once."
+        ),
+    )
+
     def __str__(self):
         return self.event.name
 
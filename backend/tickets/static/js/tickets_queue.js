@@ -0,0 +1,36 @@
+/* Polls the admission queue status and proceeds to the ticket shop when admitted. */
+(function () {
+  var container = document.getElementById("tickets-queue");
+  if (!container) {
+    return;
+  }
+
+  var statusUrl = container.getAttribute("data-status-url");
+  var pollIntervalSeconds = parseInt(container.getAttribute("data-poll-interval-seconds"), 10) || 10;
+  var waitElement = document.getElementById("tickets-queue-wait");
+
+  function poll() {
+    fetch(statusUrl, { credentials: "same-origin", cache: "no-store" })
+      .then(function (response) {
+        if (!response.ok) {
+          throw new Error(response.status);
+        }
+        return response.json();
+      })
+      .then(function (status) {
+        if (status.admitted) {
+          window.location.reload();
+          return;
+        }
+        if (waitElement) {
+          waitElement.textContent = status.estimated_wait_seconds;
+        }
+        window.setTimeout(poll, status.poll_interval_seconds * 1000);
+      })
+      .catch(function () {
+        window.setTimeout(poll, pollIntervalSeconds * 1000);
+      });
+  }
+
+  window.setTimeout(poll, pollIntervalSeconds * 1000);
+})();
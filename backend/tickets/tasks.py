@@ -1,4 +1,10 @@
+import logging
+from contextlib import suppress
+
 from celery import shared_task
+from django.core.cache import cache
+
+logger = logging.getLogger("kompassi")
 
 
 @shared_task(ignore_result=True)
@@ -7,3 +13,35 @@ def order_send_confirmation_message(order_id: int, msgtype: str):
 
     order = Order.objects.get(pk=order_id)
     order._send_confirmation_message(msgtype)
+
+
+@shared_task(ignore_result=True)
+def order_render_etickets(order_id: int):
+    from .models import Order
+
+    order = Order.objects.get(pk=order_id)
+    order.get_etickets_pdf()
+
+
+@shared_task(ignore_result=True)
+def orders_send_confirmation_messages(order_ids: list[int], msgtype: str, progress_key: str = ""):
+    from .models import Order
+
+    orders = list(Order.objects.filter(id__in=order_ids).select_related("customer", "event"))
+
+    if progress_key and (num_missing := len(order_ids) - len(orders)):
+        # orders deleted in the meantime count as done, lest the progress never complete
+        with suppress(ValueError):
+            cache.incr(f"{progress_key}:sent", num_missing)
+
+    for order in orders:
+        try:
+            order._send_confirmation_message(msgtype)
+        except Exception:
+            # one bad order must not keep the rest of the batch from being notified
+            logger.exception(f"Failed to send {msgtype} for order {order.pk}")
+
+        if progress_key:
+            # ValueError if the progress has expired or been evicted
+            with suppress(ValueError):
+                cache.incr(f"{progress_key}:sent")
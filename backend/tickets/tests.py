@@ -1,6 +1,16 @@
-from django.test import TestCase
+from dataclasses import asdict, replace
+from datetime import date, timedelta
 
-from .models import LimitGroup, Order, Product
+from django.core import signing
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+
+from core.models import Person
+
+from .admission_queue import QueueTicket, get_cookie_name
+from .availability import AvailabilitySnapshot
+from .lippukala_integration import generate_codes
+from .models import Customer, LimitGroup, Order, Product, SalesRollup, SalesRollupDirtyDate, SoldOut
 
 
 class LimitGroupsTestCase(TestCase):
@@ -34,3 +44,245 @@ class LimitGroupsTestCase(TestCase):
         assert not weekend.in_stock
         assert not saturday.in_stock
         assert sunday.in_stock
+
+    def test_sold_counters(self):
+        limit_saturday, limit_sunday = LimitGroup.get_or_create_dummies()
+        weekend, saturday, sunday = Product.get_or_create_dummies()
+
+        order, unused = Order.get_or_create_dummy()
+        order.order_product_set.create(product=weekend, count=3000)
+        order.order_product_set.create(product=saturday, count=2000)
+
+        # unconfirmed orders do not count
+        limit_saturday.refresh_from_db()
+        assert limit_saturday.amount_sold == 0
+
+        order.confirm_order()
+        limit_saturday.refresh_from_db()
+        limit_sunday.refresh_from_db()
+        assert limit_saturday.amount_sold == 5000
+        assert limit_sunday.amount_sold == 3000
+
+        # there is no more room on saturday
+        with self.assertRaises(SoldOut):
+            LimitGroup.add_sold({limit_sunday.id: 1, limit_saturday.id: 1}, check_limit=True)
+        limit_sunday.refresh_from_db()
+        assert limit_sunday.amount_sold == 3000
+
+        order.cancel(send_email=False)
+        limit_saturday.refresh_from_db()
+        assert limit_saturday.amount_sold == 0
+
+        order.uncancel(send_email=False)
+        limit_saturday.refresh_from_db()
+        assert limit_saturday.amount_sold == 5000
+
+        # counters agree with the order products
+        LimitGroup.objects.update(count_sold=0)
+        LimitGroup.refresh_counters(LimitGroup.objects.all())
+        limit_saturday.refresh_from_db()
+        limit_sunday.refresh_from_db()
+        assert limit_saturday.amount_sold == 5000
+        assert limit_sunday.amount_sold == 3000
+
+    def test_stale_instances(self):
+        limit_saturday, limit_sunday = LimitGroup.get_or_create_dummies()
+        weekend, saturday, sunday = Product.get_or_create_dummies()
+
+        order, unused = Order.get_or_create_dummy()
+        order.order_product_set.create(product=saturday, count=2)
+
+        # eg. a double-submitted checkout: both requests loaded the order before either confirmed it
+        stale = Order.objects.get(id=order.id)
+        order.confirm_order()
+        with self.assertRaises(ValueError):
+            stale.confirm_order()
+        limit_saturday.refresh_from_db()
+        assert limit_saturday.amount_sold == 2
+
+        # concurrent cancels decrement the counters only once
+        stale = Order.objects.get(id=order.id)
+        paying = Order.objects.get(id=order.id)
+        order.cancel(send_email=False)
+        stale.cancel(send_email=False)
+        limit_saturday.refresh_from_db()
+        assert limit_saturday.amount_sold == 0
+
+        # a payment callback holding an order from before it was cancelled does not uncancel it
+        with self.assertRaises(ValueError):
+            paying.confirm_payment(send_email=False)
+        order.refresh_from_db()
+        assert order.is_cancelled
+        assert not order.is_paid
+
+    def test_availability_snapshot(self):
+        weekend, saturday, sunday = Product.get_or_create_dummies()
+        AvailabilitySnapshot.invalidate(weekend.event_id)
+
+        products = list(Product.objects.filter(id__in=[weekend.id, saturday.id, sunday.id]))
+        with self.assertNumQueries(1):
+            AvailabilitySnapshot.get(weekend.event_id).prime(products)
+            assert [product.amount_available for product in products] == [5000, 5000, 5000]
+
+        order, unused = Order.get_or_create_dummy()
+        order.order_product_set.create(product=weekend, count=3000)
+        order.confirm_order()
+
+        # confirming invalidated the snapshot
+        snapshot = AvailabilitySnapshot.get(weekend.event_id)
+        assert snapshot.get_amount_available(weekend.id) == 2000
+        assert snapshot.get_amount_available(saturday.id) == 2000
+
+        order.cancel(send_email=False)
+        assert AvailabilitySnapshot.get(weekend.event_id).get_amount_available(sunday.id) == 5000
+
+    def test_cancel_unpaid_orders(self):
+        limit_saturday, limit_sunday = LimitGroup.get_or_create_dummies()
+        weekend, saturday, sunday = Product.get_or_create_dummies()
+
+        order, unused = Order.get_or_create_dummy()
+        order.order_product_set.create(product=weekend, count=3)
+        order.confirm_order()
+
+        paid_order = Order.objects.create(
+            event=order.event,
+            customer=Customer.objects.create(first_name="Paid", last_name="Testinen", email="paid@example.com"),
+        )
+        paid_order.order_product_set.create(product=saturday, count=2)
+        paid_order.confirm_order()
+        paid_order.payment_date = date.today()
+        paid_order.save()
+
+        Order.objects.filter(id__in=[order.id, paid_order.id]).update(confirm_time=now() - timedelta(days=30))
+
+        assert Order.cancel_unpaid_orders(order.event) == 1
+
+        order.refresh_from_db()
+        paid_order.refresh_from_db()
+        assert order.is_cancelled
+        assert not paid_order.is_cancelled
+
+        limit_saturday.refresh_from_db()
+        limit_sunday.refresh_from_db()
+        assert limit_saturday.amount_sold == 2
+        assert limit_sunday.amount_sold == 0
+
+        # already cancelled orders are not cancelled (nor subtracted) again
+        assert Order.cancel_unpaid_orders(order.event) == 0
+
+    def test_confirmation_messages_progress_with_deleted_order(self):
+        order, unused = Order.get_or_create_dummy()
+        order_id = order.id
+        order.delete()
+
+        progress_key = Order.send_confirmation_messages([order_id], "cancellation_notice")
+        assert Order.get_confirmation_messages_progress(progress_key) == (1, 1)
+
+
+class ETicketsTestCase(TestCase):
+    def test_lippukala_create_codes(self):
+        weekend, saturday, sunday = Product.get_or_create_dummies()
+
+        order, unused = Order.get_or_create_dummy()
+        order.order_product_set.create(product=weekend, count=3)
+        order.order_product_set.create(product=saturday, count=2)
+        order.confirm_order()
+        order.confirm_payment(send_email=False)
+
+        lippukala_order = order.lippukala_order
+        codes = list(lippukala_order.code_set.all())
+        assert len(codes) == 5
+        assert len({code.code for code in codes}) == 5
+        assert all(code.literate_code for code in codes)
+
+        # the cache key changes with the codes
+        cache_key = order.get_etickets_cache_key(lippukala_order)
+        assert order.get_etickets_cache_key(lippukala_order) == cache_key
+        order.lippukala_revoke_codes()
+        assert order.get_etickets_cache_key(lippukala_order) != cache_key
+
+    def test_generate_codes_within_batch(self):
+        class FakeCode:
+            # _generate_code only avoids codes in the database, so it may hand out the same code twice
+            candidates = iter(["1111", "1111", "1111", "2222"])
+
+            def _generate_code(self):
+                self.code = next(self.candidates)
+
+            def _generate_literate_code(self):
+                self.literate_code = f"literate {self.code}"
+
+        codes = generate_codes([FakeCode(), FakeCode()])
+        assert [code.code for code in codes] == ["1111", "2222"]
+        assert codes[1].literate_code == "literate 2222"
+
+
+class SalesStatsTestCase(TestCase):
+    def test_sales_stats(self):
+        weekend, saturday, sunday = Product.get_or_create_dummies()
+        event = weekend.event
+
+        order, unused = Order.get_or_create_dummy()
+        order.order_product_set.create(product=weekend, count=3)
+        order.order_product_set.create(product=saturday, count=2)
+        order.confirm_order()
+        order.payment_date = date.today()
+        order.save()
+
+        live_rows = SalesRollup.get_sales_by_product(event)
+        counts = {row.product: (row.count, row.paid_count) for row in live_rows}
+        assert counts[weekend] == (3, 3)
+        assert counts[saturday] == (2, 2)
+        assert counts[sunday] == (0, 0)
+
+        with override_settings(KOMPASSI_TICKETS_SALES_ROLLUP=True):
+            SalesRollup.refresh(event, full=True)
+            assert SalesRollup.get_sales_by_product(event) == live_rows
+
+            # changes are picked up incrementally
+            order.cancel(send_email=False)
+            assert SalesRollupDirtyDate.objects.filter(event=event).exists()
+            counts = {row.product: (row.count, row.paid_count) for row in SalesRollup.get_sales_by_product(event)}
+            assert counts[weekend] == (0, 0)
+            assert not SalesRollupDirtyDate.objects.filter(event=event).exists()
+
+    def test_payments_over_time_minutes_bounds(self):
+        person, unused = Person.get_or_create_dummy(superuser=True)
+        order, unused = Order.get_or_create_dummy()
+        self.client.force_login(person.user)
+
+        url = f"/events/{order.event.slug}/tickets/admin/reports/payments.json"
+        assert self.client.get(url, dict(minutes="60")).status_code == 200
+        for minutes in ["0", "-60", str(24 * 60 + 1), "lots"]:
+            assert self.client.get(url, dict(minutes=minutes)).status_code == 400, minutes
+
+
+class AdmissionQueueTestCase(TestCase):
+    def test_queue_ticket(self):
+        ticket = QueueTicket(event_slug="dummy", position=25, opens_at=1_000_000, rate=10)
+
+        assert not ticket.is_admitted(t=ticket.opens_at - 1)
+        assert ticket.get_admitted_count(t=ticket.opens_at) == 10
+        assert not ticket.is_admitted(t=ticket.opens_at + 119)
+        assert ticket.get_estimated_wait_seconds(t=ticket.opens_at + 90) == 30
+        assert ticket.is_admitted(t=ticket.opens_at + 120)
+        assert ticket.get_estimated_wait_seconds(t=ticket.opens_at + 120) == 0
+
+        assert QueueTicket.loads(ticket.dumps()) == ticket
+
+        # a token signed with another salt (or tampered with) is rejected
+        forged = signing.dumps(asdict(replace(ticket, position=1)), salt="forged", compress=True)
+        assert QueueTicket.loads(forged) is None
+
+    def test_queue_status_view(self):
+        ticket = QueueTicket(event_slug="dummy", position=1, opens_at=0, rate=10)
+        self.client.cookies[get_cookie_name("dummy")] = ticket.dumps()
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/tickets/queue/dummy/status")
+
+        assert response.status_code == 200
+        assert response.json()["admitted"]
+
+        response = self.client.get("/tickets/queue/other/status")
+        assert response.status_code == 404
@@ -11,11 +11,13 @@ from .views import (
     tickets_admin_order_view,
     tickets_admin_orders_view,
     tickets_admin_pos_view,
+    tickets_admin_reports_payments_view,
     tickets_admin_reports_view,
     tickets_admin_stats_by_date_view,
     tickets_admin_stats_view,
     tickets_admin_tools_view,
     tickets_confirm_view,
+    tickets_queue_status_view,
     tickets_router_view,
     tickets_thanks_view,
     tickets_tickets_view,
@@ -27,6 +29,12 @@ urlpatterns = [
         tickets_router_view,
         name="tickets_welcome_view",
     ),
+    re_path(
+        # NOTE: no event_slug kwarg so that EventOrganizationMiddleware does not hit the database on every poll
+        r"tickets/queue/(?P<queue_event_slug>[a-z0-9-]+)/status/?$",
+        tickets_queue_status_view,
+        name="tickets_queue_status_view",
+    ),
     re_path(
         r"events/(?P<event_slug>[a-z0-9-]+)/tickets/products/?$",
         tickets_tickets_view,
@@ -113,6 +121,11 @@ urlpatterns = [
         tickets_admin_reports_view,
         name="tickets_admin_reports_view",
     ),
+    re_path(
+        r"events/(?P<event_slug>[a-z0-9-]+)/tickets/admin/reports/payments\.json$",
+        tickets_admin_reports_payments_view,
+        name="tickets_admin_reports_payments_view",
+    ),
     re_path(
         r"events/(?P<event_slug>[a-z0-9-]+)/tickets/admin/pos/?$",
         tickets_admin_pos_view,
@@ -12,8 +12,8 @@ from .admin_views import (
     tickets_admin_stats_view,
     tickets_admin_tools_view,
 )
-from .tickets_admin_reports_view import tickets_admin_reports_view
-from .tickets_v1_5_views import tickets_router_view
+from .tickets_admin_reports_view import tickets_admin_reports_payments_view, tickets_admin_reports_view
+from .tickets_v1_5_views import tickets_queue_status_view, tickets_router_view
 from .tickets_v1_views import (
     ALL_PHASES,
     tickets_accommodation_view,
@@ -1,11 +1,8 @@
-import datetime
-from collections import defaultdict
-
 from csp.decorators import csp_exempt
 from django.contrib import messages
 from django.core.exceptions import PermissionDenied
 from django.core.paginator import EmptyPage, InvalidPage, Paginator
-from django.db.models import Q, Sum
+from django.db.models import Count, Q
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils.timezone import now
@@ -34,6 +31,7 @@ from ..models import (
     LimitGroup,
     Order,
     OrderProduct,
+    SalesRollup,
 )
 from ..models.consts import UNPAID_CANCEL_HOURS
 from ..utils import format_price
@@ -49,51 +47,18 @@ __all__ = [
 
 @tickets_admin_required
 def tickets_admin_stats_view(request, vars, event):
-    confirmed_orders = event.order_set.filter(confirm_time__isnull=False)
-    cancelled_orders = confirmed_orders.filter(cancellation_time__isnull=False)
-    paid_orders = confirmed_orders.filter(cancellation_time__isnull=True, payment_date__isnull=False)
-
-    data = []
-    total_cents = 0
-    total_paid_cents = 0
-
-    for product in event.product_set.all():
-        soldop_set = product.order_product_set.filter(
-            order__confirm_time__isnull=False, order__cancellation_time__isnull=True
-        )
-        paidop_set = soldop_set.filter(order__payment_date__isnull=False)
-
-        count = soldop_set.aggregate(count=Sum("count"))["count"]
-        count = count if count is not None else 0
-
-        paid_count = paidop_set.aggregate(count=Sum("count"))["count"]
-        paid_count = paid_count if paid_count is not None else 0
-
-        cents = count * product.price_cents
-        total_cents += cents
-
-        paid_cents = paid_count * product.price_cents
-        total_paid_cents += paid_cents
-
-        item = dict(
-            product=product,
-            count=count,
-            cents=format_price(cents),
-            paid_count=paid_count,
-            paid_cents=format_price(paid_cents),
-        )
-        data.append(item)
-
-    total_price = format_price(total_cents)
-    total_paid_price = format_price(total_paid_cents)
+    data = SalesRollup.get_sales_by_product(event)
+    order_counts = event.order_set.filter(confirm_time__isnull=False).aggregate(
+        num_confirmed_orders=Count("id"),
+        num_cancelled_orders=Count("id", filter=Q(cancellation_time__isnull=False)),
+        num_paid_orders=Count("id", filter=Q(cancellation_time__isnull=True, payment_date__isnull=False)),
+    )
 
     vars.update(
         data=data,
-        num_confirmed_orders=confirmed_orders.count(),
-        num_cancelled_orders=cancelled_orders.count(),
-        num_paid_orders=paid_orders.count(),
-        total_price=total_price,
-        total_paid_price=total_paid_price,
+        total_price=format_price(sum(row.count * row.product.price_cents for row in data)),
+        total_paid_price=format_price(sum(row.paid_count * row.product.price_cents for row in data)),
+        **order_counts,
     )
 
     return render(request, "tickets_admin_stats_view.pug", vars)
@@ -101,34 +66,9 @@ def tickets_admin_stats_view(request, vars, event):
 
 @tickets_admin_required
 def tickets_admin_stats_by_date_view(request, vars, event, raw=False):
-    confirmed_orders = event.order_set.filter(
-        confirm_time__isnull=False,
-        cancellation_time__isnull=True,
-        order_product_set__product__name__contains="lippu",
-    ).distinct()
-    tickets_by_date = defaultdict(int)
-
-    for order in confirmed_orders:
-        date = order.confirm_time.date()
-
-        # XXX this deserves an "XXX"
-        for op in order.order_product_set.filter(product__name__contains="lippu").distinct():
-            tickets_by_date[date] += op.count
-
-    min_date = min(tickets_by_date.keys())
-    max_date = max(tickets_by_date.keys())
-
-    cur_date = min_date
-
-    tsv = list()
-
-    while cur_date <= max_date:
-        tickets = tickets_by_date[cur_date]
-        tsv.append(f"{cur_date.isoformat()}\t{tickets}")
-
-        cur_date += datetime.timedelta(1)
-
-    tsv = "\n".join(tsv)
+    # XXX this deserves an "XXX"
+    tickets_by_date = SalesRollup.get_tickets_by_date(event, product_name_contains="lippu")
+    tsv = "\n".join(f"{row.date.isoformat()}\t{row.tickets}" for row in tickets_by_date)
 
     if raw:
         response = HttpResponse(tsv, content_type="text/plain")
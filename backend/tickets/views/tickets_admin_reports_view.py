@@ -1,10 +1,20 @@
+from dataclasses import asdict
+from datetime import timedelta
+
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render
+from django.utils.timezone import now
+from django.views.decorators.http import require_safe
 
 from payments.models import CheckoutPayment
+from payments.models.checkout_payment import PAYMENTS_BUCKET_SECONDS
 
 from ..helpers import tickets_admin_required
 from ..models import Order, ProductHandout
 
+PAYMENTS_OVER_TIME_MINUTES = 120
+MAX_PAYMENTS_OVER_TIME_MINUTES = 24 * 60
+
 
 @tickets_admin_required
 def tickets_admin_reports_view(request, vars, event):
@@ -12,7 +22,40 @@ def tickets_admin_reports_view(request, vars, event):
         arrivals_by_hour=Order.get_arrivals_by_hour(event),
         orders_by_payment_status=CheckoutPayment.get_orders_by_payment_status(event),
         payments_by_payment_method=CheckoutPayment.get_payments_by_payment_method(event),
+        payments_by_payment_method_over_time=CheckoutPayment.get_payments_by_payment_method_over_time(
+            event,
+            since=now() - timedelta(minutes=PAYMENTS_OVER_TIME_MINUTES),
+        ),
+        payments_over_time_minutes=PAYMENTS_OVER_TIME_MINUTES,
         product_handouts=ProductHandout.get_product_handouts(event),
     )
 
     return render(request, "tickets_admin_reports_view.pug", vars)
+
+
+@tickets_admin_required
+@require_safe
+def tickets_admin_reports_payments_view(request, vars, event):
+    """
+    Payments per payment method per five minutes as JSON, for polling during a sale.
+    """
+    try:
+        minutes = int(request.GET.get("minutes", PAYMENTS_OVER_TIME_MINUTES))
+    except ValueError:
+        return HttpResponse("invalid minutes", status=400)
+
+    # reading further back would defeat the purpose of polling a short window
+    if not 1 <= minutes <= MAX_PAYMENTS_OVER_TIME_MINUTES:
+        return HttpResponse(f"minutes must be between 1 and {MAX_PAYMENTS_OVER_TIME_MINUTES}", status=400)
+
+    rows = CheckoutPayment.get_payments_by_payment_method_over_time(
+        event,
+        since=now() - timedelta(minutes=minutes),
+    )
+
+    return JsonResponse(
+        dict(
+            bucket_seconds=PAYMENTS_BUCKET_SECONDS,
+            rows=[dict(asdict(row), num_total=row.num_total) for row in rows],
+        )
+    )
@@ -5,29 +5,83 @@ https://outline.con2.fi/doc/ticket-sales-1cFCJvcZxc
 
 from csp.decorators import csp_update
 from django.contrib import messages
-from django.db import connection, transaction
+from django.db import transaction
+from django.http import JsonResponse
 from django.shortcuts import redirect, render
+from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import require_http_methods, require_safe
 
-from core.utils import initialize_form
+from core.utils import initialize_form, retry_on_serialization_failure
 from payments.models.checkout_payment import CHECKOUT_PAYMENT_WALL_ORIGIN, CheckoutPayment
 
+from ..admission_queue import QueueTicket, get_queue_ticket, is_exempt_from_queue
 from ..forms import CustomerForm, OrderProductForm
 from ..helpers import tickets_event_required
+from ..models.limit_group import SoldOut
 from .tickets_v1_views import clear_order, get_order, set_order, tickets_welcome_view
 
 
 @tickets_event_required
 @require_http_methods(["GET", "HEAD", "POST"])
 def tickets_router_view(request, event, *args, **kwargs):
+    meta = event.tickets_event_meta
+
+    if not is_exempt_from_queue(request, meta):
+        queue_ticket, is_new_ticket = get_queue_ticket(request, meta)
+        if not queue_ticket.is_admitted():
+            response = tickets_queue_view(request, event, queue_ticket)
+        else:
+            response = route_tickets_view(request, event, *args, **kwargs)
+
+        if is_new_ticket:
+            queue_ticket.set_cookie(response)
+
+        return response
+
+    return route_tickets_view(request, event, *args, **kwargs)
+
+
+def route_tickets_view(request, event, *args, **kwargs):
     if event.tickets_event_meta.tickets_view_version == "v1.5":
         return tickets_view(request, event, *args, **kwargs)
     else:
         return tickets_welcome_view(request, event.slug, *args, **kwargs)
 
 
+def tickets_queue_view(request, event, queue_ticket: QueueTicket):
+    vars = dict(
+        event=event,
+        queue_status=queue_ticket.get_status(),
+        queue_status_url=reverse("tickets_queue_status_view", args=(event.slug,)),
+    )
+
+    return render(request, "v1.5/tickets_queue_view.pug", vars)
+
+
+@require_safe
+def tickets_queue_status_view(request, queue_event_slug):
+    """
+    Polled by the waiting room page. Must not touch the database or the session:
+    the URL deliberately lacks event_slug so that EventOrganizationMiddleware leaves it alone,
+    and everything needed is in the signed queue token.
+    """
+    queue_ticket = QueueTicket.from_request(request, queue_event_slug)
+    if queue_ticket is None:
+        return JsonResponse(dict(error="no_queue_token"), status=404)
+
+    response = JsonResponse(queue_ticket.get_status())
+    response["Cache-Control"] = "no-store"
+    return response
+
+
+NOT_AVAILABLE_MESSAGE = _(
+    "We're sorry to inform you that a product you have selected is not available in the quantity you have requested."
+)
+
+
 @csp_update(FORM_ACTION=CHECKOUT_PAYMENT_WALL_ORIGIN)
+@retry_on_serialization_failure()
 def tickets_view(request, event):
     order = get_order(request, event)
     if order.is_confirmed:
@@ -35,11 +89,9 @@ def tickets_view(request, event):
 
     code = request.GET.get("code", "")
 
+    # Availability is enforced by the sold counters of limit groups in order.confirm_order.
+    # Running at the default isolation level, concurrent buyers only contend on the counter rows.
     with transaction.atomic():
-        # TODO handle serialization_failure
-        cursor = connection.cursor()
-        cursor.execute("set transaction isolation level serializable")
-
         order_product_forms = OrderProductForm.get_for_order(request, order, code=code)
         customer_form = initialize_form(CustomerForm, request, order=order)
 
@@ -64,15 +116,9 @@ def tickets_view(request, event):
             messages.error(request, _("Please select at least one product."))
             return render(request, "v1.5/tickets_view.pug", vars)
 
-        # TODO as OrderProductForm sets max_value, this should not be necessary
+        # fail fast without writing anything if the products are known to be unavailable
         if any(op.product.amount_available < op.count for op in order_products):
-            messages.error(
-                request,
-                _(
-                    "We're sorry to inform you that a product you have selected "
-                    "is not available in the quantity you have requested."
-                ),
-            )
+            messages.error(request, NOT_AVAILABLE_MESSAGE)
             return render(request, "v1.5/tickets_view.pug", vars)
 
         order.save()
@@ -86,7 +132,13 @@ def tickets_view(request, event):
             op.order = order
             op.save()
 
-        order.confirm_order()
+        try:
+            # savepoint so that the unconfirmed order is retained for the customer to adjust
+            with transaction.atomic():
+                order.confirm_order()
+        except SoldOut:
+            messages.error(request, NOT_AVAILABLE_MESSAGE)
+            return render(request, "v1.5/tickets_view.pug", vars)
 
         payment = CheckoutPayment.from_order(order)
         payment.save()
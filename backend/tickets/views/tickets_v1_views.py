@@ -1,5 +1,6 @@
 from csp.decorators import csp_update
 from django.contrib import messages
+from django.db import transaction
 from django.http import HttpResponseNotAllowed
 from django.shortcuts import redirect, render
 from django.utils.translation import gettext_lazy as _
@@ -8,6 +9,7 @@ from core.utils import initialize_form, url
 from payments.models.checkout_payment import CHECKOUT_PAYMENT_WALL_ORIGIN
 
 # XXX * imports
+from ..admission_queue import is_admitted
 from ..forms import AccommodationInformationForm, CustomerForm, NullForm, OrderProductForm
 from ..helpers import (
     clear_order,
@@ -18,7 +20,7 @@ from ..helpers import (
     set_order,
     tickets_event_required,
 )
-from ..models import OrderProduct
+from ..models import OrderProduct, SoldOut
 
 
 def multiform_validate(forms):
@@ -47,6 +49,10 @@ def decorate(view_obj):
 
     @tickets_event_required
     def wrapper(request, event, *args, **kwargs):
+        if view_obj.admission_queue and not is_admitted(request, event.tickets_event_meta):
+            # the welcome view (tickets_router_view) shows the queue
+            return redirect("tickets_welcome_view", event.slug)
+
         return view_obj(request, event, *args, **kwargs)
 
     return wrapper
@@ -63,6 +69,7 @@ class Phase:
     can_cancel = True
     index = None
     delay_complete = False
+    admission_queue = False
 
     def __call__(self, request, event):
         if request.method not in self.methods:
@@ -215,6 +222,7 @@ tickets_welcome_view = decorate(tickets_welcome_phase)
 class TicketsPhase(Phase):
     name = "tickets_tickets_view"
     friendly_name = _("Tickets")
+    admission_queue = True
     template = "tickets_tickets_phase.pug"
     prev_phase = "tickets_welcome_view"
     next_phase = "tickets_address_view"
@@ -347,6 +355,20 @@ class ConfirmPhase(Phase):
             errors.append("soldout_confirm")
             return errors
 
+        # Confirming the order reserves the products, which may still fail if someone else got them first.
+        # This needs to be done here rather than in save so that the customer is told about it.
+        if request.POST.get("action") == "next" and not order.is_confirmed:
+            try:
+                with transaction.atomic():
+                    order.confirm_order()
+            except SoldOut:
+                messages.error(
+                    request,
+                    _("We're sorry to inform you that a product you have selected has just been sold out."),
+                )
+                errors.append("soldout_confirm")
+                return errors
+
         return []
 
     def vars(self, request, event, form):
@@ -362,11 +384,8 @@ class ConfirmPhase(Phase):
         return is_phase_completed(request, event, self.prev_phase) and not order.is_paid
 
     def save(self, request, event, form):
-        order = get_order(request, event)
-        action = request.POST.get("action", "cancel")
-
-        if action == "next" and not order.is_confirmed:
-            order.confirm_order()
+        # the order was confirmed in validate
+        pass
 
     def can_go_back(self, request, event):
         order = get_order(request, event)